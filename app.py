@@ -1,28 +1,104 @@
 import os
+import time
 import uuid
+import tempfile
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify, flash, redirect, url_for
+from flask import Flask, render_template, request, jsonify, flash, redirect, url_for, Response, stream_with_context, g
 from werkzeug.utils import secure_filename
-import numpy as np
-from PIL import Image
-import cv2
 import json
 
-from utils.news_detector import NewsAnalyzer
-from utils.deepfake_detector import DeepfakeDetector
+from config import Config
+from utils.lazy import LazyLoader
+from utils.news_detector import NewsAnalyzer, summarize_batch
+from utils.job_queue import JobQueue, QueueFullError, run_batch_job, run_video_job
+from utils.result_cache import get_result_cache
+from utils.analytics import get_analytics, verdict_of
+from utils import metrics
 
 # Initialize Flask app
 app = Flask(__name__)
-app.config.from_pyfile('config.py')
+# from_pyfile() only picks up module-level names, which left SECRET_KEY and
+# MAX_CONTENT_LENGTH (the request body limit) unset
+app.config.from_object(Config)
 
 # Create upload directories if they don't exist
 os.makedirs('static/uploads/text', exist_ok=True)
 os.makedirs('static/uploads/images', exist_ok=True)
 os.makedirs('static/uploads/videos', exist_ok=True)
 
-# Initialize detectors
-news_analyzer = NewsAnalyzer()
-deepfake_detector = DeepfakeDetector()
+def _create_deepfake_detector():
+    # Imported here so text-only workers never load OpenCV/TensorFlow
+    from utils.deepfake_detector import DeepfakeDetector
+    return DeepfakeDetector()
+
+# Detectors are built on first use; see warm_up() to load them up front
+news_analyzer = LazyLoader(NewsAnalyzer)
+deepfake_detector = LazyLoader(_create_deepfake_detector)
+
+def warm_up(detectors='all'):
+    """Load detectors (and run a tiny inference) before serving traffic"""
+    if detectors in ('text', 'all'):
+        news_analyzer.warm_up()
+    if detectors in ('media', 'all'):
+        deepfake_detector.get()
+
+# Detection events for the dashboard (buffered, written in the background)
+analytics = get_analytics()
+
+def elapsed_ms(started):
+    return (time.perf_counter() - started) * 1000
+
+def record_detections(kind, results, latency_ms, model_version=None):
+    """Queue one analytics event per result; latency is split evenly across a batch"""
+    if analytics is None or not results:
+        return
+    latency_ms /= len(results)
+    for result in results:
+        score = result.get('fake_probability') if isinstance(result, dict) else None
+        analytics.record(kind, verdict_of(result), score, latency_ms, model_version)
+
+def record_job(job):
+    """Analytics for background jobs, recorded when they finish"""
+    if job['status'] != 'done':
+        return
+    latency_ms = (job['finished_at'] - job['submitted_at']) * 1000
+    if job['kind'] == 'batch':
+        record_detections('text', job['result']['details'], latency_ms)
+    else:
+        record_detections(job['kind'], [job['result']], latency_ms)
+
+@app.before_request
+def reject_oversized_body():
+    # Checked before the views, whose broad except would turn the 413 into a 500
+    if request.content_length is not None and request.content_length > Config.MAX_CONTENT_LENGTH:
+        return too_large(None)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    if request.headers.get(Config.PROFILE_HEADER, '').lower() in ('1', 'true'):
+        metrics.start_profile()
+
+@app.after_request
+def finish_request_timer(response):
+    """Request latency histogram, plus the stage breakdown for profiled requests"""
+    started = g.pop('request_started', None)
+    if started is not None:
+        metrics.observe_request(request.endpoint or 'unmatched', time.perf_counter() - started)
+    
+    profile = metrics.current_profile()
+    if profile is not None:
+        metrics.stop_profile()
+        # Streamed responses are still running here, so only plain JSON bodies get a profile
+        if response.is_json and not response.is_streamed:
+            body = response.get_json(silent=True)
+            if isinstance(body, dict):
+                body['profile'] = profile.report()
+                response.set_data(json.dumps(body))
+    return response
+
+# Background jobs for long video and batch requests
+job_queue = JobQueue(on_finish=record_job)
 
 # Allowed file extensions
 ALLOWED_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp'}
@@ -34,6 +110,23 @@ def allowed_image_file(filename):
 def allowed_video_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_VIDEO_EXTENSIONS
 
+def save_video_upload(file, unique_filename):
+    """
+    Write a video upload to disk for OpenCV
+    Returns (path, is_temporary): kept under static/uploads when
+    RETAIN_UPLOADS is set, otherwise a temp file the caller must remove
+    """
+    if Config.RETAIN_UPLOADS:
+        filepath = os.path.join('static/uploads/videos', unique_filename)
+        file.save(filepath)
+        return filepath, False
+    
+    fd, filepath = tempfile.mkstemp(suffix=os.path.splitext(unique_filename)[1],
+                                    dir=Config.VIDEO_TEMP_DIR or None)
+    os.close(fd)
+    file.save(filepath)
+    return filepath, True
+
 @app.route('/')
 def index():
     """Home page with detection options"""
@@ -43,6 +136,7 @@ def index():
 def detect_news():
     """Detect fake news from text input or URL"""
     try:
+        started = time.perf_counter()
         data_type = request.form.get('data_type', 'text')
         detection_method = request.form.get('detection_method', 'ml')
         
@@ -65,6 +159,7 @@ def detect_news():
         else:
             return jsonify({'error': 'Invalid data type'}), 400
         
+        record_detections(data_type, [result], elapsed_ms(started), news_analyzer.model_version)
         return jsonify(result)
         
     except Exception as e:
@@ -85,21 +180,33 @@ def detect_deepfake():
         # Generate unique filename
         filename = secure_filename(file.filename)
         unique_filename = f"{uuid.uuid4().hex}_{filename}"
+        started = time.perf_counter()
         
-        # Check file type and save accordingly
+        # Check file type and analyze accordingly
         if allowed_image_file(filename):
-            filepath = os.path.join('static/uploads/images', unique_filename)
-            file.save(filepath)
+            # Decode straight from memory; only written out when retention is on
+            data = file.read()
+            if Config.RETAIN_UPLOADS:
+                with open(os.path.join('static/uploads/images', unique_filename), 'wb') as f:
+                    f.write(data)
             
             # Detect deepfake in image
-            result = deepfake_detector.detect_image(filepath)
+            result = deepfake_detector.detect_image(data)
             
         elif allowed_video_file(filename):
-            filepath = os.path.join('static/uploads/videos', unique_filename)
-            file.save(filepath)
+            # Detect deepfake in video, optionally sampling by time interval
+            # or stopping early once the verdict is confident
+            sample_interval = request.form.get('sample_interval', type=float)
+            adaptive = request.form.get('adaptive', '').lower() in ('1', 'true', 'yes')
             
-            # Detect deepfake in video
-            result = deepfake_detector.detect_video(filepath)
+            if Config.RETAIN_UPLOADS:
+                filepath, _ = save_video_upload(file, unique_filename)
+                video = filepath
+            else:
+                # Streamed in chunks to a per-request temp file, removed afterwards
+                video = file.stream
+            result = deepfake_detector.detect_video(video, sample_interval=sample_interval,
+                                                    adaptive=adaptive)
             
         else:
             return jsonify({'error': 'File type not supported. Use images or videos.'}), 400
@@ -108,12 +215,55 @@ def detect_deepfake():
         result['filename'] = unique_filename
         result['file_type'] = 'image' if allowed_image_file(filename) else 'video'
         
+        record_detections(result['file_type'], [result], elapsed_ms(started),
+                          deepfake_detector.model_version)
         return jsonify(result)
         
     except Exception as e:
         app.logger.error(f"Error in detect_deepfake: {str(e)}")
         return jsonify({'error': 'An error occurred during analysis'}), 500
 
+@app.route('/detect-deepfake/stream', methods=['POST'])
+def detect_deepfake_stream():
+    """Stream per-frame video results as NDJSON (or SSE when requested)"""
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file uploaded'}), 400
+    
+    file = request.files['file']
+    filename = secure_filename(file.filename)
+    if not allowed_video_file(filename):
+        return jsonify({'error': 'File type not supported. Use a video file.'}), 400
+    
+    unique_filename = f"{uuid.uuid4().hex}_{filename}"
+    filepath, is_temporary = save_video_upload(file, unique_filename)
+    
+    max_frames = request.form.get('max_frames', type=int)
+    time_budget = request.form.get('time_budget', type=float)
+    use_sse = request.accept_mimetypes.best == 'text/event-stream'
+    
+    def remove_upload():
+        if is_temporary and os.path.exists(filepath):
+            os.remove(filepath)
+    
+    def generate():
+        started = time.perf_counter()
+        try:
+            for event in deepfake_detector.iter_video(filepath, max_frames, time_budget):
+                if event['type'] == 'result':
+                    event['result']['filename'] = unique_filename
+                    record_detections('video', [event['result']], elapsed_ms(started),
+                                      deepfake_detector.model_version)
+                data = json.dumps(event)
+                yield f"data: {data}\n\n" if use_sse else data + "\n"
+        finally:
+            remove_upload()
+    
+    mimetype = 'text/event-stream' if use_sse else 'application/x-ndjson'
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    # The generator never runs if the client goes away before the first chunk
+    response.call_on_close(remove_upload)
+    return response
+
 @app.route('/batch-analyze', methods=['POST'])
 def batch_analyze():
     """Analyze multiple news articles at once"""
@@ -122,42 +272,104 @@ def batch_analyze():
         if not articles:
             return jsonify({'error': 'No articles provided'}), 400
         
-        results = []
-        for article in articles:
-            if 'text' in article:
-                result = news_analyzer.analyze_text(article['text'])
-                results.append(result)
+        started = time.perf_counter()
+        texts = [article['text'] for article in articles if 'text' in article]
+        results = news_analyzer.analyze_batch(texts)
+        record_detections('text', results, elapsed_ms(started), news_analyzer.model_version)
         
         # Calculate overall statistics
-        total = len(results)
-        fake_count = sum(1 for r in results if r.get('prediction') == 'Fake')
-        real_count = total - fake_count
-        
-        summary = {
-            'total_articles': total,
-            'fake_articles': fake_count,
-            'real_articles': real_count,
-            'fake_percentage': (fake_count / total * 100) if total > 0 else 0,
-            'details': results
-        }
-        
-        return jsonify(summary)
+        return jsonify(summarize_batch(results))
         
     except Exception as e:
         app.logger.error(f"Error in batch_analyze: {str(e)}")
         return jsonify({'error': 'An error occurred during batch analysis'}), 500
 
+@app.route('/jobs/batch-analyze', methods=['POST'])
+def submit_batch_job():
+    """Queue a batch analysis and return a job ID"""
+    articles = (request.json or {}).get('articles', [])
+    texts = [article['text'] for article in articles if 'text' in article]
+    if not texts:
+        return jsonify({'error': 'No articles provided'}), 400
+    
+    try:
+        job_id = job_queue.submit('batch', run_batch_job, texts, request.json.get('method', 'ml'))
+    except QueueFullError:
+        return jsonify({'error': 'Too many pending jobs, try again later'}), 429, {'Retry-After': '30'}
+    
+    return jsonify({'job_id': job_id, 'status_url': url_for('job_status', job_id=job_id)}), 202
+
+@app.route('/jobs/detect-deepfake', methods=['POST'])
+def submit_video_job():
+    """Queue a video deepfake analysis and return a job ID"""
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file uploaded'}), 400
+    
+    file = request.files['file']
+    filename = secure_filename(file.filename)
+    if not allowed_video_file(filename):
+        return jsonify({'error': 'File type not supported. Use a video file.'}), 400
+    
+    unique_filename = f"{uuid.uuid4().hex}_{filename}"
+    filepath, is_temporary = save_video_upload(file, unique_filename)
+    
+    options = {
+        'sample_interval': request.form.get('sample_interval', type=float),
+        'adaptive': request.form.get('adaptive', '').lower() in ('1', 'true', 'yes')
+    }
+    
+    try:
+        job_id = job_queue.submit('video', run_video_job, filepath, options, is_temporary)
+    except QueueFullError:
+        if is_temporary:
+            os.remove(filepath)
+        return jsonify({'error': 'Too many pending jobs, try again later'}), 429, {'Retry-After': '30'}
+    
+    return jsonify({'job_id': job_id, 'status_url': url_for('job_status', job_id=job_id)}), 202
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Job status and progress"""
+    status = job_queue.status(job_id)
+    if status is None:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    return jsonify(status)
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    """Job result once finished"""
+    job = job_queue.result(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    if job['status'] == 'failed':
+        return jsonify({'status': 'failed', 'error': job['error']}), 500
+    if job['status'] != 'done':
+        return jsonify({'status': job['status'], 'progress': job['progress']}), 202
+    return jsonify(job['result'])
+
 @app.route('/api/analyze', methods=['POST'])
 def api_analyze():
     """API endpoint for programmatic access"""
     try:
         data = request.json
+        started = time.perf_counter()
         
         if 'text' in data:
-            result = news_analyzer.analyze_text(data['text'])
+            if isinstance(data['text'], list):
+                # Batch of texts: one vectorized pass
+                result = {'results': news_analyzer.analyze_batch(data['text'])}
+                record_detections('text', result['results'], elapsed_ms(started), news_analyzer.model_version)
+            else:
+                result = news_analyzer.analyze_text(data['text'])
+                record_detections('text', [result], elapsed_ms(started), news_analyzer.model_version)
+        elif 'urls' in data:
+            # Many pages: fetched concurrently, scored in one batch
+            result = {'results': news_analyzer.analyze_urls(data['urls'])}
+            record_detections('url', result['results'], elapsed_ms(started), news_analyzer.model_version)
         elif 'image_url' in data:
             # Download and analyze image
             result = deepfake_detector.detect_from_url(data['image_url'])
+            record_detections('image', [result], elapsed_ms(started), deepfake_detector.model_version)
         else:
             return jsonify({'error': 'Invalid request format'}), 400
         
@@ -166,18 +378,84 @@ def api_analyze():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/cache-stats')
+def cache_stats():
+    """Result cache hit/miss counters"""
+    cache = get_result_cache()
+    if cache is None:
+        return jsonify({'enabled': False})
+    
+    stats = cache.stats()
+    stats['enabled'] = True
+    return jsonify(stats)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Stage and request latency histograms in the Prometheus text format"""
+    gauges = {}
+    cache = get_result_cache()
+    if cache is not None:
+        stats = cache.stats()
+        gauges = {
+            'result_cache_entries': ('Entries in the in-memory result cache.', stats['entries']),
+            'result_cache_memory_bytes': ('Bytes held by the in-memory result cache.', stats['memory_bytes']),
+            'result_cache_hit_rate': ('Result cache hit rate since start.', stats['hit_rate']),
+        }
+    index = news_analyzer.near_duplicates if news_analyzer.loaded else None
+    if index is not None:
+        stats = index.stats()
+        gauges['near_duplicate_documents'] = ('Texts in the near-duplicate index.', stats['documents'])
+        gauges['near_duplicate_hit_rate'] = ('Near-duplicate lookup hit rate since start.', stats['hit_rate'])
+    index = deepfake_detector.media_index if deepfake_detector.loaded else None
+    if index is not None:
+        stats = index.stats()
+        gauges['media_hash_entries'] = ('Images and videos in the perceptual-hash index.', stats['media'])
+        gauges['media_hash_hit_rate'] = ('Perceptual-hash lookup hit rate since start.', stats['hit_rate'])
+    return Response(metrics.render(gauges), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/model-info')
+def model_info():
+    """Training metadata of the news model in use"""
+    return jsonify({
+        'scorer': type(news_analyzer.scorer).__name__ if news_analyzer.scorer else 'rule-based',
+        'metadata': news_analyzer.model_info
+    })
+
+def dashboard_stats(period):
+    """Rolled-up analytics for the dashboard"""
+    if analytics is None:
+        return None
+    stats = analytics.summary(period)
+    
+    by_kind = stats['by_kind']
+    counts = {
+        'text': by_kind.get('text', 0) + by_kind.get('url', 0),
+        'image': by_kind.get('image', 0),
+        'video': by_kind.get('video', 0)
+    }
+    total = sum(counts.values())
+    stats['distribution'] = {kind: round(count / total * 100) if total else 0
+                             for kind, count in counts.items()}
+    
+    # Accuracy comes from the model's own evaluation, not from live traffic
+    info = news_analyzer.model_info if news_analyzer.loaded else None
+    accuracy = (info or {}).get('accuracy')
+    stats['accuracy'] = round(accuracy * 100, 1) if accuracy is not None else None
+    return stats
+
 @app.route('/dashboard')
 def dashboard():
     """Display analytics dashboard"""
-    # This would typically load from a database
-    stats = {
-        'total_checks': 1500,
-        'fake_detected': 320,
-        'accuracy': 94.5,
-        'recent_activity': []
-    }
-    
-    return render_template('dashboard.html', stats=stats)
+    period = request.args.get('period', 'today')
+    return render_template('dashboard.html', stats=dashboard_stats(period), period=period)
+
+@app.route('/api/analytics')
+def analytics_summary():
+    """Dashboard numbers as JSON"""
+    stats = dashboard_stats(request.args.get('period', 'today'))
+    if stats is None:
+        return jsonify({'enabled': False})
+    return jsonify(stats)
 
 @app.route('/results')
 def results_page():
@@ -193,9 +471,17 @@ def about():
 def not_found(error):
     return jsonify({'error': 'Endpoint not found'}), 404
 
+@app.errorhandler(413)
+def too_large(error):
+    return jsonify({'error': f'Request body exceeds {Config.MAX_CONTENT_LENGTH // (1024 * 1024)} MB'}), 413
+
 @app.errorhandler(500)
 def server_error(error):
     return jsonify({'error': 'Internal server error'}), 500
 
+# Optional warm-up at startup: PRELOAD_MODELS=text|media|all
+if Config.PRELOAD_MODELS in ('text', 'media', 'all'):
+    warm_up(Config.PRELOAD_MODELS)
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,103 @@
+"""
+Deepfake backend benchmark: accuracy parity and latency against Keras
+Every available backend scores the same fixed crop set. Parity is the
+largest score difference from Keras and the share of crops that get the
+same verdict at DEEPFAKE_THRESHOLD; the run fails if agreement drops
+below --min-agreement. Latency is measured per batch for batch sizes 1
+and DEEPFAKE_BATCH_SIZE.
+Run from the repository root (without a crop directory a seeded random
+crop set is used, which is only meaningful for latency):
+    python benchmarks/bench_deepfake_backends.py [path/to/face/crops]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from utils.inference_backends import BACKENDS
+from training.export_deepfake_model import load_crops, IMG_SIZE
+
+REPEATS = 10
+
+
+def synthetic_crops(count=256):
+    rng = np.random.default_rng(0)
+    return rng.random((count,) + IMG_SIZE[::-1] + (3,), dtype=np.float32)
+
+
+def load_backends():
+    backends = []
+    for name, (backend_class, path) in BACKENDS.items():
+        path = path()
+        if not os.path.exists(path):
+            print(f"{name}: {path} not found, skipped")
+            continue
+        try:
+            backends.append(backend_class(path))
+        except Exception as e:
+            print(f"{name}: could not load ({e}), skipped")
+    return backends
+
+
+def score_all(backend, crops, batch_size):
+    return np.concatenate([backend.predict(crops[start:start + batch_size])[:, 0]
+                           for start in range(0, len(crops), batch_size)])
+
+
+def latency(backend, crops, batch_size):
+    """Median seconds per batch"""
+    batch = crops[:batch_size]
+    backend.predict(batch)  # warm-up
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        backend.predict(batch)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('crops', nargs='?', help='directory of face crop images')
+    parser.add_argument('--min-agreement', type=float, default=0.99)
+    args = parser.parse_args()
+
+    crops = load_crops(args.crops) if args.crops else synthetic_crops()
+    if len(crops) == 0:
+        sys.exit('No crops found.')
+    batch_size = min(max(1, Config.DEEPFAKE_BATCH_SIZE), len(crops))
+
+    backends = load_backends()
+    if not backends or backends[0].name != 'keras':
+        sys.exit('The Keras model is needed as the reference.')
+
+    reference = score_all(backends[0], crops, batch_size)
+    print(f"{len(crops)} crops, batch size {batch_size}")
+    print(f"{'backend':<8} {'size KB':>8} {'max diff':>9} {'agree':>7} "
+          f"{'1-crop ms':>10} {'batch ms':>9} {'crops/s':>8}")
+
+    failed = False
+    for backend in backends:
+        scores = score_all(backend, crops, batch_size)
+        max_diff = float(np.abs(scores - reference).max())
+        agreement = float(np.mean((scores > Config.DEEPFAKE_THRESHOLD)
+                                  == (reference > Config.DEEPFAKE_THRESHOLD)))
+        single = latency(backend, crops, 1)
+        batched = latency(backend, crops, batch_size)
+        print(f"{backend.name:<8} {os.path.getsize(backend.path) / 1024:>8.0f} {max_diff:>9.2e} "
+              f"{agreement:>7.1%} {single * 1000:>10.2f} {batched * 1000:>9.2f} "
+              f"{batch_size / batched:>8.0f}")
+        failed |= agreement < args.min_agreement
+
+    if failed:
+        sys.exit(f'Verdict agreement below {args.min_agreement:.0%}')
+
+
+if __name__ == '__main__':
+    main()
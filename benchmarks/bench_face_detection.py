@@ -0,0 +1,99 @@
+"""
+Face detection benchmark: speed and recall against the original Haar path
+The reference is the previous behaviour (full-resolution Haar cascade,
+scaleFactor=1.1); each candidate's recall is the share of reference faces
+it finds with IoU >= 0.5.
+Run from the repository root with a fixed directory of test images:
+    python benchmarks/bench_face_detection.py path/to/images
+"""
+
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from utils.face_detection import HaarFaceDetector, DnnFaceDetector
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def load_images(directory):
+    images = []
+    for name in sorted(os.listdir(directory)):
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            img = cv2.imread(os.path.join(directory, name), cv2.IMREAD_COLOR)
+            if img is not None:
+                images.append(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+    return images
+
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union else 0.0
+
+
+def recall(reference, found):
+    total = sum(len(boxes) for boxes in reference)
+    if total == 0:
+        return float('nan')
+    matched = 0
+    for ref_boxes, found_boxes in zip(reference, found):
+        for ref in ref_boxes:
+            if any(iou(ref, box) >= 0.5 for box in found_boxes):
+                matched += 1
+    return matched / total
+
+
+def run(detector, images):
+    start = time.perf_counter()
+    found = [detector.detect(img) for img in images]
+    elapsed = time.perf_counter() - start
+    return found, elapsed
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    images = load_images(sys.argv[1])
+    if not images:
+        print('No images found.')
+        sys.exit(1)
+    print(f"{len(images)} images, mean size {np.mean([img.shape[1] for img in images]):.0f}x"
+          f"{np.mean([img.shape[0] for img in images]):.0f}")
+
+    candidates = [
+        ('haar full-res (reference)', HaarFaceDetector(max_dimension=0)),
+        ('haar 1280', HaarFaceDetector(max_dimension=1280)),
+        ('haar 960', HaarFaceDetector(max_dimension=960)),
+        ('haar 640', HaarFaceDetector(max_dimension=640)),
+    ]
+    if os.path.exists(Config.FACE_DNN_PROTOTXT) and os.path.exists(Config.FACE_DNN_WEIGHTS):
+        candidates.append(('dnn res10', DnnFaceDetector()))
+    else:
+        print('DNN model files not found; skipping the DNN backend.')
+
+    reference = None
+    print(f"{'detector':<26} {'images/s':>9} {'faces/s':>9} {'faces':>6} {'recall':>7}")
+    for name, detector in candidates:
+        found, elapsed = run(detector, images)
+        if reference is None:
+            reference = found
+        faces = sum(len(boxes) for boxes in found)
+        print(f"{name:<26} {len(images) / elapsed:>9.1f} {faces / elapsed:>9.1f} "
+              f"{faces:>6} {recall(reference, found):>7.2f}")
+
+
+if __name__ == '__main__':
+    main()
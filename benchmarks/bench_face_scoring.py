@@ -0,0 +1,78 @@
+"""
+Heuristic face scoring benchmark: per-face loop vs HeuristicFaceScorer
+The reference is the previous per-face code (cvtColor + Canny + np.std on
+each crop). Scores must agree to within 1e-9.
+Run from the repository root:
+    python benchmarks/bench_face_scoring.py
+"""
+
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.face_scoring import HeuristicFaceScorer
+
+FACE_COUNTS = (1, 10, 100)
+REPEATS = 20
+
+
+def reference_score(face_img):
+    gray = cv2.cvtColor(face_img, cv2.COLOR_RGB2GRAY)
+    edges = cv2.Canny(gray, 100, 200)
+    edge_density = np.sum(edges) / (face_img.shape[0] * face_img.shape[1])
+    color_std = np.std(face_img, axis=(0, 1))
+    return min(edge_density * 10 + np.mean(color_std) / 10, 1.0)
+
+
+def make_image(rng, height=1080, width=1920):
+    """Smooth noise with some sharp blocks so Canny finds edges"""
+    img = cv2.GaussianBlur(rng.integers(0, 256, (height, width, 3), dtype=np.uint8), (9, 9), 0)
+    for _ in range(200):
+        x, y = rng.integers(0, width - 40), rng.integers(0, height - 40)
+        img[y:y+30, x:x+30] = rng.integers(0, 256, 3)
+    return img
+
+
+def make_boxes(rng, count, height, width):
+    sizes = rng.integers(40, 240, count)
+    xs = rng.integers(0, width - sizes)
+    ys = rng.integers(0, height - sizes)
+    return np.column_stack([xs, ys, sizes, sizes])
+
+
+def timed(func):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        result = func()
+    return result, (time.perf_counter() - start) / REPEATS
+
+
+def main():
+    rng = np.random.default_rng(0)
+    img = make_image(rng)
+    scorer = HeuristicFaceScorer()
+
+    print(f"{'faces':>6} {'per-face ms':>12} {'boxes ms':>9} {'crops ms':>9} {'speedup':>8} {'max diff':>9}")
+    for count in FACE_COUNTS:
+        boxes = make_boxes(rng, count, *img.shape[:2])
+        crops = [img[y:y+h, x:x+w] for (x, y, w, h) in boxes]
+
+        reference, reference_time = timed(lambda: [reference_score(crop) for crop in crops])
+        by_boxes, boxes_time = timed(lambda: scorer.score_boxes(img, boxes))
+        by_crops, crops_time = timed(lambda: scorer.score_crops(crops))
+
+        diff = max(np.abs(np.asarray(reference) - by_boxes).max(),
+                   np.abs(np.asarray(reference) - by_crops).max())
+        print(f"{count:>6} {reference_time * 1000:>12.2f} {boxes_time * 1000:>9.2f} "
+              f"{crops_time * 1000:>9.2f} {reference_time / min(boxes_time, crops_time):>7.1f}x "
+              f"{diff:>9.1e}")
+        assert diff < 1e-9, 'scores differ from the per-face reference'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Near-duplicate index benchmark: lookup latency with 1M indexed documents
+The index is filled with random signatures (as if 1M distinct articles had
+been analyzed) plus a set of real synthetic articles. Lookups are timed for
+lightly edited copies of those articles (should hit) and for unrelated
+articles (should miss), split into signature and query time.
+Run from the repository root:
+    python benchmarks/bench_near_duplicates.py [--docs 1000000]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from utils.near_duplicates import NearDuplicateIndex
+
+ARTICLES = 2000
+ARTICLE_WORDS = 400
+EDITS = 3  # words replaced in each near-duplicate copy
+RESULT = {'prediction': 'Fake', 'real_probability': 0.1, 'fake_probability': 0.9}
+
+
+def make_articles(rng, vocabulary, count):
+    return [rng.choice(vocabulary, ARTICLE_WORDS).tolist() for _ in range(count)]
+
+
+def edit(rng, vocabulary, words):
+    words = list(words)
+    for position in rng.integers(0, len(words), EDITS):
+        words[position] = rng.choice(vocabulary)
+    return ' '.join(words)
+
+
+def percentiles(timings):
+    p50, p99 = np.percentile(np.asarray(timings) * 1e6, [50, 99])
+    return f'p50 {p50:7.1f} us   p99 {p99:7.1f} us'
+
+
+def timed_lookups(index, texts):
+    signature_times, query_times, hits = [], [], 0
+    for text in texts:
+        start = time.perf_counter()
+        signature = index.signature(text)
+        middle = time.perf_counter()
+        match = index.query(signature)
+        signature_times.append(middle - start)
+        query_times.append(time.perf_counter() - middle)
+        hits += match is not None
+    return signature_times, query_times, hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Near-duplicate index lookup benchmark')
+    parser.add_argument('--docs', type=int, default=1000000, help='indexed documents')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vocabulary = np.array([f'word{i}' for i in range(20000)])
+    index = NearDuplicateIndex(
+        max_docs=args.docs, threshold=Config.NEAR_DUP_THRESHOLD, num_perm=Config.NEAR_DUP_NUM_PERM,
+        bands=Config.NEAR_DUP_BANDS, shingle_size=Config.NEAR_DUP_SHINGLE_SIZE
+    )
+    print(f"Index for {args.docs} documents: {index.stats()['memory_bytes'] / 2**20:.0f} MiB")
+
+    start = time.perf_counter()
+    filler = args.docs - ARTICLES
+    table_size = index.buckets.shape[1]
+    for i in range(0, filler, 100000):
+        n = min(100000, filler - i)
+        values = rng.integers(0, 2**16, (n, index.num_perm), dtype=np.uint16)
+        buckets = rng.integers(0, table_size, (n, index.bands))
+        for row in range(n):
+            index.add((values[row], buckets[row]), str(i + row), RESULT)
+
+    articles = make_articles(rng, vocabulary, ARTICLES)
+    for words in articles:
+        text = ' '.join(words)
+        index.add(index.signature(text), text, RESULT)
+    print(f"Filled {len(index)} documents in {time.perf_counter() - start:.1f}s")
+
+    copies = [edit(rng, vocabulary, words) for words in articles]
+    unrelated = [' '.join(words) for words in make_articles(rng, vocabulary, ARTICLES)]
+    for label, texts in (('near-duplicates', copies), ('unrelated', unrelated)):
+        signature_times, query_times, hits = timed_lookups(index, texts)
+        print(f"{label:>16}: {hits}/{len(texts)} hits")
+        print(f"{'signature':>16}: {percentiles(signature_times)}")
+        print(f"{'query':>16}: {percentiles(query_times)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Perceptual-hash index benchmark: lookup cost against index size
+Fills a MediaHashIndex with random image hashes and times lookups of
+hashes a few bits away from an indexed one (hits) and of fresh random
+hashes (misses). Also times hashing a 1080p frame, which every image and
+video keyframe pays before the lookup.
+Run from the repository root:
+    python benchmarks/bench_perceptual_hash.py [--sizes 1000 10000 100000]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from utils.perceptual_hash import MediaHashIndex, image_hash
+
+QUERIES = 500
+FLIPPED_BITS = 3  # per 64-bit half, within the default distance
+RESULT = {'prediction': 'Real', 'faces_detected': 1}
+
+
+def random_hashes(rng, count):
+    return [int.from_bytes(rng.bytes(16), 'big') for _ in range(count)]
+
+
+def perturb(rng, key):
+    for half in (0, 64):
+        for bit in rng.choice(64, FLIPPED_BITS, replace=False):
+            key ^= 1 << (half + int(bit))
+    return key
+
+
+def timed(func, keys):
+    timings = []
+    found = 0
+    for key in keys:
+        start = time.perf_counter()
+        found += func(key) is not None
+        timings.append(time.perf_counter() - start)
+    p50, p99 = np.percentile(np.asarray(timings) * 1e6, [50, 99])
+    return found, p50, p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Perceptual-hash index lookup benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    frame = rng.integers(0, 256, (1080, 1920, 3), dtype=np.uint8)
+    start = time.perf_counter()
+    for _ in range(50):
+        image_hash(frame)
+    print(f"Hashing a 1080p frame: {(time.perf_counter() - start) / 50 * 1000:.2f} ms\n")
+
+    print(f"{'indexed':>8} {'build s':>8} {'hits':>9} {'hit p50 us':>11} {'hit p99 us':>11} "
+          f"{'misses':>9} {'miss p50 us':>12} {'miss p99 us':>12}")
+    for size in args.sizes:
+        index = MediaHashIndex(max_distance=Config.MEDIA_HASH_MAX_DISTANCE, max_items=size)
+        keys = random_hashes(rng, size)
+        start = time.perf_counter()
+        for key in keys:
+            index.add_image(key, RESULT)
+        build = time.perf_counter() - start
+
+        near = [perturb(rng, keys[i]) for i in rng.integers(0, size, QUERIES)]
+        hits, hit_p50, hit_p99 = timed(index.lookup_image, near)
+        found, miss_p50, miss_p99 = timed(index.lookup_image, random_hashes(rng, QUERIES))
+        print(f"{size:>8} {build:>8.1f} {hits:>4}/{QUERIES:<4} {hit_p50:>11.1f} {hit_p99:>11.1f} "
+              f"{QUERIES - found:>4}/{QUERIES:<4} {miss_p50:>12.1f} {miss_p99:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
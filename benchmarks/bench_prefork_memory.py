@@ -0,0 +1,107 @@
+"""
+Per-worker memory with and without pre-fork model sharing (Linux only)
+  baseline: every forked worker loads its own copy of the news models
+  prefork:  the parent loads memory-mapped models once, freezes the GC
+            and forks; workers only touch shared pages
+Each worker analyzes a few texts and reports its unique (private) and
+proportional set size from /proc/self/smaps_rollup.
+The scikit-learn pickles are always used (NEWS_SCORER=sklearn): they are
+what joblib memory-maps, while the exported linear model is a small .npz
+(and a vocabulary dict) that np.load never maps, so MODEL_MMAP would
+change nothing for it.
+Run from the repository root after training the models:
+    python benchmarks/bench_prefork_memory.py [workers]
+"""
+
+import gc
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+
+# Measure the memory-mapped joblib models, not the exported linear scorer
+Config.NEWS_SCORER = 'sklearn'
+
+SAMPLE_TEXTS = [
+    'Scientists confirm new breakthrough in renewable energy.',
+    'BREAKING: shocking truth the government does not want you to know!!!',
+    'The stock market showed steady growth today.',
+] * 20
+
+
+def memory_kb():
+    """Unique (private) and proportional set size of this process in kB"""
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].rstrip(':') in ('Pss', 'Private_Clean', 'Private_Dirty'):
+                values[parts[0].rstrip(':')] = int(parts[1])
+    return values['Private_Clean'] + values['Private_Dirty'], values['Pss']
+
+
+def worker(analyzer, write_fd):
+    from utils.news_detector import NewsAnalyzer
+
+    if analyzer is None:
+        analyzer = NewsAnalyzer()
+    analyzer.cache = None  # measure the models, not cached results
+    for text in SAMPLE_TEXTS:
+        analyzer.analyze_text(text)
+    gc.collect()
+
+    uss, pss = memory_kb()
+    os.write(write_fd, (json.dumps({'uss_kb': uss, 'pss_kb': pss}) + '\n').encode())
+    os._exit(0)
+
+
+def run(mode, workers):
+    from utils.news_detector import NewsAnalyzer
+
+    Config.MODEL_MMAP = mode == 'prefork'
+    analyzer = None
+    if mode == 'prefork':
+        analyzer = NewsAnalyzer()
+        if analyzer.model is None:
+            print('Warning: no trained scikit-learn news model found, nothing to share.')
+        gc.freeze()
+
+    read_fd, write_fd = os.pipe()
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            worker(analyzer, write_fd)
+        pids.append(pid)
+    os.close(write_fd)
+
+    for pid in pids:
+        os.waitpid(pid, 0)
+    with os.fdopen(read_fd) as f:
+        reports = [json.loads(line) for line in f]
+    gc.unfreeze()
+    return reports
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    print(f"{'mode':<10} {'workers':>7} {'avg USS (MB)':>13} {'avg PSS (MB)':>13} {'total USS (MB)':>15}")
+    for mode in ('baseline', 'prefork'):
+        # Separate process per mode so models loaded by one never leak into the other
+        pid = os.fork()
+        if pid == 0:
+            reports = run(mode, workers)
+            uss = [r['uss_kb'] / 1024 for r in reports]
+            pss = [r['pss_kb'] / 1024 for r in reports]
+            print(f"{mode:<10} {len(reports):>7} {sum(uss) / len(uss):>13.1f} "
+                  f"{sum(pss) / len(pss):>13.1f} {sum(uss):>15.1f}", flush=True)
+            os._exit(0)
+        os.waitpid(pid, 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Micro-benchmark: per-rule re.search loop vs the single-pass RuleMatcher
+Run from the repository root: python benchmarks/bench_rule_matcher.py
+"""
+
+import os
+import re
+import sys
+import random
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.rule_matcher import RuleMatcher, load_rules
+
+VOCABULARY = [
+    'breaking', 'exclusive', 'shocking', 'truth', 'government', 'secret',
+    'report', 'officials', 'market', 'share', 'video', 'viral', 'doctors',
+    'study', 'people', 'warning', 'health', 'election', 'claims', 'news'
+]
+
+
+def make_rules(count, seed=0):
+    """Start from the shipped rules and pad with synthetic 'a.*b' rules"""
+    rules = load_rules('data/fake_indicators.txt')[:count]
+    rng = random.Random(seed)
+    while len(rules) < count:
+        first, second = rng.sample(VOCABULARY, 2)
+        rules.append(f'{first}{rng.randint(0, 999)}.*{second}')
+    return rules
+
+
+def make_text(size, seed=1):
+    """Long single-paragraph page, the worst case for '.*' backtracking"""
+    rng = random.Random(seed)
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(VOCABULARY)
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words)
+
+
+def regex_loop(rules, text):
+    """The previous implementation: one re.search per rule"""
+    score = 0
+    for indicator in rules:
+        if re.search(indicator, text):
+            score += 1
+    return score
+
+
+def main():
+    text = make_text(50 * 1024)
+    print(f"Text size: {len(text)} chars")
+    print(f"{'rules':>6} {'regex loop (ms)':>16} {'matcher (ms)':>14} {'speedup':>8}")
+
+    for count in (8, 100, 1000):
+        rules = make_rules(count)
+        matcher = RuleMatcher(rules)
+        assert regex_loop(rules, text) == len(matcher.match(text))
+
+        repeat = 5
+        loop_time = min(timeit.repeat(lambda: regex_loop(rules, text), number=1, repeat=repeat))
+        matcher_time = min(timeit.repeat(lambda: matcher.match(text), number=1, repeat=repeat))
+
+        print(f"{count:>6} {loop_time * 1000:>16.2f} {matcher_time * 1000:>14.2f} "
+              f"{loop_time / matcher_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
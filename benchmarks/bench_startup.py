@@ -0,0 +1,57 @@
+"""
+Startup benchmark: import time and peak RSS of the Flask app
+Each configuration runs in a fresh interpreter so nothing is shared.
+Run from the repository root: python benchmarks/bench_startup.py
+"""
+
+import os
+import sys
+import json
+import subprocess
+
+CONFIGURATIONS = {
+    # Import only; detectors stay unloaded
+    'lazy': 'none',
+    # Text worker: news analyzer loaded, no OpenCV/TensorFlow
+    'text-only': 'text',
+    # Everything loaded up front
+    'full': 'all',
+}
+
+PROBE = '''
+import json, resource, sys, time
+start = time.perf_counter()
+import app
+import_seconds = time.perf_counter() - start
+usage = resource.getrusage(resource.RUSAGE_SELF)
+print(json.dumps({
+    'import_seconds': import_seconds,
+    'max_rss_mb': usage.ru_maxrss / 1024,
+    'tensorflow_loaded': 'tensorflow' in sys.modules,
+    'sklearn_loaded': 'sklearn' in sys.modules,
+    'pandas_loaded': 'pandas' in sys.modules,
+}))
+'''
+
+
+def run(preload):
+    env = dict(os.environ, PRELOAD_MODELS=preload)
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE], env=env, check=True,
+        capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    print(f"{'configuration':<14} {'import (s)':>10} {'max RSS (MB)':>13}  loaded")
+    for name, preload in CONFIGURATIONS.items():
+        result = run(preload)
+        loaded = [module for module in ('tensorflow', 'sklearn', 'pandas')
+                  if result[f'{module}_loaded']]
+        print(f"{name:<14} {result['import_seconds']:>10.2f} {result['max_rss_mb']:>13.1f}  "
+              f"{', '.join(loaded) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+"""
+Deterministic synthetic fixtures for the benchmark suite
+Every generator takes a seed, so two runs (or two machines) benchmark
+exactly the same inputs: text corpora, images with cartoon faces the
+face detector finds, short encoded videos and a local HTTP server that
+serves generated article pages.
+"""
+
+import time
+import zlib
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+WORDS = (
+    'the government official said report city market economy growth people year today new study '
+    'research science health school council budget policy election vote court police weather team '
+    'season company share price energy climate water local national world week month according '
+    'secret shocking truth exposed miracle conspiracy viral breaking hidden banned cure they hoax'
+).split()
+
+
+def make_texts(count, words, seed=0):
+    """`count` pseudo-articles of `words` words each, with sentence punctuation"""
+    rng = np.random.default_rng(seed)
+    texts = []
+    for _ in range(count):
+        tokens = rng.choice(WORDS, words).tolist()
+        for i in range(0, words, 12):
+            tokens[i] = tokens[i].capitalize()
+        texts.append(' '.join(tokens).replace(' The ', '. The ') + '.')
+    return texts
+
+
+def _draw_face(img, cx, cy, size):
+    """Cartoon face (skin oval, eyes, brows, nose, mouth) that Haar cascades detect"""
+    cv2.ellipse(img, (cx, cy), (int(size * 0.8), size), 0, 0, 360, (200, 170, 150), -1)
+    for side in (-0.35, 0.35):
+        ex, ey = int(cx + side * size), int(cy - 0.25 * size)
+        cv2.ellipse(img, (ex, ey), (int(0.18 * size), int(0.09 * size)), 0, 0, 360, (40, 30, 30), -1)
+        cv2.line(img, (ex - int(0.2 * size), ey - int(0.2 * size)), (ex + int(0.2 * size), ey - int(0.2 * size)),
+                 (60, 40, 30), max(1, size // 15))
+    cv2.ellipse(img, (cx, cy + int(0.1 * size)), (int(0.08 * size), int(0.2 * size)), 0, 0, 360, (170, 140, 120), -1)
+    cv2.ellipse(img, (cx, cy + int(0.5 * size)), (int(0.3 * size), int(0.08 * size)), 0, 0, 360, (120, 60, 60), -1)
+
+
+def make_image(faces, width=640, height=480, seed=0):
+    """RGB image with `faces` non-overlapping cartoon faces on a noisy background"""
+    rng = np.random.default_rng(seed)
+    img = cv2.GaussianBlur(rng.integers(60, 120, (height, width, 3), dtype=np.uint8), (7, 7), 0)
+    columns = max(1, int(np.ceil(np.sqrt(faces * width / height))))
+    rows = max(1, int(np.ceil(faces / columns)))
+    cell_w, cell_h = width // columns, height // rows
+    size = int(min(cell_w / 1.8, cell_h / 2.2))
+    for i in range(faces):
+        row, column = divmod(i, columns)
+        _draw_face(img, column * cell_w + cell_w // 2, row * cell_h + cell_h // 2, size)
+    return cv2.GaussianBlur(img, (3, 3), 0)
+
+
+def encode_image(img, ext='.png'):
+    ok, buffer = cv2.imencode(ext, cv2.cvtColor(img, cv2.COLOR_RGB2BGR))
+    if not ok:
+        raise RuntimeError(f'Could not encode {ext}')
+    return buffer.tobytes()
+
+
+def make_video(path, seconds=3, fps=25, faces=1, width=320, height=240, seed=0):
+    """MPEG-4 video of a slowly panning scene with faces; returns the path"""
+    base = make_image(faces, width + seconds * fps, height, seed)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError('No MPEG-4 encoder available in this OpenCV build')
+    try:
+        for i in range(seconds * fps):
+            writer.write(cv2.cvtColor(np.ascontiguousarray(base[:, i:i + width]), cv2.COLOR_RGB2BGR))
+    finally:
+        writer.release()
+    return path
+
+
+def article_page(title, text):
+    paragraphs = ''.join(f'<p>{text[i:i + 400]}</p>' for i in range(0, len(text), 400))
+    return (f'<html><head><title>{title}</title><script>var tracking = 1;</script></head>'
+            f'<body><nav>Home | News</nav><article><h1>{title}</h1>{paragraphs}</article>'
+            f'<footer>Copyright</footer></body></html>').encode('utf-8')
+
+
+class ArticleServer:
+    """
+    Local HTTP/1.1 server for analyze_url benchmarks and fetcher tests
+    /article/<n> serves a generated page for the n-th text (n wraps around)
+    with an ETag, answering If-None-Match with 304. /large/<bytes> streams
+    a page of that size without Content-Length, then closes the connection.
+    `delay` holds every response back that many seconds; the server counts
+    requests, 304s, connections and the most requests in flight at once.
+    """
+
+    def __init__(self, texts, delay=0.0):
+        pages = [article_page(f'Article {i}', text) for i, text in enumerate(texts)]
+        etags = [f'"{zlib.crc32(page):08x}"' for page in pages]
+        stats = self
+        self.requests = 0
+        self.not_modified = 0
+        self.connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.large_bytes_sent = 0
+        self._lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                # Headers and body are separate writes; don't let Nagle hold the body back
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                with stats._lock:
+                    stats.connections += 1
+
+            def do_GET(self):
+                with stats._lock:
+                    stats.requests += 1
+                    stats.in_flight += 1
+                    stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+                try:
+                    if delay:
+                        time.sleep(delay)
+                    self._respond()
+                finally:
+                    with stats._lock:
+                        stats.in_flight -= 1
+
+            def _respond(self):
+                kind, _, number = self.path.strip('/').partition('/')
+                if not number.isdigit() or kind not in ('article', 'large'):
+                    self.send_error(404)
+                    return
+                if kind == 'large':
+                    self._send_large(int(number))
+                    return
+
+                index = int(number) % len(pages)
+                if self.headers.get('If-None-Match') == etags[index]:
+                    with stats._lock:
+                        stats.not_modified += 1
+                    self.send_response(304)
+                    self.send_header('ETag', etags[index])
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(pages[index])))
+                self.send_header('ETag', etags[index])
+                self.end_headers()
+                self.wfile.write(pages[index])
+
+            def _send_large(self, size):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                self.close_connection = True
+                chunk = b'<p>' + b'filler text ' * 5000 + b'</p>'
+                sent = 0
+                try:
+                    while sent < size:
+                        self.wfile.write(chunk[:size - sent])
+                        sent += min(len(chunk), size - sent)
+                except OSError:
+                    pass  # client gave up
+                finally:
+                    with stats._lock:
+                        stats.large_bytes_sent += sent
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def article_url(self, n):
+        return f'{self.url}/article/{n}'
+
+    def large_url(self, size):
+        return f'{self.url}/large/{size}'
@@ -0,0 +1,350 @@
+"""
+End-to-end performance benchmark suite
+Covers the detector entry points (analyze_text, analyze_batch, analyze_url,
+detect_image, detect_video) and the Flask routes, the latter under
+concurrent load through the Flask test client (one client per thread).
+Fixtures are generated deterministically (benchmarks/fixtures.py);
+analyze_url fetches pages from a local HTTP server.
+Each scenario runs in a fresh interpreter so its peak RSS is its own,
+with the result cache, near-duplicate and perceptual-hash indexes and
+analytics switched off: every operation does the full work. Results
+hold latency percentiles, throughput and peak RSS per scenario. With
+--compare, scenarios slower (p50/p99), less throughput or more memory
+than the baseline by more than --tolerance are flagged.
+Run from the repository root:
+    python benchmarks/run_suite.py                          # all scenarios -> bench_results.json
+    python benchmarks/run_suite.py --only 'route.*' --concurrency 16
+    python benchmarks/run_suite.py --compare baseline.json  # exit 1 on regressions
+"""
+
+import os
+import sys
+import json
+import time
+import fnmatch
+import argparse
+import platform
+import tempfile
+import resource
+import subprocess
+import threading
+from contextlib import ExitStack
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+# Full work on every call, nothing written outside the scratch directory
+BENCH_ENV = {
+    'RESULT_CACHE_ENABLED': '0',
+    'NEAR_DUP_ENABLED': '0',
+    'MEDIA_HASH_ENABLED': '0',
+    'ANALYTICS_ENABLED': '0',
+    'PRELOAD_MODELS': 'none',
+}
+
+# name -> (setup(stack, concurrency), operations, default concurrency, is_route)
+SCENARIOS = {}
+
+
+def scenario(name, operations, concurrency=1, route=False):
+    def register(setup):
+        SCENARIOS[name] = (setup, operations, concurrency, route)
+        return setup
+    return register
+
+
+# ---- Entry points ----
+
+def _analyzer():
+    from utils.news_detector import NewsAnalyzer
+    return NewsAnalyzer()
+
+
+def _detector():
+    from utils.deepfake_detector import DeepfakeDetector
+    return DeepfakeDetector()
+
+
+for _label, _words in (('short', 30), ('medium', 300), ('long', 3000)):
+    def _setup_text(stack, concurrency, words=_words):
+        from fixtures import make_texts
+        analyzer = _analyzer()
+        texts = make_texts(200, words, seed=words)
+        return lambda i: analyzer.analyze_text(texts[i % len(texts)])
+    scenario(f'analyze_text.{_label}', operations=500 if _words < 3000 else 100)(_setup_text)
+
+for _size in (100, 1000):
+    def _setup_batch(stack, concurrency, size=_size):
+        from fixtures import make_texts
+        analyzer = _analyzer()
+        corpora = [make_texts(size, 300, seed=seed) for seed in range(3)]
+        return lambda i: analyzer.analyze_batch(corpora[i % len(corpora)])
+    scenario(f'analyze_batch.{_size}', operations=20 if _size < 1000 else 5)(_setup_batch)
+
+
+@scenario('analyze_url', operations=200)
+def _setup_url(stack, concurrency):
+    from fixtures import make_texts, ArticleServer
+    server = stack.enter_context(ArticleServer(make_texts(200, 600, seed=7)))
+    analyzer = _analyzer()
+    return lambda i: analyzer.analyze_url(server.article_url(i))
+
+
+for _faces in (0, 1, 5):
+    def _setup_image(stack, concurrency, faces=_faces):
+        from fixtures import make_image, encode_image
+        detector = _detector()
+        data = encode_image(make_image(faces, seed=faces), '.jpg')
+        return lambda i: detector.detect_image(data)
+    scenario(f'detect_image.faces{_faces}', operations=50)(_setup_image)
+
+
+@scenario('detect_video', operations=10)
+def _setup_video(stack, concurrency):
+    from fixtures import make_video
+    path = make_video(os.path.join(stack.enter_context(tempfile.TemporaryDirectory()), 'clip.mp4'))
+    detector = _detector()
+    return lambda i: detector.detect_video(path)
+
+
+# ---- Flask routes (concurrent) ----
+
+def _client_per_thread():
+    import app
+    local = threading.local()
+
+    def client():
+        if not hasattr(local, 'client'):
+            local.client = app.app.test_client()
+        return local.client
+    return client
+
+
+def _check(response):
+    if response.status_code >= 400:
+        raise RuntimeError(f'HTTP {response.status_code}: {response.get_data(as_text=True)[:200]}')
+    return response
+
+
+@scenario('route.detect_news', operations=400, concurrency=8, route=True)
+def _setup_route_news(stack, concurrency):
+    from fixtures import make_texts
+    client = _client_per_thread()
+    texts = make_texts(200, 300, seed=11)
+    return lambda i: _check(client().post('/detect-news', data={'text': texts[i % len(texts)]}))
+
+
+@scenario('route.batch_analyze', operations=40, concurrency=8, route=True)
+def _setup_route_batch(stack, concurrency):
+    from fixtures import make_texts
+    client = _client_per_thread()
+    articles = [{'text': text} for text in make_texts(100, 300, seed=12)]
+    return lambda i: _check(client().post('/batch-analyze', json={'articles': articles}))
+
+
+@scenario('route.api_analyze_urls', operations=40, concurrency=8, route=True)
+def _setup_route_urls(stack, concurrency):
+    from fixtures import make_texts, ArticleServer
+    server = stack.enter_context(ArticleServer(make_texts(200, 600, seed=13)))
+    client = _client_per_thread()
+    return lambda i: _check(client().post(
+        '/api/analyze', json={'urls': [server.article_url(i * 10 + n) for n in range(10)]}
+    ))
+
+
+@scenario('route.detect_deepfake_image', operations=100, concurrency=8, route=True)
+def _setup_route_image(stack, concurrency):
+    import io
+    from fixtures import make_image, encode_image
+    client = _client_per_thread()
+    data = encode_image(make_image(1, seed=1), '.jpg')
+    return lambda i: _check(client().post(
+        '/detect-deepfake', data={'file': (io.BytesIO(data), 'face.jpg')},
+        content_type='multipart/form-data'
+    ))
+
+
+# ---- Running one scenario (child process) ----
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def _peak_rss_mb():
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024  # bytes on macOS, kB elsewhere
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def run_scenario(name, operations, concurrency):
+    setup, default_operations, default_concurrency, _ = SCENARIOS[name]
+    operations = operations or default_operations
+    concurrency = concurrency or default_concurrency
+
+    with ExitStack() as stack:
+        started = time.perf_counter()
+        op = setup(stack, concurrency)
+        for i in range(min(3, operations)):  # warm-up: lazy loads, first-call allocations
+            op(i)
+        setup_seconds = time.perf_counter() - started
+
+        latencies = []
+        lock = threading.Lock()
+        counter = iter(range(operations))
+
+        def worker():
+            while True:
+                with lock:
+                    i = next(counter, None)
+                if i is None:
+                    return
+                start = time.perf_counter()
+                op(i)
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+
+    latencies.sort()
+    ms = [latency * 1000 for latency in latencies]
+    return {
+        'operations': len(latencies),
+        'concurrency': concurrency,
+        'setup_seconds': round(setup_seconds, 3),
+        'wall_seconds': round(wall, 3),
+        'throughput_per_sec': round(len(latencies) / wall, 3) if wall else None,
+        'latency_ms': {
+            'mean': round(sum(ms) / len(ms), 3),
+            'p50': round(_percentile(ms, 50), 3),
+            'p90': round(_percentile(ms, 90), 3),
+            'p99': round(_percentile(ms, 99), 3),
+            'max': round(ms[-1], 3),
+        },
+        'peak_rss_mb': round(_peak_rss_mb(), 1),
+    }
+
+
+# ---- Driver ----
+
+def _environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def run_child(name, operations, concurrency):
+    """Run one scenario in a fresh interpreter; returns its result or an error"""
+    command = [sys.executable, os.path.abspath(__file__), '--child', name]
+    if operations:
+        command += ['--operations', str(operations)]
+    if concurrency:
+        command += ['--concurrency', str(concurrency)]
+    process = subprocess.run(command, env=dict(os.environ, **BENCH_ENV),
+                             capture_output=True, text=True)
+    lines = process.stdout.strip().splitlines()
+    if process.returncode != 0 or not lines:
+        return {'error': (process.stderr.strip().splitlines() or ['failed'])[-1]}
+    return json.loads(lines[-1])
+
+
+def compare(results, baseline, tolerance):
+    """Regression messages for every scenario present in both runs"""
+    regressions = []
+    for name, current in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous or 'error' in previous or 'error' in current:
+            continue
+        checks = [
+            ('p50 latency', current['latency_ms']['p50'], previous['latency_ms']['p50'], True),
+            ('p99 latency', current['latency_ms']['p99'], previous['latency_ms']['p99'], True),
+            ('throughput', current['throughput_per_sec'], previous['throughput_per_sec'], False),
+            ('peak RSS', current['peak_rss_mb'], previous['peak_rss_mb'], True),
+        ]
+        for label, now, before, higher_is_worse in checks:
+            if not before or now is None:
+                continue
+            change = now / before - 1
+            if (change > tolerance) if higher_is_worse else (change < -tolerance):
+                regressions.append(f'{name}: {label} {before:g} -> {now:g} ({change:+.0%})')
+    return regressions
+
+
+def print_table(results):
+    print(f"{'scenario':<30} {'conc':>4} {'ops/s':>9} {'p50 ms':>9} {'p90 ms':>9} "
+          f"{'p99 ms':>9} {'RSS MB':>7}")
+    for name, result in results['scenarios'].items():
+        if 'error' in result:
+            print(f"{name:<30} error: {result['error']}")
+            continue
+        latency = result['latency_ms']
+        print(f"{name:<30} {result['concurrency']:>4} {result['throughput_per_sec']:>9.1f} "
+              f"{latency['p50']:>9.2f} {latency['p90']:>9.2f} {latency['p99']:>9.2f} "
+              f"{result['peak_rss_mb']:>7.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end performance benchmarks')
+    parser.add_argument('--only', nargs='+', default=['*'], help='scenario name patterns (fnmatch)')
+    parser.add_argument('--operations', type=int, help='operations per scenario (default: per scenario)')
+    parser.add_argument('--concurrency', type=int, help='threads for route scenarios (default: 8)')
+    parser.add_argument('-o', '--output', default='bench_results.json')
+    parser.add_argument('--compare', metavar='BASELINE', help='flag regressions against a results file')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative change (0.2 = 20%%)')
+    parser.add_argument('--list', action='store_true', help='list scenarios and exit')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_scenario(args.child, args.operations, args.concurrency)))
+        return
+    if args.list:
+        print('\n'.join(SCENARIOS))
+        return
+
+    names = [name for name in SCENARIOS if any(fnmatch.fnmatch(name, pattern) for pattern in args.only)]
+    results = {'environment': _environment(), 'scenarios': {}}
+    for name in names:
+        route = SCENARIOS[name][3]
+        print(f"running {name} ...", file=sys.stderr)
+        results['scenarios'][name] = run_child(name, args.operations,
+                                               args.concurrency if route else None)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print_table(results)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        print(f"\nCompared with {args.compare} ({baseline.get('environment', {}).get('commit')}), "
+              f"tolerance {args.tolerance:.0%}:")
+        for message in regressions:
+            print(f"  REGRESSION {message}")
+        if not regressions:
+            print("  no regressions")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,324 @@
+"""
+Offline bulk scoring without the web server
+
+    python bulk_score.py articles.jsonl -o results.jsonl
+    python bulk_score.py media.csv -o results.jsonl --workers 4 --resume
+    cat articles.jsonl | python bulk_score.py - > results.jsonl
+
+Input is JSONL or CSV (optionally .gz), or stdin with "-". Every record
+needs one of the fields text, url, image or video (image/video are file
+paths, relative to --media-root); an optional id field is copied to the
+output. Records are read in chunks and scored in worker processes, each
+of which loads NewsAnalyzer / DeepfakeDetector once, on first use. Texts
+in a chunk are scored with one analyze_batch call.
+Results are written as JSONL in input order. Only a fixed number of
+chunks is in flight, so memory does not grow with the input. With -o, a
+checkpoint next to the output records how many records are done; after an
+interruption --resume truncates the output to the checkpoint and skips
+the records already scored (it refuses to touch an existing output that
+has no checkpoint). A per-stage throughput report goes to stderr.
+"""
+
+import os
+import sys
+import csv
+import gzip
+import json
+import time
+import argparse
+import itertools
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from config import Config
+
+KINDS = ('text', 'url', 'image', 'video')
+
+# ---- Worker process side ----
+
+_worker_state = {}
+
+
+def _init_worker(options):
+    _worker_state['options'] = options
+
+
+def _news_analyzer():
+    if 'news_analyzer' not in _worker_state:
+        from utils.news_detector import NewsAnalyzer
+        _worker_state['news_analyzer'] = NewsAnalyzer()
+    return _worker_state['news_analyzer']
+
+
+def _deepfake_detector():
+    if 'deepfake_detector' not in _worker_state:
+        from utils.deepfake_detector import DeepfakeDetector
+        _worker_state['deepfake_detector'] = DeepfakeDetector()
+    return _worker_state['deepfake_detector']
+
+
+def _analyze_one(kind, value, options):
+    if kind == 'url':
+        return _news_analyzer().analyze_url(value, options['method'])
+    path = os.path.join(options['media_root'], value)
+    if kind == 'image':
+        return _deepfake_detector().detect_image(path)
+    return _deepfake_detector().detect_video(path, sample_frames=options['video_frames'])
+
+
+def score_chunk(records):
+    """
+    Score one chunk of (line, record) pairs
+    Returns (output rows in input order, {kind: [count, seconds]}, analysis stage seconds)
+    """
+    from utils import metrics
+
+    options = _worker_state['options']
+    rows = [None] * len(records)
+    timings = {}
+    profile = metrics.start_profile()
+
+    texts = []
+    for i, (line, record) in enumerate(records):
+        row = {'line': line}
+        if isinstance(record, dict) and 'id' in record:
+            row['id'] = record['id']
+        kind = next((k for k in KINDS if isinstance(record, dict) and record.get(k)), None)
+        if kind is None:
+            row['error'] = record.get('error', 'No text, url, image or video field') \
+                if isinstance(record, dict) else 'Record is not an object'
+            rows[i] = row
+            continue
+
+        row['kind'] = kind
+        rows[i] = row
+        if kind == 'text':
+            texts.append((i, str(record['text'])))
+            continue
+        started = time.perf_counter()
+        try:
+            row['result'] = _analyze_one(kind, str(record[kind]), options)
+        except Exception as e:
+            row['error'] = str(e)
+        entry = timings.setdefault(kind, [0, 0.0])
+        entry[0] += 1
+        entry[1] += time.perf_counter() - started
+
+    if texts:
+        started = time.perf_counter()
+        try:
+            results = _news_analyzer().analyze_batch([text for _, text in texts], options['method'])
+        except Exception as e:
+            results = [{'error': str(e)}] * len(texts)
+        for (i, _), result in zip(texts, results):
+            rows[i]['result'] = result
+        timings['text'] = [len(texts), time.perf_counter() - started]
+
+    metrics.stop_profile()
+    stages = {name: stage['seconds'] for name, stage in profile.report()['stages'].items()}
+    return rows, timings, stages
+
+
+# ---- Main process side ----
+
+def _open_text(path):
+    if path == '-':
+        return sys.stdin
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, encoding='utf-8', newline='')
+
+
+def read_records(path, input_format=None):
+    """Yield (line number, record) pairs; unparsable JSONL lines become error records"""
+    name = path[:-3] if path.endswith('.gz') else path
+    input_format = input_format or ('csv' if name.endswith('.csv') else 'jsonl')
+    with _open_text(path) as f:
+        if input_format == 'csv':
+            for line, record in enumerate(csv.DictReader(f), start=1):
+                yield line, record
+            return
+        for line, raw in enumerate(f, start=1):
+            if not raw.strip():
+                continue
+            try:
+                yield line, json.loads(raw)
+            except ValueError as e:
+                yield line, {'error': f'Invalid JSON: {e}'}
+
+
+def _json_default(value):
+    # NumPy scalars (e.g. bool_ flags) left in detector results
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+class Checkpoint:
+    """Records done and output size, rewritten atomically after every chunk"""
+
+    def __init__(self, output_path, input_path):
+        self.path = output_path + '.checkpoint'
+        self.input_path = input_path
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get('input') != self.input_path:
+            raise SystemExit(f'{self.path} belongs to input {state.get("input")!r}, not {self.input_path!r}')
+        return state
+
+    def save(self, records_done, output_bytes):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'input': self.input_path, 'records_done': records_done,
+                       'output_bytes': output_bytes}, f)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class Throughput:
+    """Per-stage counters for the progress and final reports"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.records = 0
+        self.read_seconds = 0.0
+        self.write_seconds = 0.0
+        self.kinds = {}
+        self.stages = {}
+
+    def add(self, timings, stages):
+        for kind, (count, seconds) in timings.items():
+            entry = self.kinds.setdefault(kind, [0, 0.0])
+            entry[0] += count
+            entry[1] += seconds
+        for name, seconds in stages.items():
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def progress(self):
+        elapsed = time.perf_counter() - self.started
+        return f"{self.records} records in {elapsed:.1f}s ({self.records / max(elapsed, 1e-9):,.0f} records/sec)"
+
+    def report(self, workers):
+        lines = [f"Scored {self.progress()} with {workers} worker(s)",
+                 f"  {'read':<22} {self.read_seconds:8.1f}s",
+                 f"  {'write':<22} {self.write_seconds:8.1f}s"]
+        for kind, (count, seconds) in sorted(self.kinds.items()):
+            lines.append(f"  {kind:<22} {seconds:8.1f}s worker time  {count:>9} records  "
+                         f"{count / max(seconds, 1e-9):10,.1f} records/sec per worker")
+        for name, seconds in sorted(self.stages.items(), key=lambda item: -item[1]):
+            lines.append(f"    {name:<20} {seconds:8.1f}s worker time")
+        return '\n'.join(lines)
+
+
+def _scored(chunks, workers, options):
+    """Score chunks in order; at most 2 chunks per worker are in flight"""
+    if workers <= 1:
+        _init_worker(options)
+        for chunk in chunks:
+            yield score_chunk(chunk)
+        return
+
+    context = multiprocessing.get_context(Config.JOB_START_METHOD)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(options,)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(score_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def run(input_path, output_path=None, input_format=None, workers=None, chunk_size=64,
+        resume=False, progress_every=10.0, **options):
+    workers = workers or os.cpu_count() or 1
+    throughput = Throughput()
+
+    checkpoint = Checkpoint(output_path, input_path) if output_path else None
+    done = 0
+    if checkpoint is not None and resume:
+        state = checkpoint.load()
+        if state is not None:
+            if not os.path.exists(output_path):
+                raise SystemExit(f'{output_path} is missing; cannot resume')
+            done = state['records_done']
+            # Drop anything written after the last checkpoint
+            with open(output_path, 'ab') as out:
+                out.truncate(state['output_bytes'])
+            print(f"Resuming after {done} records", file=sys.stderr)
+        elif os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+            # Finished runs remove their checkpoint; never truncate their results
+            raise SystemExit(f'{output_path} exists but has no checkpoint (the run may have finished); '
+                             'remove it or choose another output to start over')
+    # Binary output so tell() is a byte offset the checkpoint can truncate to
+    out = open(output_path, 'ab' if done else 'wb') if output_path else sys.stdout.buffer
+
+    records = read_records(input_path, input_format)
+
+    def timed_chunks():
+        # Reading and parsing happen here, in the main process
+        skipped = itertools.islice(records, done, None)
+        while True:
+            started = time.perf_counter()
+            chunk = list(itertools.islice(skipped, chunk_size))
+            throughput.read_seconds += time.perf_counter() - started
+            if not chunk:
+                return
+            yield chunk
+
+    last_report = time.perf_counter()
+    try:
+        for rows, timings, stages in _scored(timed_chunks(), workers, options):
+            started = time.perf_counter()
+            out.write(''.join(json.dumps(row, default=_json_default) + '\n' for row in rows).encode('utf-8'))
+            out.flush()
+            done += len(rows)
+            throughput.records += len(rows)
+            if checkpoint is not None:
+                checkpoint.save(done, out.tell())
+            throughput.write_seconds += time.perf_counter() - started
+            throughput.add(timings, stages)
+
+            if progress_every and time.perf_counter() - last_report >= progress_every:
+                print(throughput.progress(), file=sys.stderr)
+                last_report = time.perf_counter()
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+
+    if checkpoint is not None:
+        checkpoint.remove()
+    print(throughput.report(workers), file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score articles and media files in bulk')
+    parser.add_argument('input', help='JSONL or CSV file (optionally .gz), or - for stdin')
+    parser.add_argument('-o', '--output', help='JSONL output file (default: stdout, no checkpoint)')
+    parser.add_argument('--format', choices=['jsonl', 'csv'], help='input format (default: from the extension)')
+    parser.add_argument('--workers', type=int, help='scoring processes (default: all cores)')
+    parser.add_argument('--chunk-size', type=int, default=64, help='records per work unit')
+    parser.add_argument('--resume', action='store_true', help='continue from the output checkpoint')
+    parser.add_argument('--method', choices=['ml', 'rule'], default='ml', help='news analysis method')
+    parser.add_argument('--media-root', default='.', help='directory image/video paths are relative to')
+    parser.add_argument('--video-frames', type=int, default=10, help='frames sampled per video')
+    parser.add_argument('--progress-every', type=float, default=10.0, help='seconds between progress lines')
+    args = parser.parse_args()
+
+    run(args.input, args.output, args.format, args.workers, args.chunk_size, args.resume,
+        args.progress_every, method=args.method, media_root=args.media_root,
+        video_frames=args.video_frames)
+
+
+if __name__ == '__main__':
+    main()
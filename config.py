@@ -10,6 +10,8 @@ class Config:
     # File upload settings
     MAX_CONTENT_LENGTH = 50 * 1024 * 1024  # 50MB max file size
     UPLOAD_FOLDER = 'static/uploads'
+    RETAIN_UPLOADS = os.environ.get('RETAIN_UPLOADS', '0') == '1'  # keep uploads on disk after analysis
+    VIDEO_TEMP_DIR = os.environ.get('VIDEO_TEMP_DIR', '')  # per-request video temp files ('' = system temp)
     
     # API Keys (store in .env file)
     NEWS_API_KEY = os.environ.get('NEWS_API_KEY', '')
@@ -19,11 +21,119 @@ class Config:
     NEWS_MODEL_PATH = 'models/fake_news_detector.pkl'
     VECTORIZER_PATH = 'models/vectorizer.pkl'
     DEEPFAKE_MODEL_PATH = 'models/deepfake_detector.h5'
+    NEWS_LINEAR_MODEL_PATH = 'models/news_linear.npz'  # written by training/export_news_model.py
+    NEWS_MODEL_METADATA_PATH = 'models/model_metadata.json'  # written by the training scripts
+    
+    # News model runtime: 'linear' (NumPy only), 'sklearn', or 'auto' (linear when exported)
+    NEWS_SCORER = os.environ.get('NEWS_SCORER', 'auto')
+    
+    # Rule-based fake news indicators (one rule per line)
+    FAKE_INDICATORS_PATH = os.environ.get('FAKE_INDICATORS_PATH', 'data/fake_indicators.txt')
+    
+    # Long texts are analyzed as windows scored in one batch (bounded cost per text)
+    TEXT_CHUNK_ENABLED = os.environ.get('TEXT_CHUNK_ENABLED', '1') == '1'
+    TEXT_CHUNK_MIN_CHARS = int(os.environ.get('TEXT_CHUNK_MIN_CHARS', 20000))  # shorter texts are analyzed whole
+    TEXT_CHUNK_CHARS = int(os.environ.get('TEXT_CHUNK_CHARS', 4000))  # characters per window
+    TEXT_CHUNK_MAX_WINDOWS = int(os.environ.get('TEXT_CHUNK_MAX_WINDOWS', 32))  # cost budget per text
+    TEXT_CHUNK_SAMPLING = os.environ.get('TEXT_CHUNK_SAMPLING', 'spread')  # 'spread' over the text or 'head'
+    
+    # Deepfake model inference
+    DEEPFAKE_BATCH_SIZE = int(os.environ.get('DEEPFAKE_BATCH_SIZE', 32))  # face crops per model call
+    DEEPFAKE_DIRECT_CALL_MAX = 64  # call the model directly instead of predict() up to this size
+    
+    # Deepfake model runtime: keras, tflite or onnx (falls back to keras if the export is missing)
+    DEEPFAKE_BACKEND = os.environ.get('DEEPFAKE_BACKEND', 'keras')
+    DEEPFAKE_TFLITE_PATH = 'models/deepfake_detector.tflite'
+    DEEPFAKE_ONNX_PATH = 'models/deepfake_detector.onnx'
+    DEEPFAKE_INFERENCE_THREADS = int(os.environ.get('DEEPFAKE_INFERENCE_THREADS', 0))  # 0 = runtime default
+    
+    # Video frame sampling
+    VIDEO_SEEK_MIN_GAP = 120  # decode forward across shorter gaps instead of seeking
+    VIDEO_MAX_DIMENSION = 1280  # downscale sampled frames for face detection (0 = full size)
+    VIDEO_MAX_SAMPLED_FRAMES = 300  # cap for interval-based sampling
+    
+    # Adaptive (early-exit) video analysis
+    VIDEO_ADAPTIVE_MAX_FRAMES = 60
+    VIDEO_ADAPTIVE_MIN_FRAMES = 5  # never stop before this many scored frames
+    VIDEO_ADAPTIVE_TIME_BUDGET = 20.0  # seconds
+    VIDEO_ADAPTIVE_Z = 1.96  # ~95% confidence interval
+    VIDEO_ADAPTIVE_INTERVAL = 1.0  # seconds between frames when the frame count is unknown
+    
+    # Memory-map model arrays so pre-forked workers share them
+    MODEL_MMAP = os.environ.get('MODEL_MMAP', '1') == '1'
+    
+    # Models are loaded on first use unless preloaded: none, text, media or all
+    PRELOAD_MODELS = os.environ.get('PRELOAD_MODELS', 'none')
+    
+    # Face detection: 'haar' or 'dnn' (OpenCV res10 SSD, falls back to haar if files are missing)
+    FACE_DETECTOR = os.environ.get('FACE_DETECTOR', 'haar')
+    FACE_DETECT_MAX_DIMENSION = 960  # detect on a downscaled copy (0 = full resolution)
+    FACE_DNN_PROTOTXT = 'models/face_detector/deploy.prototxt'
+    FACE_DNN_WEIGHTS = 'models/face_detector/res10_300x300_ssd_iter_140000.caffemodel'
+    FACE_DNN_CONFIDENCE = 0.5
+    
+    # Face tracking between video frames
+    FACE_TRACK_REDETECT_INTERVAL = 30  # frames between full detections
+    FACE_TRACK_MAX_GAP = 15  # frames; larger jumps between samples always re-detect
+    FACE_TRACK_MIN_SCORE = 0.6  # template match score below which a face counts as lost
     
     # Detection thresholds
     FAKE_NEWS_THRESHOLD = 0.7
     DEEPFAKE_THRESHOLD = 0.6
     
+    # URL fetching
+    URL_FETCH_TIMEOUT = 10  # seconds
+    URL_MAX_BYTES = 5 * 1024 * 1024  # pages larger than this are rejected
+    URL_FETCH_WORKERS = 16  # concurrent fetches for analyze_urls
+    URL_FETCH_PER_HOST = 4  # concurrent connections per host
+    URL_POOL_HOSTS = 32  # hosts with a kept-alive connection pool
+    URL_VALIDATOR_CACHE_MAX_BYTES = 32 * 1024 * 1024  # ETag/Last-Modified entries with their extracted text
+    
+    # Result cache (in-process LRU, plus SQLite when a path is set)
+    RESULT_CACHE_ENABLED = os.environ.get('RESULT_CACHE_ENABLED', '1') == '1'
+    RESULT_CACHE_MAX_BYTES = int(os.environ.get('RESULT_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    RESULT_CACHE_DB_PATH = os.environ.get('RESULT_CACHE_DB_PATH', '')
+    RESULT_CACHE_URL_TTL = 3600  # seconds, pages change over time
+    
+    # Near-duplicate verdict reuse (MinHash + LSH over recently analyzed texts)
+    NEAR_DUP_ENABLED = os.environ.get('NEAR_DUP_ENABLED', '1') == '1'
+    NEAR_DUP_THRESHOLD = float(os.environ.get('NEAR_DUP_THRESHOLD', 0.8))  # estimated Jaccard similarity
+    NEAR_DUP_MAX_DOCS = int(os.environ.get('NEAR_DUP_MAX_DOCS', 100000))  # about 600 bytes per document
+    NEAR_DUP_MAX_AGE = 7 * 86400  # seconds an indexed verdict may be reused
+    NEAR_DUP_INDEX_PATH = os.environ.get('NEAR_DUP_INDEX_PATH', 'data/near_duplicates.npz')  # '' = memory only
+    NEAR_DUP_SAVE_INTERVAL = 300  # seconds between background saves
+    NEAR_DUP_NUM_PERM = 128  # MinHash values per signature
+    NEAR_DUP_BANDS = 32  # LSH bands of NUM_PERM / BANDS values each
+    NEAR_DUP_SHINGLE_SIZE = 5  # words per shingle
+    NEAR_DUP_MIN_TOKENS = 20  # shorter texts only use the exact-match cache
+    
+    # Perceptual-hash reuse of image/video results (re-encoded or resized copies)
+    MEDIA_HASH_ENABLED = os.environ.get('MEDIA_HASH_ENABLED', '1') == '1'
+    MEDIA_HASH_MAX_DISTANCE = int(os.environ.get('MEDIA_HASH_MAX_DISTANCE', 6))  # differing bits of 64, pHash and dHash
+    MEDIA_HASH_MAX_ITEMS = int(os.environ.get('MEDIA_HASH_MAX_ITEMS', 20000))  # images + videos, oldest evicted
+    MEDIA_HASH_VIDEO_FRAMES = 16  # first sampled frames hashed per video (decoded once, reused by the analysis)
+    MEDIA_HASH_VIDEO_MIN_MATCH = 0.6  # fraction of keyframes that must match one indexed video
+    MEDIA_HASH_FACE_MAX_DIFF = 4.0  # mean grey-level difference of face thumbnails; edited faces are re-analyzed
+    
+    # Dashboard analytics (buffered writes to SQLite, rolled up per minute/hour/day)
+    ANALYTICS_ENABLED = os.environ.get('ANALYTICS_ENABLED', '1') == '1'
+    ANALYTICS_DB_PATH = os.environ.get('ANALYTICS_DB_PATH', 'data/analytics.db')
+    ANALYTICS_FLUSH_INTERVAL = 1.0  # seconds between background writes
+    ANALYTICS_MAX_BUFFER = 100000  # events held in memory; the oldest are dropped beyond this
+    ANALYTICS_EVENT_RETENTION_DAYS = 7  # raw events; rollups are kept longer
+    
+    # Stage timing histograms served at /metrics (Prometheus text format)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+    PROFILE_HEADER = 'X-Profile'  # send "X-Profile: 1" to get a per-stage breakdown in the response
+    
+    # Background job queue (local worker processes, job records in SQLite, no broker)
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+    JOB_MAX_PENDING = int(os.environ.get('JOB_MAX_PENDING', 20))  # submissions beyond this get 429
+    JOB_RESULT_TTL = 3600  # seconds a finished job is kept
+    JOB_BATCH_CHUNK_SIZE = 500  # articles per progress update
+    JOB_START_METHOD = 'spawn'  # fresh worker processes, no inherited TensorFlow state
+    JOB_DB_PATH = os.environ.get('JOB_DB_PATH', 'data/jobs.db')  # shared by all web processes
+    
     # CORS settings
     CORS_HEADERS = 'Content-Type'
     
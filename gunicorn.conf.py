@@ -0,0 +1,38 @@
+"""
+Gunicorn settings for pre-fork model sharing
+The news models are loaded once in the master and inherited by every
+worker. Model arrays are memory-mapped (Config.MODEL_MMAP) and the
+objects created before forking are frozen out of the garbage collector,
+so workers don't dirty the shared pages just by running a GC pass.
+Per-process state (near-duplicate index, analytics writer, job
+dispatcher) is only created in the workers, on first use.
+
+    gunicorn app:app
+"""
+
+import gc
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+
+# Import app.py (and load models) in the master before forking
+preload_app = True
+
+# TensorFlow is not fork-safe, so by default only the news models are
+# preloaded; the deepfake model is still loaded lazily in each worker
+os.environ.setdefault('PRELOAD_MODELS', 'text')
+
+# No collections while the master builds the shared objects
+gc.disable()
+
+
+def when_ready(server):
+    # The app is loaded: freeze it, then collect normally again in the master
+    gc.freeze()
+    gc.enable()
+
+
+def pre_fork(server, worker):
+    # Move everything allocated since (e.g. before a worker restart) into the permanent generation
+    gc.freeze()
@@ -0,0 +1,28 @@
+"""
+bulk_score resume handling
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import bulk_score
+
+
+def test_resume_without_checkpoint_keeps_existing_output(tmp_path):
+    input_path = tmp_path / 'articles.jsonl'
+    input_path.write_text('{"id": 1, "text": "Some article text."}\n')
+    output_path = tmp_path / 'results.jsonl'
+    finished = '{"id": 1, "prediction": "Real"}\n'
+    output_path.write_text(finished)
+
+    # A completed run has already removed its checkpoint
+    with pytest.raises(SystemExit, match='has no checkpoint'):
+        bulk_score.run(str(input_path), str(output_path), workers=1, resume=True)
+
+    assert output_path.read_text() == finished
@@ -0,0 +1,47 @@
+"""
+JobQueue with real worker processes
+    python -m pytest tests
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.job_queue import JobQueue
+
+
+def crash_job(job_id):
+    # Like a worker killed by the OOM killer or a segfault in native code
+    os._exit(1)
+
+
+def echo_job(job_id, value):
+    return {'value': value}
+
+
+def wait_finished(queue, job_id, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.result(job_id)
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'job {job_id} did not finish')
+
+
+def test_queue_recovers_after_a_worker_dies(tmp_path):
+    queue = JobQueue(workers=1, db_path=str(tmp_path / 'jobs.db'))
+    try:
+        crashed = wait_finished(queue, queue.submit('test', crash_job))
+        assert crashed['status'] == 'failed'
+        assert crashed['error'] == 'Job worker process died'
+
+        for value in range(2):
+            job = wait_finished(queue, queue.submit('test', echo_job, value))
+            assert job['status'] == 'done'
+            assert job['result'] == {'value': value}
+    finally:
+        queue.shutdown()
@@ -0,0 +1,62 @@
+"""
+MediaHashIndex reuse of image results
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.perceptual_hash import MediaHashIndex, image_hash
+
+FACE = {'x': 200, 'y': 120, 'w': 160, 'h': 160}
+
+
+def make_image():
+    # Smooth texture (like a photo) at 640x480, with a distinct "face" region
+    rng = np.random.default_rng(7)
+    img = cv2.resize(rng.integers(0, 256, (24, 32, 3), dtype=np.uint8), (640, 480),
+                     interpolation=cv2.INTER_CUBIC)
+    face = cv2.resize(rng.integers(0, 256, (8, 8, 3), dtype=np.uint8), (FACE['w'], FACE['h']),
+                      interpolation=cv2.INTER_CUBIC)
+    img[FACE['y']:FACE['y'] + FACE['h'], FACE['x']:FACE['x'] + FACE['w']] = face
+    return img
+
+
+def result():
+    return {'faces_detected': 1, 'prediction': 'Real', 'fake_probability': 0.2,
+            'details': [{'face_id': 1, 'position': dict(FACE), 'fake_score': 0.2}]}
+
+
+def test_resized_copy_reuses_result_with_rescaled_boxes():
+    index = MediaHashIndex()
+    img = make_image()
+    index.add_image(image_hash(img), result(), image=img)
+
+    half = cv2.resize(img, (320, 240), interpolation=cv2.INTER_AREA)
+    reused = index.lookup_image(image_hash(half), image=half)
+
+    assert reused is not None
+    assert reused['details'][0]['position'] == {'x': 100, 'y': 60, 'w': 80, 'h': 80}
+    assert reused['perceptual_match']['original_size'] == [640, 480]
+
+
+def test_edited_face_is_not_reused():
+    index = MediaHashIndex()
+    img = make_image()
+    index.add_image(image_hash(img), result(), image=img)
+
+    edited = img.copy()
+    inner = edited[FACE['y'] + 30:FACE['y'] + 130, FACE['x'] + 30:FACE['x'] + 130]
+    inner[...] = inner[::-1]
+    key = image_hash(edited)
+
+    # The whole-image hashes still match; only the face check tells them apart
+    assert index.lookup_image(key) is not None
+    assert index.lookup_image(key, image=edited) is None
+    assert index.stats()['face_mismatches'] == 1
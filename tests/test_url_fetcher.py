@@ -0,0 +1,82 @@
+"""
+URLFetcher against the local article server from benchmarks/fixtures.py
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from config import Config
+from fixtures import ArticleServer, make_texts
+from utils.url_fetcher import FetchError, URLFetcher
+
+
+@pytest.fixture
+def texts():
+    return make_texts(20, 200, seed=3)
+
+
+def test_repeat_fetch_revalidates_with_etag(texts):
+    with ArticleServer(texts) as server:
+        fetcher = URLFetcher()
+        first = fetcher.fetch(server.article_url(1))
+        second = fetcher.fetch(server.article_url(1))
+
+    assert not first['not_modified']
+    assert first['title'] == 'Article 1'
+    assert texts[1][:50] in first['text']
+    assert second['not_modified']
+    assert (second['text'], second['title']) == (first['text'], first['title'])
+    assert server.not_modified == 1
+
+
+def test_connections_are_reused(texts):
+    with ArticleServer(texts) as server:
+        fetcher = URLFetcher()
+        for n in range(10):
+            fetcher.fetch(server.article_url(n))
+
+    assert server.requests == 10
+    assert server.connections == 1
+
+
+def test_oversize_page_is_rejected_mid_stream(texts):
+    size = 50 * 1024 * 1024
+    with ArticleServer(texts) as server:
+        fetcher = URLFetcher(max_bytes=256 * 1024)
+        with pytest.raises(FetchError, match='larger than'):
+            fetcher.fetch(server.large_url(size))
+        # The body has no Content-Length, so the limit is enforced while streaming
+        fetcher.session.close()
+
+    assert server.large_bytes_sent < size
+
+
+def test_concurrent_requests_per_host_are_capped(texts, monkeypatch):
+    monkeypatch.setattr(Config, 'URL_FETCH_PER_HOST', 2)
+    with ArticleServer(texts, delay=0.2) as server:
+        fetcher = URLFetcher()
+        pages = fetcher.fetch_many([server.article_url(n) for n in range(8)], workers=8)
+
+    assert all(isinstance(page, dict) for page in pages)
+    assert [page['title'] for page in pages] == [f'Article {n}' for n in range(8)]
+    assert server.max_in_flight == 2
+
+
+def test_validator_cache_is_bounded_by_size(texts):
+    with ArticleServer(texts) as server:
+        fetcher = URLFetcher(validator_cache_bytes=8000)
+        for n in range(10):
+            fetcher.fetch(server.article_url(n))
+        latest = fetcher.fetch(server.article_url(9))
+        oldest = fetcher.fetch(server.article_url(0))
+
+    assert 0 < fetcher._validators_size <= 8000
+    assert latest['not_modified']
+    assert not oldest['not_modified']
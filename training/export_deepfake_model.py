@@ -0,0 +1,103 @@
+"""
+Export the Keras deepfake model to a lighter CPU runtime
+    python training/export_deepfake_model.py --format tflite --quantize float16
+    python training/export_deepfake_model.py --format tflite --quantize int8 --calibration-dir crops/
+    python training/export_deepfake_model.py --format onnx
+TFLite export needs TensorFlow; ONNX export needs tf2onnx and serving it
+needs onnxruntime. int8 quantization calibrates on a directory of face
+crops (a few hundred representative crops are enough). Set
+DEEPFAKE_BACKEND=tflite or onnx to serve the export, then check it with
+benchmarks/bench_deepfake_backends.py.
+"""
+
+import os
+import sys
+import argparse
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+
+IMG_SIZE = (128, 128)
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def load_crops(directory, limit=None):
+    """Face crops preprocessed exactly like DeepfakeDetector.preprocess_image"""
+    crops = []
+    for name in sorted(os.listdir(directory)):
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            img = Image.open(os.path.join(directory, name)).convert('RGB').resize(IMG_SIZE)
+            crops.append((np.array(img) / 255.0).astype(np.float32))
+            if limit and len(crops) >= limit:
+                break
+    return np.stack(crops) if crops else np.empty((0,) + IMG_SIZE[::-1] + (3,), np.float32)
+
+
+def export_tflite(model, output, quantize, calibration_dir):
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantize == 'float16':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantize == 'dynamic':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    elif quantize == 'int8':
+        if not calibration_dir:
+            sys.exit('int8 quantization needs --calibration-dir with face crops')
+        crops = load_crops(calibration_dir, limit=500)
+        if len(crops) == 0:
+            sys.exit(f'No images found in {calibration_dir}')
+
+        def representative_dataset():
+            for crop in crops:
+                yield [crop[np.newaxis]]
+
+        # Integer kernels inside, float32 input/output so the backend API is unchanged
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+
+    with open(output, 'wb') as f:
+        f.write(converter.convert())
+
+
+def export_onnx(model, output):
+    import tensorflow as tf
+    import tf2onnx
+
+    # Dynamic batch dimension so one session serves any batch size
+    signature = (tf.TensorSpec((None,) + IMG_SIZE[::-1] + (3,), tf.float32, name='input'),)
+    tf2onnx.convert.from_keras(model, input_signature=signature, opset=13, output_path=output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the deepfake model for CPU inference')
+    parser.add_argument('--format', choices=['tflite', 'onnx'], default='tflite')
+    parser.add_argument('--quantize', choices=['none', 'float16', 'dynamic', 'int8'], default='none',
+                        help='TFLite quantization (ignored for ONNX)')
+    parser.add_argument('--calibration-dir', help='face crops used to calibrate int8 quantization')
+    parser.add_argument('--model', default=Config.DEEPFAKE_MODEL_PATH)
+    parser.add_argument('--output', help='defaults to the path the backend loads from')
+    args = parser.parse_args()
+
+    from keras.models import load_model
+    model = load_model(args.model)
+
+    if args.format == 'tflite':
+        output = args.output or Config.DEEPFAKE_TFLITE_PATH
+        export_tflite(model, output, args.quantize, args.calibration_dir)
+    else:
+        output = args.output or Config.DEEPFAKE_ONNX_PATH
+        export_onnx(model, output)
+
+    print(f"Exported {args.model} -> {output} ({os.path.getsize(output) / 1024:.0f} KB, "
+          f"original {os.path.getsize(args.model) / 1024:.0f} KB)")
+
+
+if __name__ == '__main__':
+    main()
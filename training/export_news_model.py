@@ -0,0 +1,62 @@
+"""
+Export the trained news model for the scikit-learn-free scorer
+    python training/export_news_model.py [--texts sample.txt]
+Reads models/vectorizer.pkl and models/fake_news_detector.pkl, writes
+Config.NEWS_LINEAR_MODEL_PATH and checks that LinearTextScorer's
+probabilities match predict_proba to within 1e-6 (on the training
+sample texts plus one text per line of --texts, if given).
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import joblib
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from utils.linear_scorer import LinearTextScorer, export_linear_model
+from training.train_models import prepare_sample_data
+
+TOLERANCE = 1e-6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the news model to a NumPy-only format')
+    parser.add_argument('--texts', help='file with one verification text per line')
+    parser.add_argument('--output', default=Config.NEWS_LINEAR_MODEL_PATH)
+    args = parser.parse_args()
+
+    vectorizer = joblib.load(Config.VECTORIZER_PATH)
+    model = joblib.load(Config.NEWS_MODEL_PATH)
+    export_linear_model(vectorizer, model, args.output)
+
+    texts = list(prepare_sample_data()['text']) + ['', '!!!', 'ÉLECTION truquée, vérité cachée']
+    if args.texts:
+        with open(args.texts, encoding='utf-8') as f:
+            texts.extend(line.rstrip('\n') for line in f)
+
+    scorer = LinearTextScorer.load(args.output)
+    expected = model.predict_proba(vectorizer.transform(texts))
+    start = time.perf_counter()
+    actual = scorer.predict_proba(texts)
+    elapsed = time.perf_counter() - start
+
+    max_diff = float(np.abs(expected - actual).max())
+    same_predictions = np.array_equal(model.classes_.take(np.argmax(expected, axis=1)),
+                                      scorer.classes_.take(np.argmax(actual, axis=1)))
+    print(f"Exported {len(scorer.vocabulary)} terms to {args.output} "
+          f"({os.path.getsize(args.output) / 1024:.0f} KB)")
+    print(f"Checked {len(texts)} texts: max probability difference {max_diff:.2e}, "
+          f"{elapsed / len(texts) * 1e6:.1f} us per text")
+
+    if max_diff > TOLERANCE or not same_predictions:
+        os.remove(args.output)
+        sys.exit('Exported model does not match scikit-learn; export removed.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""
+Hyperparameter and model-selection sweep for the fake news model
+    python training/sweep_models.py [--data corpus.csv] [--folds 5] [--jobs -1]
+Each vectorizer setting is fitted once per cross-validation fold and its
+TF-IDF matrices are reused by every model candidate; candidates x folds
+are trained in parallel across cores. Every candidate gets its mean CV
+accuracy and its inference latency per document (vectorize + predict_proba,
+one document at a time and in a batch).
+The winner is the fastest candidate within --tolerance of the best
+accuracy. It is refitted on all data and saved where NewsAnalyzer loads
+it, with models/model_metadata.json describing it; the full leaderboard
+goes to models/sweep_leaderboard.csv and .json.
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+from sklearn.naive_bayes import ComplementNB
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.linear_scorer import export_linear_model
+from training.train_models import prepare_sample_data, read_chunks, save_model_metadata
+
+# stop_words='english' is always used, like the default training script
+VECTORIZER_GRID = {
+    'tfidf-5k-1,2': {'max_features': 5000, 'ngram_range': (1, 2)},
+    'tfidf-20k-1,1': {'max_features': 20000, 'ngram_range': (1, 1)},
+    'tfidf-20k-1,2': {'max_features': 20000, 'ngram_range': (1, 2)},
+    'tfidf-50k-1,2-sublinear': {'max_features': 50000, 'ngram_range': (1, 2), 'sublinear_tf': True},
+}
+
+MODEL_GRID = {
+    'logistic_regression': (
+        LogisticRegression(max_iter=1000, random_state=42, class_weight='balanced'),
+        {'C': [0.3, 1.0, 3.0, 10.0]}
+    ),
+    'sgd_log': (
+        SGDClassifier(loss='log_loss', random_state=42, class_weight='balanced'),
+        {'alpha': [1e-6, 1e-5, 1e-4]}
+    ),
+    'complement_nb': (
+        ComplementNB(),
+        {'alpha': [0.1, 0.3, 1.0]}
+    ),
+    'random_forest': (
+        RandomForestClassifier(random_state=42, class_weight='balanced', n_jobs=1),
+        {'n_estimators': [100, 300]}
+    ),
+}
+
+LATENCY_DOCS = 200
+
+
+def load_corpus(path, text_column, label_column):
+    if not path:
+        df = prepare_sample_data()
+        return df['text'].tolist(), df['label'].to_numpy()
+    texts, labels = [], []
+    for chunk_texts, chunk_labels in read_chunks(path, text_column, label_column, 50000):
+        texts.extend(chunk_texts)
+        labels.append(chunk_labels)
+    return texts, np.concatenate(labels)
+
+
+def build_folds(texts, labels, vectorizer_params, folds):
+    """TF-IDF matrices for every fold, fitted on that fold's training part only"""
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=42)
+    texts = np.asarray(texts, dtype=object)
+    cached = []
+    for train, test in splitter.split(texts, labels):
+        vectorizer = TfidfVectorizer(stop_words='english', **vectorizer_params)
+        X_train = vectorizer.fit_transform(texts[train])
+        cached.append((vectorizer, X_train, labels[train], vectorizer.transform(texts[test]),
+                       labels[test], texts[test][:LATENCY_DOCS].tolist()))
+    return cached
+
+
+def measure_latency(vectorizer, model, texts):
+    """Median single-document and amortized batched microseconds per document"""
+    timings = []
+    for text in texts:
+        start = time.perf_counter()
+        model.predict_proba(vectorizer.transform([text]))
+        timings.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    model.predict_proba(vectorizer.transform(texts))
+    batched = (time.perf_counter() - start) / len(texts)
+    return float(np.median(timings)) * 1e6, batched * 1e6
+
+
+def evaluate(estimator, params, fold, with_latency):
+    """Fit one candidate on one fold; latency is measured on the first fold only"""
+    vectorizer, X_train, y_train, X_test, y_test, latency_texts = fold
+    model = clone(estimator).set_params(**params)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    accuracy = accuracy_score(y_test, model.predict(X_test))
+    latency = measure_latency(vectorizer, model, latency_texts) if with_latency else None
+    return accuracy, fit_seconds, latency
+
+
+def sweep(texts, labels, folds, jobs, vectorizers, models):
+    rows = []
+    for vectorizer_name in vectorizers:
+        vectorizer_params = VECTORIZER_GRID[vectorizer_name]
+        start = time.perf_counter()
+        cached = build_folds(texts, labels, vectorizer_params, folds)
+        print(f"{vectorizer_name}: TF-IDF for {folds} folds in {time.perf_counter() - start:.1f}s")
+
+        candidates = [(name, params) for name in models for params in ParameterGrid(MODEL_GRID[name][1])]
+        results = Parallel(n_jobs=jobs)(
+            delayed(evaluate)(MODEL_GRID[name][0], params, fold, i == 0)
+            for name, params in candidates
+            for i, fold in enumerate(cached)
+        )
+
+        for c, (name, params) in enumerate(candidates):
+            scores = results[c * folds:(c + 1) * folds]
+            accuracies = [accuracy for accuracy, _, _ in scores]
+            single_us, batched_us = scores[0][2]
+            rows.append({
+                'vectorizer': vectorizer_name,
+                'model': name,
+                'params': json.dumps(params, sort_keys=True),
+                'accuracy': float(np.mean(accuracies)),
+                'accuracy_std': float(np.std(accuracies)),
+                'fit_seconds': float(np.mean([fit for _, fit, _ in scores])),
+                'latency_us': single_us,
+                'batched_latency_us': batched_us,
+            })
+    return pd.DataFrame(rows).sort_values(['accuracy', 'latency_us'], ascending=[False, True])
+
+
+def pick_best(leaderboard, tolerance):
+    """Fastest single-document candidate within `tolerance` of the best accuracy"""
+    contenders = leaderboard[leaderboard['accuracy'] >= leaderboard['accuracy'].max() - tolerance]
+    return contenders.sort_values(['latency_us', 'accuracy'], ascending=[True, False]).iloc[0]
+
+
+def save_best(best, texts, labels, output_dir):
+    """Refit the winner on all data and save it where NewsAnalyzer loads it"""
+    vectorizer_params = VECTORIZER_GRID[best['vectorizer']]
+    params = json.loads(best['params'])
+    vectorizer = TfidfVectorizer(stop_words='english', **vectorizer_params)
+    model = clone(MODEL_GRID[best['model']][0]).set_params(**params)
+    model.fit(vectorizer.fit_transform(texts), labels)
+
+    joblib.dump(model, os.path.join(output_dir, 'fake_news_detector.pkl'))
+    joblib.dump(vectorizer, os.path.join(output_dir, 'vectorizer.pkl'))
+
+    # Only logistic regression has a NumPy-only export; never leave a stale one behind
+    linear_path = os.path.join(output_dir, 'news_linear.npz')
+    if isinstance(model, LogisticRegression):
+        export_linear_model(vectorizer, model, linear_path)
+    elif os.path.exists(linear_path):
+        os.remove(linear_path)
+
+    save_model_metadata({
+        'model': best['model'],
+        'params': params,
+        'vectorizer': dict(vectorizer_params, name=best['vectorizer']),
+        'accuracy': float(best['accuracy']),
+        'accuracy_std': float(best['accuracy_std']),
+        'latency_us': float(best['latency_us']),
+        'batched_latency_us': float(best['batched_latency_us']),
+        'n_docs': len(texts),
+        'selected_by': 'sweep'
+    }, os.path.join(output_dir, 'model_metadata.json'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sweep models and settings for the fake news model')
+    parser.add_argument('--data', help='CSV or JSONL corpus (default: built-in sample data)')
+    parser.add_argument('--text-column', default='text')
+    parser.add_argument('--label-column', default='label')
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--jobs', type=int, default=-1, help='parallel fits (-1 = all cores)')
+    parser.add_argument('--vectorizers', nargs='+', choices=list(VECTORIZER_GRID), default=list(VECTORIZER_GRID))
+    parser.add_argument('--models', nargs='+', choices=list(MODEL_GRID), default=list(MODEL_GRID))
+    parser.add_argument('--tolerance', type=float, default=0.005,
+                        help='accuracy a faster model may give up to win')
+    parser.add_argument('--output-dir', default='models')
+    parser.add_argument('--no-save', action='store_true', help='only write the leaderboard')
+    args = parser.parse_args()
+
+    texts, labels = load_corpus(args.data, args.text_column, args.label_column)
+    print(f"{len(texts)} documents, {args.folds}-fold cross-validation")
+
+    leaderboard = sweep(texts, labels, args.folds, args.jobs, args.vectorizers, args.models)
+    os.makedirs(args.output_dir, exist_ok=True)
+    leaderboard.to_csv(os.path.join(args.output_dir, 'sweep_leaderboard.csv'), index=False)
+    leaderboard.to_json(os.path.join(args.output_dir, 'sweep_leaderboard.json'), orient='records', indent=2)
+
+    with pd.option_context('display.width', 200, 'display.max_colwidth', 40):
+        print(leaderboard.to_string(index=False, float_format=lambda value: f'{value:.4f}'))
+
+    best = pick_best(leaderboard, args.tolerance)
+    print(f"\nBest: {best['model']} {best['params']} on {best['vectorizer']} "
+          f"(accuracy {best['accuracy']:.4f}, {best['latency_us']:.0f} us/doc)")
+    if not args.no_save:
+        save_best(best, texts, labels, args.output_dir)
+        print("Model saved successfully!")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,18 @@
 """
 Script to train fake news detection model
 Note: You'll need a dataset to train this model
+
+    python training/train_models.py                      # in-memory TF-IDF on sample data
+    python training/train_models.py --stream corpus.csv  # out-of-core training
+
+Streaming mode reads a CSV or JSONL corpus (optionally .gz) in chunks and
+never holds it in memory:
+  1. hash each chunk (HashingVectorizer, no vocabulary) and count document
+     frequencies online to build the IDF weights
+  2. train an SGDClassifier (logistic loss) with partial_fit, one or more epochs
+  3. evaluate on a held-out split chosen by hashing each text
+Chunks are featurized in parallel worker processes. Labels must be 1 = Fake,
+0 = Real. Shuffle the corpus beforehand if it is sorted by label.
 """
 
 import pandas as pd
@@ -12,6 +24,18 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, classification_report
 import joblib
 import pickle
+import os
+import sys
+import time
+import zlib
+import json
+import argparse
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.linear_scorer import export_linear_model
 
 def prepare_sample_data():
     """Create sample data if no dataset is available"""
@@ -35,6 +59,15 @@ def prepare_sample_data():
     
     return pd.DataFrame(sample_data)
 
+def save_model_metadata(info, path='models/model_metadata.json'):
+    """Describe the saved model for NewsAnalyzer"""
+    import sklearn
+    
+    metadata = dict(info, sklearn_version=sklearn.__version__,
+                    trained_at=time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()))
+    with open(path, 'w') as f:
+        json.dump(metadata, f, indent=2, default=str)
+
 def train_fake_news_model():
     """Train fake news detection model"""
     print("Training fake news detection model...")
@@ -85,9 +118,205 @@ def train_fake_news_model():
     joblib.dump(model, 'models/fake_news_detector.pkl')
     joblib.dump(vectorizer, 'models/vectorizer.pkl')
     
+    # Keep the NumPy-only export in step with the pickles
+    export_linear_model(vectorizer, model, 'models/news_linear.npz')
+    save_model_metadata({
+        'model': 'logistic_regression',
+        'params': model.get_params(),
+        'vectorizer': {'max_features': 5000, 'ngram_range': [1, 2]},
+        'accuracy': float(accuracy),
+        'n_docs': len(df)
+    })
+    
+    print("\nModel saved successfully!")
+    
+    return model, vectorizer
+
+# ---- Out-of-core (streaming) training ----
+
+_worker_vectorizer = {}
+
+def _init_featurizer(vectorizer):
+    """Runs once per featurization process"""
+    _worker_vectorizer['vectorizer'] = vectorizer
+
+def _is_holdout(texts, holdout):
+    """Stable train/held-out split: the same text always lands on the same side"""
+    cutoff = int(holdout * 10000)
+    return np.array([zlib.crc32(text.encode('utf-8', 'surrogatepass')) % 10000 < cutoff
+                     for text in texts], dtype=bool)
+
+def _count_chunk(texts, labels, holdout):
+    """Document frequencies and label counts of one chunk's training documents"""
+    train = ~_is_holdout(texts, holdout)
+    X = _worker_vectorizer['vectorizer'].transform([t for t, keep in zip(texts, train) if keep])
+    features, df = np.unique(X.indices, return_counts=True)
+    return len(texts), X.shape[0], features, df, Counter(labels[train].tolist())
+
+def _featurize_chunk(texts, labels, holdout):
+    """TF-IDF matrix, labels and held-out mask of one chunk"""
+    return len(texts), _worker_vectorizer['vectorizer'].transform(texts), labels, _is_holdout(texts, holdout)
+
+def read_chunks(path, text_column, label_column, chunk_size):
+    """Yield (texts, labels) chunks from a CSV or JSONL file"""
+    name = path[:-3] if path.endswith('.gz') else path
+    if name.endswith(('.jsonl', '.json')):
+        reader = pd.read_json(path, lines=True, chunksize=chunk_size)
+    else:
+        reader = pd.read_csv(path, usecols=[text_column, label_column], chunksize=chunk_size)
+    
+    for chunk in reader:
+        chunk = chunk.dropna(subset=[text_column, label_column])
+        if len(chunk):
+            yield chunk[text_column].astype(str).tolist(), chunk[label_column].to_numpy().astype(int)
+
+def _map_chunks(func, chunks, workers, vectorizer, holdout):
+    """
+    Apply func to every chunk in order, in worker processes when workers > 1
+    At most 2 chunks per worker are in flight, so memory stays bounded
+    """
+    if workers <= 1:
+        _init_featurizer(vectorizer)
+        for texts, labels in chunks:
+            yield func(texts, labels, holdout)
+        return
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_featurizer,
+                             initargs=(vectorizer,)) as pool:
+        pending = deque()
+        for texts, labels in chunks:
+            pending.append(pool.submit(func, texts, labels, holdout))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def _peak_memory_mb():
+    """Peak RSS of this process and of its (finished) worker processes"""
+    try:
+        import resource
+    except ImportError:
+        return float('nan'), float('nan')
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024  # bytes on macOS, kB elsewhere
+    return own / scale, children / scale
+
+def _report_pass(name, docs, started):
+    elapsed = time.perf_counter() - started
+    print(f"{name}: {docs} docs in {elapsed:.1f}s ({docs / max(elapsed, 1e-9):,.0f} docs/sec)")
+
+def train_streaming(path, text_column='text', label_column='label', chunk_size=10000,
+                    workers=None, n_features=2 ** 20, epochs=1, holdout=0.05, alpha=1e-6):
+    """Out-of-core training with hashed TF-IDF features and SGD"""
+    from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.pipeline import make_pipeline
+    
+    workers = workers or os.cpu_count() or 1
+    chunks = lambda: read_chunks(path, text_column, label_column, chunk_size)
+    
+    # Same analyzer as the in-memory vectorizer, but stateless: raw term counts
+    hasher = HashingVectorizer(n_features=n_features, stop_words='english', ngram_range=(1, 2),
+                               alternate_sign=False, norm=None)
+    
+    # Pass 1: online document frequencies and class counts
+    started = time.perf_counter()
+    df = np.zeros(n_features, dtype=np.int64)
+    n_docs = n_train = 0
+    label_counts = Counter()
+    for chunk_docs, chunk_train, features, counts, labels in _map_chunks(
+            _count_chunk, chunks(), workers, hasher, holdout):
+        df[features] += counts
+        n_docs += chunk_docs
+        n_train += chunk_train
+        label_counts.update(labels)
+    _report_pass('Document frequencies', n_docs, started)
+    if n_train == 0 or len(label_counts) < 2:
+        raise ValueError('Need training documents from at least two classes')
+    
+    # Smooth IDF exactly as TfidfVectorizer computes it
+    tfidf = TfidfTransformer()
+    tfidf.idf_ = np.log((1 + n_train) / (1 + df)) + 1
+    tfidf.n_features_in_ = n_features
+    vectorizer = make_pipeline(hasher, tfidf)
+    
+    # class_weight='balanced' isn't available with partial_fit, so apply it per sample
+    classes = np.array(sorted(label_counts))
+    class_weight = {c: n_train / (len(classes) * label_counts[c]) for c in classes}
+    
+    # Pass 2+: incremental training
+    model = SGDClassifier(loss='log_loss', alpha=alpha, random_state=42)
+    rng = np.random.default_rng(42)
+    for epoch in range(epochs):
+        started = time.perf_counter()
+        for chunk_docs, X, y, is_holdout in _map_chunks(
+                _featurize_chunk, chunks(), workers, vectorizer, holdout):
+            train = np.flatnonzero(~is_holdout)
+            if len(train) == 0:
+                continue
+            train = rng.permutation(train)
+            weights = np.array([class_weight[label] for label in y[train]])
+            model.partial_fit(X[train], y[train], classes=classes, sample_weight=weights)
+        _report_pass(f'Training epoch {epoch + 1}', n_docs, started)
+    
+    # Held-out evaluation
+    started = time.perf_counter()
+    y_true, y_pred = [], []
+    for chunk_docs, X, y, is_holdout in _map_chunks(
+            _featurize_chunk, chunks(), workers, vectorizer, holdout):
+        if is_holdout.any():
+            y_true.append(y[is_holdout])
+            y_pred.append(model.predict(X[is_holdout]))
+    _report_pass('Evaluation', n_docs, started)
+    
+    if y_true:
+        y_true, y_pred = np.concatenate(y_true), np.concatenate(y_pred)
+        print(f"Held-out accuracy ({len(y_true)} docs): {accuracy_score(y_true, y_pred):.4f}")
+        print(classification_report(y_true, y_pred))
+    else:
+        print("No held-out documents; increase --holdout to evaluate.")
+    
+    own, children = _peak_memory_mb()
+    if workers > 1:
+        print(f"Peak memory: {own:.0f} MB (trainer), {children:.0f} MB (largest worker)")
+    else:
+        print(f"Peak memory: {own:.0f} MB")
+    
+    # Same files NewsAnalyzer loads; the pipeline's transform() replaces the TF-IDF vectorizer
+    joblib.dump(model, 'models/fake_news_detector.pkl')
+    joblib.dump(vectorizer, 'models/vectorizer.pkl')
+    
+    # The NumPy-only export needs a vocabulary, so drop a stale one
+    if os.path.exists('models/news_linear.npz'):
+        os.remove('models/news_linear.npz')
+    save_model_metadata({
+        'model': 'sgd_log',
+        'params': model.get_params(),
+        'vectorizer': {'hashing': True, 'n_features': n_features, 'ngram_range': [1, 2]},
+        'accuracy': float(accuracy_score(y_true, y_pred)) if len(y_true) else None,
+        'n_docs': n_docs
+    })
+    
     print("\nModel saved successfully!")
     
     return model, vectorizer
 
 if __name__ == '__main__':
-    train_fake_news_model()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Train the fake news model')
+    parser.add_argument('--stream', metavar='PATH', help='train out-of-core from a CSV or JSONL corpus')
+    parser.add_argument('--text-column', default='text')
+    parser.add_argument('--label-column', default='label')
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--workers', type=int, help='featurization processes (default: all cores)')
+    parser.add_argument('--n-features', type=int, default=2 ** 20)
+    parser.add_argument('--epochs', type=int, default=1)
+    parser.add_argument('--holdout', type=float, default=0.05)
+    parser.add_argument('--alpha', type=float, default=1e-6)
+    args = parser.parse_args()
+    
+    if args.stream:
+        train_streaming(args.stream, args.text_column, args.label_column, args.chunk_size,
+                        args.workers, args.n_features, args.epochs, args.holdout, args.alpha)
+    else:
+        train_fake_news_model()
\ No newline at end of file
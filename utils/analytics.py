@@ -0,0 +1,249 @@
+"""
+Detection analytics for the dashboard
+Endpoints call record(), which only appends a tuple to an in-memory
+buffer. A background thread drains the buffer about once a second into
+SQLite (WAL mode): raw events go to an append-only table and per-minute,
+per-hour and per-day rollups are updated in the same transaction, so the
+dashboard reads a handful of precomputed rows instead of scanning events.
+"""
+
+import os
+import time
+import atexit
+import sqlite3
+import threading
+from collections import deque
+
+from config import Config
+
+# Rollup granularities: name -> (bucket seconds, rows kept for this many seconds)
+GRANULARITIES = {
+    'minute': (60, 2 * 86400),
+    'hour': (3600, 90 * 86400),
+    'day': (86400, None),
+}
+
+# Dashboard periods: name -> (rollup granularity, seconds covered)
+PERIODS = {
+    'hour': ('minute', 3600),
+    'today': ('hour', 86400),
+    'week': ('day', 7 * 86400),
+    'month': ('day', 30 * 86400),
+    'year': ('day', 365 * 86400),
+}
+
+_PRUNE_EVERY = 600  # seconds between retention clean-ups
+
+
+def verdict_of(result):
+    """Normalize a detector result to fake / real / none / error"""
+    if not isinstance(result, dict) or 'error' in result:
+        return 'error'
+    prediction = result.get('prediction')
+    if prediction in ('Fake', 'Real'):
+        return prediction.lower()
+    return 'error' if prediction == 'Error' else 'none'
+
+
+class AnalyticsStore:
+    """Buffered, non-blocking event writer with rolling aggregates"""
+
+    def __init__(self, db_path, flush_interval=1.0, max_buffer=100000):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        # Appends never block; if the writer falls behind the oldest events are dropped
+        self._buffer = deque(maxlen=max_buffer)
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_prune = 0.0
+        self.dropped = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        db = self._connect()
+        db.executescript('''
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts REAL NOT NULL, kind TEXT NOT NULL, verdict TEXT NOT NULL,
+                score REAL, latency_ms REAL, model_version TEXT);
+            CREATE INDEX IF NOT EXISTS events_ts ON events (ts);
+            CREATE TABLE IF NOT EXISTS rollups (
+                granularity TEXT NOT NULL, bucket INTEGER NOT NULL,
+                kind TEXT NOT NULL, verdict TEXT NOT NULL,
+                count INTEGER NOT NULL, score_sum REAL NOT NULL, scored INTEGER NOT NULL,
+                latency_sum REAL NOT NULL, latency_max REAL NOT NULL,
+                PRIMARY KEY (granularity, bucket, kind, verdict));
+        ''')
+        db.close()
+        atexit.register(self.flush)
+
+    def _connect(self):
+        db = sqlite3.connect(self.db_path, timeout=30)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        return db
+
+    def _ensure_writer(self):
+        """Start the writer thread (again in a forked worker: threads don't survive fork)"""
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid != os.getpid():
+                self._buffer.clear()
+                threading.Thread(target=self._run, daemon=True).start()
+                self._pid = os.getpid()
+
+    def record(self, kind, verdict, score=None, latency_ms=None, model_version=None):
+        """Queue one detection event; never touches the database"""
+        self._ensure_writer()
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append((time.time(), kind, verdict, score, latency_ms, model_version))
+
+    def _run(self):
+        db = self._connect()
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self._flush(db)
+            except sqlite3.Error:
+                # Keep serving; events stay buffered until the next attempt
+                pass
+
+    def flush(self):
+        """Write everything buffered so far (also called at exit)"""
+        if self._buffer:
+            db = self._connect()
+            try:
+                self._flush(db)
+            finally:
+                db.close()
+
+    def _flush(self, db):
+        with self._flush_lock:
+            events = []
+            while self._buffer:
+                events.append(self._buffer.popleft())
+            if not events:
+                return
+
+            # Aggregate in memory first: one upsert per (bucket, kind, verdict)
+            rollups = {}
+            for ts, kind, verdict, score, latency_ms, _ in events:
+                latency = latency_ms or 0.0
+                for granularity, (seconds, _) in GRANULARITIES.items():
+                    key = (granularity, int(ts // seconds * seconds), kind, verdict)
+                    row = rollups.get(key)
+                    if row is None:
+                        row = rollups[key] = [0, 0.0, 0, 0.0, 0.0]
+                    row[0] += 1
+                    if score is not None:
+                        row[1] += score
+                        row[2] += 1
+                    row[3] += latency
+                    row[4] = max(row[4], latency)
+
+            try:
+                with db:
+                    db.executemany(
+                        'INSERT INTO events (ts, kind, verdict, score, latency_ms, model_version) '
+                        'VALUES (?, ?, ?, ?, ?, ?)', events
+                    )
+                    db.executemany(
+                        'INSERT INTO rollups VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                        'ON CONFLICT (granularity, bucket, kind, verdict) DO UPDATE SET '
+                        'count = count + excluded.count, score_sum = score_sum + excluded.score_sum, '
+                        'scored = scored + excluded.scored, latency_sum = latency_sum + excluded.latency_sum, '
+                        'latency_max = MAX(latency_max, excluded.latency_max)',
+                        [key + tuple(row) for key, row in rollups.items()]
+                    )
+            except sqlite3.Error:
+                # Put the events back (they are older, so in front) and retry later
+                self._buffer.extendleft(reversed(events))
+                raise
+
+            if time.time() - self._last_prune > _PRUNE_EVERY:
+                self._prune(db)
+
+    def _prune(self, db):
+        """Drop raw events and fine-grained rollups past their retention"""
+        now = time.time()
+        self._last_prune = now
+        with db:
+            db.execute('DELETE FROM events WHERE ts < ?',
+                       (now - Config.ANALYTICS_EVENT_RETENTION_DAYS * 86400,))
+            for granularity, (_, keep) in GRANULARITIES.items():
+                if keep is not None:
+                    db.execute('DELETE FROM rollups WHERE granularity = ? AND bucket < ?',
+                               (granularity, now - keep))
+
+    def summary(self, period='today'):
+        """Dashboard numbers for a period, read from the rollups"""
+        granularity, span = PERIODS.get(period, PERIODS['today'])
+        seconds = GRANULARITIES[granularity][0]
+        now = time.time()
+        since = int((now - span) // seconds * seconds)
+
+        db = self._connect()
+        try:
+            rows = db.execute(
+                'SELECT bucket, kind, verdict, count, score_sum, scored, latency_sum, latency_max '
+                'FROM rollups WHERE granularity = ? AND bucket >= ?', (granularity, since)
+            ).fetchall()
+            recent = db.execute(
+                'SELECT ts, kind, verdict, score FROM events ORDER BY id DESC LIMIT 5'
+            ).fetchall()
+        finally:
+            db.close()
+
+        total = fake = 0
+        latency_sum = 0.0
+        by_kind = {}
+        timeline = {}
+        for bucket, kind, verdict, count, _, _, bucket_latency, _ in rows:
+            total += count
+            latency_sum += bucket_latency
+            by_kind[kind] = by_kind.get(kind, 0) + count
+            point = timeline.setdefault(bucket, {'fake': 0, 'real': 0})
+            if verdict in point:
+                point[verdict] += count
+            if verdict == 'fake':
+                fake += count
+
+        buckets = range(since, int(now) + 1, seconds)
+        return {
+            'period': period,
+            'granularity': granularity,
+            'total_checks': total,
+            'fake_detected': fake,
+            'avg_latency_ms': latency_sum / total if total else None,
+            'by_kind': by_kind,
+            'timeline': {
+                'buckets': list(buckets),
+                'fake': [timeline.get(b, {}).get('fake', 0) for b in buckets],
+                'real': [timeline.get(b, {}).get('real', 0) for b in buckets],
+            },
+            'recent_activity': [
+                {'ts': ts, 'kind': kind, 'verdict': verdict, 'score': score}
+                for ts, kind, verdict, score in recent
+            ],
+        }
+
+
+_shared_store = None
+_shared_lock = threading.Lock()
+
+
+def get_analytics():
+    """Process-wide analytics store configured from Config (None when disabled)"""
+    global _shared_store
+    if not Config.ANALYTICS_ENABLED:
+        return None
+    with _shared_lock:
+        if _shared_store is None:
+            _shared_store = AnalyticsStore(
+                Config.ANALYTICS_DB_PATH,
+                flush_interval=Config.ANALYTICS_FLUSH_INTERVAL,
+                max_buffer=Config.ANALYTICS_MAX_BUFFER
+            )
+        return _shared_store
@@ -1,14 +1,22 @@
 import cv2
 import numpy as np
 from PIL import Image
-import tensorflow as tf
-from keras.models import load_model
-from keras.preprocessing import image
-
-
-import requests
 from io import BytesIO
 import os
+import time
+import shutil
+import tempfile
+import itertools
+from contextlib import contextmanager
+
+from config import Config
+from utils.result_cache import get_result_cache, hash_bytes, hash_file, file_version
+from utils.frame_sampler import FrameSampler
+from utils.face_detection import create_face_detector, FaceTracker
+from utils.face_scoring import HeuristicFaceScorer
+from utils.inference_backends import load_backend
+from utils.perceptual_hash import create_media_index, image_hash
+from utils.metrics import stage, timed_iter
 
 class DeepfakeDetector:
     def __init__(self):
@@ -16,20 +24,31 @@ class DeepfakeDetector:
         self.model = None
         self.load_model()
         
-        # Haar cascade for face detection
-        self.face_cascade = cv2.CascadeClassifier(
-            cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-        )
+        # Face detection backend (Haar cascade or OpenCV DNN)
+        self.face_detector = create_face_detector()
+        
+        self.frame_sampler = FrameSampler()
+        self.heuristic_scorer = HeuristicFaceScorer()
+        
+        # Re-encoded/resized copies of known media reuse their result
+        self.media_index = create_media_index()
+        
+        # Cached results are only reused for the same model
+        self.cache = get_result_cache()
+        self.model_version = '-'.join([
+            self.model.name if self.model else 'heuristic',
+            type(self.face_detector).__name__,
+            str(Config.FACE_DETECT_MAX_DIMENSION),
+            file_version(self.model.path if self.model else Config.DEEPFAKE_MODEL_PATH)
+        ])
     
     def load_model(self):
-        """Load deepfake detection model"""
-        try:
-            # Try to load pre-trained model
-            self.model = load_model('models/deepfake_detector.h5')
-            self.img_size = (128, 128)  # Model input size
-        except:
+        """Load deepfake detection model (Keras, TFLite or ONNX backend)"""
+        self.img_size = (128, 128)  # Model input size
+        # TensorFlow / ONNX Runtime are imported only when a model file exists
+        self.model = load_backend()
+        if self.model is None:
             print("Warning: Deepfake model not found. Using basic detection.")
-            self.model = None
     
     def preprocess_image(self, img_array):
         """Preprocess image for model input"""
@@ -41,88 +60,127 @@ class DeepfakeDetector:
     
     def detect_faces(self, img_array):
         """Detect faces in image"""
-        gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
-        faces = self.face_cascade.detectMultiScale(
-            gray,
-            scaleFactor=1.1,
-            minNeighbors=5,
-            minSize=(30, 30)
-        )
-        return faces
+        with stage('face_detection'):
+            return self.face_detector.detect(img_array)
     
     def analyze_face(self, face_img):
         """Analyze face for deepfake indicators"""
+        return self.score_faces([face_img])[0]
+    
+    def score_faces(self, face_imgs):
+        """Score a list of face crops, batching them through the model"""
+        if not face_imgs:
+            return []
+        with stage('face_scoring'):
+            return self._score_faces(face_imgs)
+    
+    def _score_faces(self, face_imgs):
         if self.model:
-            # Use ML model
-            processed = self.preprocess_image(face_img)
-            prediction = self.model.predict(processed)[0][0]
-            return float(prediction)
-        else:
-            # Basic analysis: check for inconsistencies
-            # This is a simplified version - real models would be more complex
-            gray = cv2.cvtColor(face_img, cv2.COLOR_RGB2GRAY)
-            
-            # Check for unnatural edges
-            edges = cv2.Canny(gray, 100, 200)
-            edge_density = np.sum(edges) / (face_img.shape[0] * face_img.shape[1])
-            
-            # Check color consistency
-            color_std = np.std(face_img, axis=(0, 1))
-            color_inconsistency = np.mean(color_std)
-            
-            # Combine factors (simplified scoring)
-            score = min(edge_density * 10 + color_inconsistency / 10, 1.0)
-            return score
+            # Use ML model on stacked (N, H, W, 3) chunks
+            scores = []
+            chunk_size = max(1, Config.DEEPFAKE_BATCH_SIZE)
+            for start in range(0, len(face_imgs), chunk_size):
+                batch = self._preprocess_batch(face_imgs[start:start + chunk_size])
+                scores.extend(float(score) for score in self._predict_batch(batch)[:, 0])
+            return scores
+        
+        return self.heuristic_scorer.score_crops(face_imgs).tolist()
+    
+    def score_face_boxes(self, img_array, faces):
+        """
+        Score every detected (x, y, w, h) face of one image
+        Each box is cropped and scored on its own: by the heuristic scorer
+        (edge density + colour spread) without a model, else by score_faces
+        """
+        if not self.model:
+            with stage('face_scoring'):
+                return self.heuristic_scorer.score_boxes(img_array, faces).tolist()
+        return self.score_faces([img_array[y:y+h, x:x+w] for (x, y, w, h) in faces])
+    
+    def _preprocess_batch(self, face_imgs):
+        """Resize and stack face crops into one float32 model input tensor"""
+        batch = np.empty((len(face_imgs),) + self.img_size[::-1] + (3,), dtype=np.float32)
+        for i, face_img in enumerate(face_imgs):
+            batch[i] = self.preprocess_image(face_img)[0]
+        return batch
+    
+    def _predict_batch(self, batch):
+        """Run the model backend on one preprocessed batch"""
+        return self.model.predict(batch)
+    
+    def load_image(self, source):
+        """
+        Decode an image into an RGB array
+        Accepts a file path, raw bytes (bytes/bytearray/memoryview), a
+        file-like object or an already decoded RGB NumPy array
+        """
+        if isinstance(source, np.ndarray):
+            return source
+        with stage('image_decode'):
+            if isinstance(source, (str, os.PathLike)):
+                return self._decode_bytes(np.fromfile(source, dtype=np.uint8))
+            if hasattr(source, 'read'):
+                source = source.read()
+            return self._decode_bytes(source)
+    
+    def _decode_bytes(self, data):
+        """Decode encoded image bytes once, converting to RGB in place"""
+        buffer = np.frombuffer(memoryview(data), dtype=np.uint8)
+        # Ignore EXIF orientation, like PIL's Image.open
+        img = cv2.imdecode(buffer, cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION)
+        if img is None:
+            # Formats OpenCV can't decode (e.g. GIF)
+            return np.array(Image.open(BytesIO(bytes(buffer))).convert('RGB'))
+        return cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=img)
+    
+    def _content_hash(self, source):
+        """Hash of a path's file content, raw bytes or a decoded array"""
+        if isinstance(source, (str, os.PathLike)):
+            return hash_file(source)
+        if isinstance(source, np.ndarray):
+            array = np.ascontiguousarray(source)
+            return hash_bytes(memoryview(array).cast('B')) + 'x'.join(map(str, array.shape))
+        return hash_bytes(source)
     
-    def detect_image(self, image_path):
-        """Detect deepfake in image"""
+    def _cached(self, kind, source, compute, *settings):
+        """Return a cached result for the content, computing it on a miss"""
+        if self.cache is None:
+            return compute()
         try:
-            # Load image
-            img = Image.open(image_path)
-            img_array = np.array(img)
-            
-            # Detect faces
-            faces = self.detect_faces(img_array)
-            
-            if len(faces) == 0:
-                return {
-                    'faces_detected': 0,
-                    'prediction': 'No faces detected',
-                    'confidence': 0,
-                    'details': []
-                }
-            
-            # Analyze each face
-            results = []
-            fake_scores = []
-            
-            for i, (x, y, w, h) in enumerate(faces):
-                # Extract face
-                face_img = img_array[y:y+h, x:x+w]
-                
-                # Analyze
-                fake_score = self.analyze_face(face_img)
-                fake_scores.append(fake_score)
-                
-                results.append({
-                    'face_id': i + 1,
-                    'position': {'x': int(x), 'y': int(y), 'w': int(w), 'h': int(h)},
-                    'fake_score': float(fake_score),
-                    'is_fake': fake_score > 0.6
-                })
+            content_hash = self._content_hash(source)
+        except (OSError, TypeError, ValueError):
+            return compute()
+        
+        key = self.cache.make_key(kind, content_hash, self.model_version, *settings)
+        result = self.cache.get(key)
+        if result is None:
+            result = compute()
+            self.cache.put(key, result)
+        return result
+    
+    def detect_image(self, image):
+        """Detect deepfake in an image (path, bytes, file-like object or RGB array)"""
+        if hasattr(image, 'read'):
+            image = image.read()
+        return self._cached('image', image, lambda: self._detect_image(image))
+    
+    def _detect_image(self, image):
+        """Detect deepfake in image without the result cache"""
+        try:
+            # Decode image (no temporary files)
+            img_array = self.load_image(image)
             
-            # Overall prediction
-            avg_score = np.mean(fake_scores) if fake_scores else 0
-            is_fake = avg_score > 0.6
+            if self.media_index is None:
+                return self._analyze_image_array(img_array)
             
-            return {
-                'faces_detected': len(faces),
-                'prediction': 'Fake' if is_fake else 'Real',
-                'confidence': float(abs(avg_score - 0.5) * 2),
-                'fake_probability': float(avg_score),
-                'real_probability': float(1 - avg_score),
-                'details': results
-            }
+            # Known media (with the same faces) is answered before any face detection
+            with stage('perceptual_hash'):
+                key = image_hash(img_array)
+                result = self.media_index.lookup_image(key, image=img_array)
+            if result is None:
+                result = self._analyze_image_array(img_array)
+                self.media_index.add_image(key, result, image=img_array)
+            return result
             
         except Exception as e:
             return {
@@ -130,72 +188,176 @@ class DeepfakeDetector:
                 'prediction': 'Error'
             }
     
-    def detect_video(self, video_path, sample_frames=10):
-        """Detect deepfake in video"""
+    def _analyze_image_array(self, img_array):
+        """Face detection and scoring for a decoded image"""
+        # Detect faces
+        faces = self.detect_faces(img_array)
+        
+        if len(faces) == 0:
+            return {
+                'faces_detected': 0,
+                'prediction': 'No faces detected',
+                'confidence': 0,
+                'details': []
+            }
+        
+        # Score every face in one batch
+        fake_scores = self.score_face_boxes(img_array, faces)
+        
+        results = []
+        for i, ((x, y, w, h), fake_score) in enumerate(zip(faces, fake_scores)):
+            results.append({
+                'face_id': i + 1,
+                'position': {'x': int(x), 'y': int(y), 'w': int(w), 'h': int(h)},
+                'fake_score': float(fake_score),
+                'is_fake': fake_score > 0.6
+            })
+        
+        # Overall prediction
+        avg_score = np.mean(fake_scores) if fake_scores else 0
+        is_fake = avg_score > 0.6
+        
+        return {
+            'faces_detected': len(faces),
+            'prediction': 'Fake' if is_fake else 'Real',
+            'confidence': float(abs(avg_score - 0.5) * 2),
+            'fake_probability': float(avg_score),
+            'real_probability': float(1 - avg_score),
+            'details': results
+        }
+    
+    def detect_video(self, video, sample_frames=10, sample_interval=None, adaptive=False,
+                     max_frames=None, time_budget=None):
+        """
+        Detect deepfake in video (path, bytes or file-like object)
+        With adaptive=True frames are scored progressively until the
+        verdict is confident or the frame/time budget runs out
+        """
+        with self.video_file(video) as video_path:
+            if adaptive:
+                compute = lambda: self._detect_video_adaptive(video_path, max_frames, time_budget)
+                settings = ('adaptive', max_frames, time_budget)
+            else:
+                compute = lambda: self._detect_video(video_path, sample_frames, sample_interval)
+                settings = (sample_frames, sample_interval)
+            return self._cached('video', video_path, compute,
+                                *settings, self.frame_sampler.max_dimension)
+    
+    def _known_video(self, samples, settings):
+        """
+        (keyframe hashes, result of a matching indexed video or None, samples)
+        The first sampled frames are decoded and hashed before any face
+        detection; the returned samples start with them again, so on a
+        miss the analysis goes on without decoding anything twice
+        """
+        if self.media_index is None:
+            return [], None, samples
+        buffered = list(itertools.islice(samples, self.media_index.video_frames))
+        with stage('perceptual_hash'):
+            hashes = [key for key in (image_hash(frame) for _, _, frame in buffered) if key is not None]
+            known = self.media_index.lookup_video(hashes, settings)
+        return hashes, known, itertools.chain(buffered, samples)
+    
+    def _first_face(self, frame, tracker=None, frame_index=None):
+        """Convert a BGR frame and return (faces detected, first face crop or None)"""
+        # Convert BGR to RGB
+        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        
+        # Detect faces in frame, following them from nearby frames when tracking
+        if tracker is not None:
+            with stage('face_detection'):
+                faces = tracker.detect(frame_rgb, frame_index)
+        else:
+            faces = self.detect_faces(frame_rgb)
+        if len(faces) == 0:
+            return 0, None
+        
+        # Analyze first face found
+        x, y, w, h = faces[0]
+        return len(faces), frame_rgb[y:y+h, x:x+w].copy()
+    
+    def _video_summary(self, frame_results, fake_scores, frame_count):
+        """Overall video verdict from per-frame scores"""
+        if not fake_scores:
+            return {
+                'frames_analyzed': len(frame_results),
+                'prediction': 'No faces detected in sampled frames',
+                'confidence': 0
+            }
+        
+        # Overall prediction
+        avg_score = np.mean(fake_scores)
+        is_fake = avg_score > Config.DEEPFAKE_THRESHOLD
+        
+        return {
+            'frames_analyzed': len(frame_results),
+            'total_frames': frame_count if frame_count > 0 else None,
+            'prediction': 'Fake' if is_fake else 'Real',
+            'confidence': float(abs(avg_score - 0.5) * 2),
+            'fake_probability': float(avg_score),
+            'real_probability': float(1 - avg_score),
+            'frame_details': frame_results
+        }
+    
+    def _detect_video(self, video_path, sample_frames=10, sample_interval=None):
+        """
+        Detect deepfake in video without the result cache
+        Samples `sample_frames` evenly spaced frames, or one frame every
+        `sample_interval` seconds when given
+        """
         try:
             cap = cv2.VideoCapture(video_path)
-            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            
-            if frame_count == 0:
+            if not cap.isOpened():
                 return {
                     'error': 'Invalid video file',
                     'prediction': 'Error'
                 }
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
             
-            # Sample frames
-            sample_indices = np.linspace(0, frame_count-1, 
-                                        min(sample_frames, frame_count), 
-                                        dtype=int)
+            samples = timed_iter('video_seek', self.frame_sampler.sample(
+                cap, count=sample_frames, interval=sample_interval,
+                max_frames=Config.VIDEO_MAX_SAMPLED_FRAMES
+            ))
+            settings = (sample_frames, sample_interval)
+            hashes, known, samples = self._known_video(samples, settings)
+            if known is not None:
+                cap.release()
+                return known
             
+            # Collect the first face of each sampled frame, then score them together
             frame_results = []
-            fake_scores = []
+            face_imgs = []
+            frames_read = 0
             
-            for idx in sample_indices:
-                cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
-                ret, frame = cap.read()
+            tracker = FaceTracker(self.face_detector)
+            for idx, timestamp, frame in samples:
+                frames_read += 1
+                faces_detected, face_img = self._first_face(frame, tracker, idx)
                 
-                if ret:
-                    # Convert BGR to RGB
-                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    
-                    # Detect faces in frame
-                    faces = self.detect_faces(frame_rgb)
-                    
-                    if len(faces) > 0:
-                        # Analyze first face found
-                        x, y, w, h = faces[0]
-                        face_img = frame_rgb[y:y+h, x:x+w]
-                        fake_score = self.analyze_face(face_img)
-                        fake_scores.append(fake_score)
-                        
-                        frame_results.append({
-                            'frame': int(idx),
-                            'faces_detected': len(faces),
-                            'fake_score': float(fake_score)
-                        })
+                if face_img is not None:
+                    face_imgs.append(face_img)
+                    frame_results.append({
+                        'frame': int(idx),
+                        'timestamp': round(timestamp / 1000.0, 3),
+                        'faces_detected': faces_detected
+                    })
             
             cap.release()
             
-            if not fake_scores:
+            if frames_read == 0:
                 return {
-                    'frames_analyzed': len(frame_results),
-                    'prediction': 'No faces detected in sampled frames',
-                    'confidence': 0
+                    'error': 'Invalid video file',
+                    'prediction': 'Error'
                 }
             
-            # Overall prediction
-            avg_score = np.mean(fake_scores)
-            is_fake = avg_score > 0.6
+            fake_scores = self.score_faces(face_imgs)
+            for frame_result, fake_score in zip(frame_results, fake_scores):
+                frame_result['fake_score'] = float(fake_score)
             
-            return {
-                'frames_analyzed': len(frame_results),
-                'total_frames': frame_count,
-                'prediction': 'Fake' if is_fake else 'Real',
-                'confidence': float(abs(avg_score - 0.5) * 2),
-                'fake_probability': float(avg_score),
-                'real_probability': float(1 - avg_score),
-                'frame_details': frame_results
-            }
+            result = self._video_summary(frame_results, fake_scores, frame_count)
+            if self.media_index is not None:
+                self.media_index.add_video(hashes, result, settings)
+            return result
             
         except Exception as e:
             return {
@@ -203,27 +365,187 @@ class DeepfakeDetector:
                 'prediction': 'Error'
             }
     
+    def _detect_video_adaptive(self, video_path, max_frames=None, time_budget=None):
+        """Run iter_video to completion and return its final result"""
+        result = None
+        for event in self.iter_video(video_path, max_frames, time_budget):
+            if event['type'] == 'result':
+                result = event['result']
+        return result
+    
+    def iter_video(self, video_path, max_frames=None, time_budget=None):
+        """
+        Score video frames progressively, yielding one event per frame
+        Frames are visited coarse-to-fine and a running confidence interval
+        is kept on the mean fake score. Stops once the interval is entirely
+        above or below DEEPFAKE_THRESHOLD, or the frame/time budget runs
+        out. Events are one 'start', the 'frame' events (replayed from the
+        stored result on a perceptual-hash hit, frames with faces only),
+        then {'type': 'result', 'result': {...}}; errors send just the result.
+        """
+        max_frames = max_frames or Config.VIDEO_ADAPTIVE_MAX_FRAMES
+        time_budget = time_budget or Config.VIDEO_ADAPTIVE_TIME_BUDGET
+        threshold = Config.DEEPFAKE_THRESHOLD
+        started = time.perf_counter()
+        
+        try:
+            cap = cv2.VideoCapture(video_path)
+        except Exception as e:
+            yield {'type': 'result', 'result': {'error': f'Video analysis failed: {str(e)}', 'prediction': 'Error'}}
+            return
+        if not cap.isOpened():
+            yield {'type': 'result', 'result': {'error': 'Invalid video file', 'prediction': 'Error'}}
+            return
+        
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        samples = timed_iter('video_seek', self.frame_sampler.sample_progressive(cap, max_frames))
+        try:
+            settings = ('adaptive', max_frames, time_budget)
+            hashes, known, samples = self._known_video(samples, settings)
+        except Exception as e:
+            cap.release()
+            yield {'type': 'result', 'result': {'error': f'Video analysis failed: {str(e)}', 'prediction': 'Error'}}
+            return
+        if known is not None:
+            cap.release()
+            # Same event sequence as a live run, with the stored frames
+            yield {'type': 'start', 'total_frames': known.get('total_frames'),
+                   'max_frames': max_frames, 'reused': True}
+            yield from self._replayed_frames(known)
+            yield {'type': 'result', 'result': known}
+            return
+        
+        yield {'type': 'start', 'total_frames': frame_count if frame_count > 0 else None,
+               'max_frames': max_frames, 'reused': False}
+        frame_results = []
+        fake_scores = []
+        frames_read = 0
+        mean, m2 = 0.0, 0.0
+        low, high = 0.0, 1.0
+        stopped_reason = 'frame_budget'
+        
+        tracker = FaceTracker(self.face_detector)
+        try:
+            for idx, timestamp, frame in samples:
+                frames_read += 1
+                faces_detected, face_img = self._first_face(frame, tracker, idx)
+                event = {
+                    'type': 'frame',
+                    'frame': int(idx),
+                    'timestamp': round(timestamp / 1000.0, 3),
+                    'faces_detected': faces_detected
+                }
+                
+                if face_img is not None:
+                    fake_score = float(self.score_faces([face_img])[0])
+                    fake_scores.append(fake_score)
+                    frame_results.append({
+                        'frame': int(idx),
+                        'timestamp': event['timestamp'],
+                        'faces_detected': faces_detected,
+                        'fake_score': fake_score
+                    })
+                    
+                    # Welford update of the running mean/variance
+                    n = len(fake_scores)
+                    delta = fake_score - mean
+                    mean += delta / n
+                    m2 += delta * (fake_score - mean)
+                    low, high = self._confidence_interval(n, mean, m2)
+                    
+                    event['fake_score'] = fake_score
+                    event['running_fake_probability'] = mean
+                    event['confidence_interval'] = [low, high]
+                
+                yield event
+                
+                if (len(fake_scores) >= Config.VIDEO_ADAPTIVE_MIN_FRAMES
+                        and (low > threshold or high < threshold)):
+                    stopped_reason = 'confident'
+                    break
+                if time.perf_counter() - started >= time_budget:
+                    stopped_reason = 'time_budget'
+                    break
+        except Exception as e:
+            yield {'type': 'result', 'result': {'error': f'Video analysis failed: {str(e)}', 'prediction': 'Error'}}
+            return
+        finally:
+            cap.release()
+        
+        if frames_read == 0:
+            yield {'type': 'result', 'result': {'error': 'Invalid video file', 'prediction': 'Error'}}
+            return
+        
+        result = self._video_summary(frame_results, fake_scores, frame_count)
+        result.update({
+            'adaptive': True,
+            'stopped_reason': stopped_reason,
+            'confidence_interval': [low, high],
+            'elapsed_seconds': round(time.perf_counter() - started, 3)
+        })
+        if self.media_index is not None:
+            self.media_index.add_video(hashes, result, settings)
+        yield {'type': 'result', 'result': result}
+    
+    def _replayed_frames(self, result):
+        """Frame events rebuilt from a reused result, shaped like the live ones"""
+        mean, m2 = 0.0, 0.0
+        for n, frame in enumerate(result.get('frame_details', []), start=1):
+            fake_score = frame['fake_score']
+            delta = fake_score - mean
+            mean += delta / n
+            m2 += delta * (fake_score - mean)
+            yield {
+                'type': 'frame',
+                'frame': frame['frame'],
+                'timestamp': frame['timestamp'],
+                'faces_detected': frame['faces_detected'],
+                'fake_score': fake_score,
+                'running_fake_probability': mean,
+                'confidence_interval': list(self._confidence_interval(n, mean, m2))
+            }
+    
+    def _confidence_interval(self, n, mean, m2):
+        """Normal-approximation interval on the mean fake score, clipped to [0, 1]"""
+        if n < 2:
+            return 0.0, 1.0
+        margin = Config.VIDEO_ADAPTIVE_Z * np.sqrt(m2 / (n - 1) / n)
+        return float(max(0.0, mean - margin)), float(min(1.0, mean + margin))
+    
     def detect_from_url(self, image_url):
         """Detect deepfake from image URL"""
         try:
-            response = requests.get(image_url)
-            img = Image.open(BytesIO(response.content))
-            
-            # Save temporarily
-            temp_path = 'temp_image.jpg'
-            img.save(temp_path)
-            
-            # Detect
-            result = self.detect_image(temp_path)
+            import requests
+            response = requests.get(image_url, timeout=Config.URL_FETCH_TIMEOUT)
+            response.raise_for_status()
             
-            # Clean up
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-            
-            return result
+            # Decode straight from the response body
+            return self.detect_image(response.content)
             
         except Exception as e:
             return {
                 'error': f'URL analysis failed: {str(e)}',
                 'prediction': 'Error'
-            }
\ No newline at end of file
+            }
+    
+    @contextmanager
+    def video_file(self, source):
+        """
+        Path to a video for OpenCV, which can only read from files
+        Bytes and file-like objects are streamed to a temporary file in
+        chunks and removed afterwards
+        """
+        if isinstance(source, (str, os.PathLike)):
+            yield source
+            return
+        
+        fd, path = tempfile.mkstemp(suffix='.video', dir=Config.VIDEO_TEMP_DIR or None)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                if hasattr(source, 'read'):
+                    shutil.copyfileobj(source, f, length=1024 * 1024)
+                else:
+                    f.write(memoryview(source))
+            yield path
+        finally:
+            os.remove(path)
@@ -0,0 +1,179 @@
+"""
+Pluggable face detection
+Detectors run on a downscaled copy of the image and map boxes back to
+full-resolution coordinates. Two CPU backends are available: OpenCV's
+Haar cascade and its DNN (res10 SSD) face detector. FaceTracker follows
+faces between nearby video frames so the full detector runs less often.
+"""
+
+import os
+import threading
+import cv2
+import numpy as np
+
+from config import Config
+
+_NO_FACES = np.empty((0, 4), dtype=int)
+
+
+def _downscale(img, max_dimension):
+    """Return (resized image, scale) with the longest side <= max_dimension"""
+    height, width = img.shape[:2]
+    longest = max(height, width)
+    if not max_dimension or longest <= max_dimension:
+        return img, 1.0
+    scale = max_dimension / longest
+    size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+    return cv2.resize(img, size, interpolation=cv2.INTER_AREA), scale
+
+
+def _to_full_resolution(boxes, scale, shape):
+    """Map (x, y, w, h) boxes from the downscaled image back, clipped to the image"""
+    if len(boxes) == 0:
+        return _NO_FACES
+    boxes = np.asarray(boxes, dtype=np.float64)
+    if scale != 1.0:
+        boxes = boxes / scale
+    boxes = np.round(boxes).astype(int)
+    height, width = shape[:2]
+    boxes[:, 0] = np.clip(boxes[:, 0], 0, width - 1)
+    boxes[:, 1] = np.clip(boxes[:, 1], 0, height - 1)
+    boxes[:, 2] = np.minimum(boxes[:, 2], width - boxes[:, 0])
+    boxes[:, 3] = np.minimum(boxes[:, 3], height - boxes[:, 1])
+    return boxes
+
+
+class HaarFaceDetector:
+    """Haar cascade on a downscaled grayscale image"""
+
+    def __init__(self, max_dimension=None, scale_factor=1.1, min_neighbors=5, min_size=30):
+        self.cascade = cv2.CascadeClassifier(
+            cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+        )
+        self.max_dimension = Config.FACE_DETECT_MAX_DIMENSION if max_dimension is None else max_dimension
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size
+
+    def detect(self, img_array):
+        """Detect faces in an RGB image, returning full-resolution (x, y, w, h) boxes"""
+        small, scale = _downscale(img_array, self.max_dimension)
+        gray = cv2.cvtColor(small, cv2.COLOR_RGB2GRAY)
+
+        # Faces smaller than min_size at full resolution are still ignored,
+        # but never ask the cascade for less than its 24px training size
+        min_size = max(24, int(self.min_size * scale))
+        faces = self.cascade.detectMultiScale(
+            gray,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=(min_size, min_size)
+        )
+        return _to_full_resolution(faces, scale, img_array.shape)
+
+
+class DnnFaceDetector:
+    """OpenCV DNN res10 SSD face detector (CPU)"""
+
+    INPUT_SIZE = (300, 300)
+    MEAN = (104.0, 177.0, 123.0)
+
+    def __init__(self, prototxt=None, weights=None, confidence=None):
+        self.net = cv2.dnn.readNetFromCaffe(prototxt or Config.FACE_DNN_PROTOTXT,
+                                            weights or Config.FACE_DNN_WEIGHTS)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        self.confidence = Config.FACE_DNN_CONFIDENCE if confidence is None else confidence
+        # One net holds its input between setInput() and forward(), so calls can't overlap
+        self._lock = threading.Lock()
+
+    def detect(self, img_array):
+        """Detect faces in an RGB image, returning full-resolution (x, y, w, h) boxes"""
+        height, width = img_array.shape[:2]
+        # The network always sees a 300x300 input, resized once here
+        blob = cv2.dnn.blobFromImage(cv2.resize(img_array, self.INPUT_SIZE), 1.0,
+                                     self.INPUT_SIZE, self.MEAN, swapRB=True)
+        with self._lock:
+            self.net.setInput(blob)
+            detections = self.net.forward()[0, 0]
+
+        detections = detections[detections[:, 2] >= self.confidence]
+        if len(detections) == 0:
+            return _NO_FACES
+
+        corners = detections[:, 3:7] * np.array([width, height, width, height])
+        boxes = np.column_stack([corners[:, 0], corners[:, 1],
+                                 corners[:, 2] - corners[:, 0], corners[:, 3] - corners[:, 1]])
+        boxes = boxes[(boxes[:, 2] > 0) & (boxes[:, 3] > 0)]
+        return _to_full_resolution(boxes, 1.0, img_array.shape)
+
+
+def create_face_detector(backend=None):
+    """Build the configured detector, falling back to Haar when DNN files are missing"""
+    backend = backend or Config.FACE_DETECTOR
+    if backend == 'dnn':
+        if os.path.exists(Config.FACE_DNN_PROTOTXT) and os.path.exists(Config.FACE_DNN_WEIGHTS):
+            return DnnFaceDetector()
+        print("Warning: DNN face detector files not found. Using Haar cascade.")
+    return HaarFaceDetector()
+
+
+class FaceTracker:
+    """
+    Follow faces across nearby video frames with template matching
+    The full detector runs on the first frame, every REDETECT_INTERVAL
+    frames, after large frame gaps, and whenever a face is lost.
+    """
+
+    def __init__(self, detector, redetect_interval=None, max_gap=None, min_score=None):
+        self.detector = detector
+        self.redetect_interval = redetect_interval or Config.FACE_TRACK_REDETECT_INTERVAL
+        self.max_gap = max_gap or Config.FACE_TRACK_MAX_GAP
+        self.min_score = Config.FACE_TRACK_MIN_SCORE if min_score is None else min_score
+        self._boxes = _NO_FACES
+        self._templates = []
+        self._last_index = None
+        self._detected_index = None
+
+    def detect(self, img_array, frame_index):
+        """Faces in this frame, tracked from the previous one when possible"""
+        gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
+
+        needs_detection = (
+            self._last_index is None
+            or len(self._boxes) == 0
+            or abs(frame_index - self._last_index) > self.max_gap
+            or abs(frame_index - self._detected_index) >= self.redetect_interval
+        )
+        boxes = None if needs_detection else self._track(gray)
+        if boxes is None:
+            boxes = self.detector.detect(img_array)
+            self._detected_index = frame_index
+
+        self._boxes = boxes
+        self._templates = [gray[y:y+h, x:x+w].copy() for (x, y, w, h) in boxes]
+        self._last_index = frame_index
+        return boxes
+
+    def _track(self, gray):
+        """Locate every previous face near its old position, or None if any is lost"""
+        height, width = gray.shape
+        tracked = []
+        for (x, y, w, h), template in zip(self._boxes, self._templates):
+            if template.shape[0] != h or template.shape[1] != w:
+                return None
+
+            # Search window: the old box grown by half its size on each side
+            x0, y0 = max(0, x - w // 2), max(0, y - h // 2)
+            x1, y1 = min(width, x + w + w // 2), min(height, y + h + h // 2)
+            window = gray[y0:y1, x0:x1]
+            if window.shape[0] < h or window.shape[1] < w:
+                return None
+
+            scores = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+            _, best, _, (dx, dy) = cv2.minMaxLoc(scores)
+            if best < self.min_score:
+                return None
+            tracked.append((x0 + dx, y0 + dy, w, h))
+
+        return np.array(tracked, dtype=int).reshape(-1, 4)
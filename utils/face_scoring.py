@@ -0,0 +1,72 @@
+"""
+Heuristic deepfake scoring used when no trained model is available
+Scores are the same as the original per-face formula
+    min(edge_density * 10 + mean(color_std) / 10, 1.0)
+but all faces are handled together: colour statistics come from
+cv2.meanStdDev instead of np.std, and grayscale/edge images are written
+into reusable per-thread buffers. (An integral image over the faces'
+bounding region costs ~11x more per pixel than cv2.meanStdDev and only
+won for boxes overlapping 12 times over, which detectors don't produce.)
+"""
+
+import threading
+
+import cv2
+import numpy as np
+
+
+class HeuristicFaceScorer:
+    """Edge density + colour spread score for many faces at once"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _buffers(self, size):
+        """Grayscale and edge buffers with room for `size` pixels (per thread)"""
+        gray = getattr(self._local, 'gray', None)
+        if gray is None or gray.size < size:
+            self._local.gray = gray = np.empty(size, dtype=np.uint8)
+            self._local.edges = np.empty(size, dtype=np.uint8)
+        return gray, self._local.edges
+
+    def _edge_densities(self, crops):
+        """Canny edge density of each crop, reusing one pair of buffers"""
+        largest = max(crop.shape[0] * crop.shape[1] for crop in crops)
+        gray_buffer, edge_buffer = self._buffers(largest)
+
+        densities = np.empty(len(crops), dtype=np.float64)
+        for i, crop in enumerate(crops):
+            h, w = crop.shape[:2]
+            # Contiguous (h, w) views over the front of the flat buffers
+            gray = gray_buffer[:h * w].reshape(h, w)
+            edges = edge_buffer[:h * w].reshape(h, w)
+            cv2.cvtColor(crop, cv2.COLOR_RGB2GRAY, dst=gray)
+            cv2.Canny(gray, 100, 200, edges=edges)
+            # Canny output is 0/255, so this equals np.sum(edges)
+            densities[i] = cv2.countNonZero(edges) * 255 / (h * w)
+        return densities
+
+    def _combine(self, edge_density, color_inconsistency):
+        return np.minimum(edge_density * 10 + color_inconsistency / 10, 1.0)
+
+    def score_crops(self, crops):
+        """Score separate face crops (e.g. taken from different video frames)"""
+        if not crops:
+            return np.empty(0, dtype=np.float64)
+
+        color = np.empty(len(crops), dtype=np.float64)
+        for i, crop in enumerate(crops):
+            # Population std per channel, like np.std(crop, axis=(0, 1))
+            _, std = cv2.meanStdDev(crop)
+            color[i] = std.mean()
+
+        return self._combine(self._edge_densities(crops), color)
+
+    def score_boxes(self, img_array, boxes):
+        """Score every (x, y, w, h) face box of one RGB image"""
+        boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+        if len(boxes) == 0:
+            return np.empty(0, dtype=np.float64)
+
+        crops = [img_array[y:y+h, x:x+w] for (x, y, w, h) in boxes]
+        return self.score_crops(crops)
@@ -0,0 +1,169 @@
+"""
+Frame sampling for video analysis
+Chooses between seeking and decoding forward for each gap between sampled
+frames, so long-GOP files are not re-decoded from a keyframe for every
+sample. Supports sampling by count or by time interval, and downscales
+frames that are larger than face detection needs.
+"""
+
+import cv2
+import numpy as np
+
+from config import Config
+
+# Used to derive timestamps when the container reports no usable fps
+_FALLBACK_FPS = 30.0
+
+
+def progressive_rounds(frame_count, max_frames):
+    """Split an evenly spaced grid of frame indices into coarse-to-fine rounds"""
+    grid = np.linspace(0, frame_count - 1, max(1, min(max_frames, frame_count)), dtype=int)
+    step = 1
+    while step < len(grid):
+        step *= 2
+
+    rounds = []
+    seen = set()
+    while step >= 1:
+        positions = [i for i in range(0, len(grid), step) if i not in seen]
+        if positions:
+            seen.update(positions)
+            rounds.append(grid[positions])
+        step //= 2
+    return rounds
+
+
+class FrameSampler:
+    """Yield (frame_index, timestamp_ms, frame_bgr) samples from a VideoCapture"""
+
+    def __init__(self, seek_min_gap=None, max_dimension=None):
+        # Gaps shorter than this are decoded forward with grab() instead of seeking
+        self.seek_min_gap = Config.VIDEO_SEEK_MIN_GAP if seek_min_gap is None else seek_min_gap
+        # Longest side of returned frames (0 keeps full resolution)
+        self.max_dimension = Config.VIDEO_MAX_DIMENSION if max_dimension is None else max_dimension
+
+    def sample(self, cap, count=10, interval=None, max_frames=None):
+        """
+        Sample frames by count (evenly spaced) or by interval in seconds
+        Falls back to a sequential pass when the frame count is unknown
+        """
+        if interval and interval > 0:
+            return self._sample_interval(cap, interval, max_frames)
+
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if frame_count <= 0:
+            return self._sample_unknown_length(cap, count)
+
+        indices = np.linspace(0, frame_count - 1, min(count, frame_count), dtype=int)
+        return self._sample_indices(cap, indices)
+
+    def _resize(self, frame):
+        """Downscale a frame so its longest side fits max_dimension"""
+        if not self.max_dimension:
+            return frame
+        height, width = frame.shape[:2]
+        longest = max(height, width)
+        if longest <= self.max_dimension:
+            return frame
+        scale = self.max_dimension / longest
+        return cv2.resize(frame, (max(1, int(width * scale)), max(1, int(height * scale))),
+                          interpolation=cv2.INTER_AREA)
+
+    def _timestamp(self, cap, index):
+        """Timestamp of the last decoded frame in milliseconds"""
+        msec = cap.get(cv2.CAP_PROP_POS_MSEC)
+        if msec > 0 or index == 0:
+            return float(msec)
+        fps = cap.get(cv2.CAP_PROP_FPS) or _FALLBACK_FPS
+        return index * 1000.0 / fps
+
+    def sample_progressive(self, cap, max_frames):
+        """
+        Coarse-to-fine sampling for early-exit analysis
+        Frames from an evenly spaced grid are visited in rounds (start,
+        middle, quarters, ...) so any prefix covers the whole video.
+        """
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if frame_count <= 0:
+            return self.sample(cap, interval=Config.VIDEO_ADAPTIVE_INTERVAL, max_frames=max_frames)
+        return self._sample_rounds(cap, progressive_rounds(frame_count, max_frames))
+
+    def _sample_rounds(self, cap, rounds):
+        """Read each round of indices in order"""
+        position = 0
+        for indices in rounds:
+            # Each round moves forward through the file; rounds after the first start with a seek
+            yield from self._sample_indices(cap, indices, position)
+            position = None
+
+    def _sample_indices(self, cap, indices, position=0):
+        """Read known frame indices, seeking only across long gaps"""
+        # position: index of the frame the next read() returns, None if unknown
+        for idx in indices:
+            idx = int(idx)
+            gap = None if position is None else idx - position
+            if gap is None or gap < 0 or gap > self.seek_min_gap:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+            else:
+                # grab() decodes without the colour conversion/copy of retrieve()
+                for _ in range(gap):
+                    if not cap.grab():
+                        return
+
+            ret, frame = cap.read()
+            if not ret:
+                position = None
+                continue
+
+            position = idx + 1
+            yield idx, self._timestamp(cap, idx), self._resize(frame)
+
+    def _sample_interval(self, cap, interval, max_frames=None):
+        """Decode forward and keep one frame every `interval` seconds"""
+        step_ms = interval * 1000.0
+        next_ms = 0.0
+        index = 0
+        sampled = 0
+
+        while cap.grab():
+            timestamp = self._timestamp(cap, index)
+            if timestamp >= next_ms:
+                ret, frame = cap.retrieve()
+                if ret:
+                    yield index, timestamp, self._resize(frame)
+                    sampled += 1
+                    if max_frames and sampled >= max_frames:
+                        return
+                while next_ms <= timestamp:
+                    next_ms += step_ms
+            index += 1
+
+    def _sample_unknown_length(self, cap, count):
+        """
+        Evenly spaced samples when CAP_PROP_FRAME_COUNT is missing
+        Keeps at most 2 * count frames, halving them and doubling the
+        stride whenever the buffer fills.
+        """
+        if count <= 0:
+            return
+
+        kept = []
+        stride = 1
+        index = 0
+
+        while cap.grab():
+            if index % stride == 0:
+                ret, frame = cap.retrieve()
+                if ret:
+                    kept.append((index, self._timestamp(cap, index), self._resize(frame)))
+                if len(kept) >= 2 * count:
+                    kept = kept[::2]
+                    stride *= 2
+            index += 1
+
+        if len(kept) > count:
+            keep = np.linspace(0, len(kept) - 1, count, dtype=int)
+            kept = [kept[i] for i in keep]
+
+        for sample in kept:
+            yield sample
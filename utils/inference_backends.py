@@ -0,0 +1,133 @@
+"""
+CPU inference backends for the deepfake model
+Every backend takes a float32 (N, H, W, 3) batch scaled to [0, 1] and
+returns (N, 1) fake probabilities. Keras runs the original .h5 model;
+TFLite and ONNX Runtime run exports made by
+training/export_deepfake_model.py and are much lighter on CPU-only nodes.
+"""
+
+import os
+import threading
+
+import numpy as np
+
+from config import Config
+
+
+class KerasBackend:
+    """The original .h5 model through Keras/TensorFlow"""
+
+    name = 'keras'
+
+    def __init__(self, path):
+        from keras.models import load_model
+        self.path = path
+        self.model = load_model(path)
+
+    def predict(self, batch):
+        # Calling the model directly skips predict() overhead for small batches
+        if len(batch) <= Config.DEEPFAKE_DIRECT_CALL_MAX:
+            return np.asarray(self.model(batch, training=False))
+        return self.model.predict(batch, batch_size=len(batch), verbose=0)
+
+
+class TFLiteBackend:
+    """TFLite interpreter (float32, float16 or int8 quantized export)"""
+
+    name = 'tflite'
+
+    def __init__(self, path):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite import Interpreter
+
+        self.path = path
+        self.interpreter = Interpreter(model_path=path,
+                                       num_threads=Config.DEEPFAKE_INFERENCE_THREADS or None)
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = None
+        # One interpreter holds its tensors in place, so calls can't overlap
+        self._lock = threading.Lock()
+
+    def _resize(self, batch_size):
+        """Resize the input tensor only when the batch size changes"""
+        if batch_size != self._batch_size:
+            shape = [batch_size] + list(self._input['shape'][1:])
+            self.interpreter.resize_tensor_input(self._input['index'], shape)
+            self.interpreter.allocate_tensors()
+            self._batch_size = batch_size
+
+    def predict(self, batch):
+        dtype = self._input['dtype']
+        if dtype != np.float32:
+            # Fully integer model: quantize the input with the model's own parameters
+            scale, zero_point = self._input['quantization']
+            info = np.iinfo(dtype)
+            batch = np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(dtype)
+
+        with self._lock:
+            self._resize(len(batch))
+            self.interpreter.set_tensor(self._input['index'], batch)
+            self.interpreter.invoke()
+            output = self.interpreter.get_tensor(self._output['index'])
+
+        if self._output['dtype'] != np.float32:
+            scale, zero_point = self._output['quantization']
+            output = (output.astype(np.float32) - zero_point) * scale
+        return output.reshape(len(batch), -1)
+
+
+class OnnxBackend:
+    """ONNX Runtime on the CPU execution provider"""
+
+    name = 'onnx'
+
+    def __init__(self, path):
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        if Config.DEEPFAKE_INFERENCE_THREADS:
+            options.intra_op_num_threads = Config.DEEPFAKE_INFERENCE_THREADS
+        self.path = path
+        self.session = onnxruntime.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self._input_name = self.session.get_inputs()[0].name
+
+    def predict(self, batch):
+        output = self.session.run(None, {self._input_name: batch})[0]
+        return np.asarray(output, dtype=np.float32).reshape(len(batch), -1)
+
+
+BACKENDS = {
+    'keras': (KerasBackend, lambda: Config.DEEPFAKE_MODEL_PATH),
+    'tflite': (TFLiteBackend, lambda: Config.DEEPFAKE_TFLITE_PATH),
+    'onnx': (OnnxBackend, lambda: Config.DEEPFAKE_ONNX_PATH),
+}
+
+
+def load_backend(name=None):
+    """
+    Load the configured backend, falling back to Keras
+    Returns None when no model file can be loaded at all; a missing file is
+    detected before importing the runtime, so TensorFlow is never imported
+    for nothing.
+    """
+    name = name or Config.DEEPFAKE_BACKEND
+    if name not in BACKENDS:
+        print(f"Warning: unknown deepfake backend '{name}'. Using keras.")
+        name = 'keras'
+
+    candidates = [name] if name == 'keras' else [name, 'keras']
+    for candidate in candidates:
+        backend_class, path = BACKENDS[candidate]
+        path = path()
+        if not os.path.exists(path):
+            if candidate != 'keras':
+                print(f"Warning: {path} not found. Falling back to keras.")
+            continue
+        try:
+            return backend_class(path)
+        except Exception as e:
+            print(f"Warning: could not load the {candidate} deepfake backend ({e}).")
+    return None
@@ -0,0 +1,350 @@
+"""
+Local asynchronous job queue for slow analysis requests
+Job records live in SQLite (JOB_DB_PATH, WAL mode), so every web process
+of a pre-forked server sees the same jobs, the same pending count and
+the same results. Whichever process holds the lock file next to the
+database runs the single bounded pool of worker processes: it claims
+queued jobs in submission order, and the workers load the detectors once
+and write their progress straight to the database. If that process
+exits, another one takes the lock over (jobs it was running are marked
+failed). A worker that dies (e.g. killed for memory) fails only the jobs
+the pool was running; the next claim starts a fresh pool. No external
+broker is needed; all web processes must share one
+host, since video jobs read the upload from local disk. Finished jobs
+expire after a TTL.
+"""
+
+import os
+import json
+import time
+import uuid
+import pickle
+import sqlite3
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    import fcntl
+except ImportError:
+    # No file locks (Windows): a single web process runs the pool
+    fcntl = None
+
+from config import Config
+
+
+class QueueFullError(Exception):
+    """Raised when too many jobs are already pending"""
+
+
+def _connect(db_path):
+    db = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('PRAGMA synchronous=NORMAL')
+    return db
+
+
+def _json_default(value):
+    # NumPy scalars (e.g. bool_ flags) left in detector results
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+# ---- Worker process side ----
+
+_worker_state = {}
+
+
+def _init_worker(db_path):
+    """Runs once in every worker process"""
+    _worker_state['db_path'] = db_path
+
+
+def _report(job_id, done, total):
+    db_path = _worker_state.get('db_path')
+    if db_path is None:
+        return
+    if 'db' not in _worker_state:
+        _worker_state['db'] = _connect(db_path)
+    _worker_state['db'].execute(
+        "UPDATE jobs SET progress_done = ?, progress_total = ? WHERE id = ? AND status = 'running'",
+        (done, total, job_id)
+    )
+
+
+def _news_analyzer():
+    if 'news_analyzer' not in _worker_state:
+        from utils.news_detector import NewsAnalyzer
+        _worker_state['news_analyzer'] = NewsAnalyzer()
+    return _worker_state['news_analyzer']
+
+
+def _deepfake_detector():
+    if 'deepfake_detector' not in _worker_state:
+        from utils.deepfake_detector import DeepfakeDetector
+        _worker_state['deepfake_detector'] = DeepfakeDetector()
+    return _worker_state['deepfake_detector']
+
+
+def run_batch_job(job_id, texts, method='ml'):
+    """Analyze texts in chunks, reporting progress after each chunk"""
+    from utils.news_detector import summarize_batch
+
+    analyzer = _news_analyzer()
+    chunk_size = max(1, Config.JOB_BATCH_CHUNK_SIZE)
+    results = []
+    _report(job_id, 0, len(texts))
+    for start in range(0, len(texts), chunk_size):
+        results.extend(analyzer.analyze_batch(texts[start:start + chunk_size], method))
+        _report(job_id, len(results), len(texts))
+    return summarize_batch(results)
+
+
+def run_video_job(job_id, video_path, options, remove_after=False):
+    """Run video deepfake detection, deleting a temporary upload afterwards"""
+    try:
+        detector = _deepfake_detector()
+        _report(job_id, 0, 1)
+        result = detector.detect_video(video_path, **options)
+        _report(job_id, 1, 1)
+        return result
+    finally:
+        if remove_after and os.path.exists(video_path):
+            os.remove(video_path)
+
+
+# ---- Web process side ----
+
+_COLUMNS = 'id, kind, status, progress_done, progress_total, result, error, submitted_at, finished_at'
+
+
+class JobQueue:
+    """Bounded pool of worker processes with job records shared through SQLite"""
+
+    def __init__(self, workers=None, max_pending=None, result_ttl=None, on_finish=None, db_path=None):
+        self.workers = workers or Config.JOB_WORKERS
+        self.max_pending = max_pending or Config.JOB_MAX_PENDING
+        self.result_ttl = result_ttl or Config.JOB_RESULT_TTL
+        self.db_path = db_path or Config.JOB_DB_PATH
+        self._local = threading.local()
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._executor = None
+        self._pool_lock = threading.Lock()
+        self._lock_file = None
+        self._lock_pid = None
+        # Called with each finished job record, in the process that ran it
+        self._on_finish = on_finish
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        db = _connect(self.db_path)
+        db.executescript('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL,
+                task BLOB, progress_done INTEGER, progress_total INTEGER,
+                result TEXT, error TEXT, submitted_at REAL NOT NULL, finished_at REAL);
+            CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, submitted_at);
+        ''')
+        db.close()
+
+    def _db(self):
+        """Connection for the calling thread"""
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            db = self._local.db = _connect(self.db_path)
+            self._local.pid = os.getpid()
+        return db
+
+    def _ensure_dispatcher(self):
+        """Start the dispatcher thread (again in a forked worker: threads don't survive fork)"""
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid != os.getpid():
+                self._executor = None
+                threading.Thread(target=self._dispatch, daemon=True).start()
+                self._pid = os.getpid()
+
+    def _acquire_lock(self):
+        """Open the lock file and try to become the process that runs jobs"""
+        if fcntl is None:
+            return True
+        if self._lock_file is None or self._lock_pid != os.getpid():
+            self._lock_file = open(self.db_path + '.lock', 'a')
+            self._lock_pid = os.getpid()
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def _dispatch(self):
+        """Wait for the lock, then hand queued jobs to the worker pool"""
+        db = _connect(self.db_path)
+        while not self._acquire_lock():
+            self._wake.wait(1.0)
+            self._wake.clear()
+
+        # Jobs left running by a previous lock holder will never finish
+        db.execute(
+            "UPDATE jobs SET status = 'failed', error = 'Job worker restarted', task = NULL, "
+            "finished_at = ? WHERE status = 'running'", (time.time(),)
+        )
+        while True:
+            try:
+                self._expire(db)
+                self._claim(db)
+            except sqlite3.Error:
+                pass
+            self._wake.wait(0.5)
+            self._wake.clear()
+
+    def _claim(self, db):
+        """Submit queued jobs, oldest first, while fewer than `workers` are running"""
+        while True:
+            running = db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'running'").fetchone()[0]
+            if running >= self.workers:
+                return
+            row = db.execute(
+                "SELECT id, task FROM jobs WHERE status = 'queued' ORDER BY submitted_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return
+            job_id, task = row
+            db.execute("UPDATE jobs SET status = 'running', task = NULL WHERE id = ?", (job_id,))
+            try:
+                func, args = pickle.loads(task)
+                pool = self._pool()
+                try:
+                    future = pool.submit(func, job_id, *args)
+                except BrokenProcessPool:
+                    # A worker died since the last job finished; this job never ran
+                    self._discard_pool(pool)
+                    pool = self._pool()
+                    future = pool.submit(func, job_id, *args)
+            except Exception as e:
+                self._store_outcome(job_id, None, e)
+                continue
+            future.add_done_callback(lambda f, job_id=job_id, pool=pool: self._finish(job_id, f, pool))
+
+    def _pool(self):
+        """Create the worker pool on first use (and after it broke)"""
+        with self._pool_lock:
+            if self._executor is None:
+                context = multiprocessing.get_context(Config.JOB_START_METHOD)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=context,
+                    initializer=_init_worker,
+                    initargs=(self.db_path,)
+                )
+            return self._executor
+
+    def _discard_pool(self, pool):
+        """Drop a broken pool so the next claim creates a new one"""
+        with self._pool_lock:
+            if self._executor is pool:
+                self._executor = None
+        pool.shutdown(wait=False)
+
+    def _expire(self, db):
+        """Drop finished jobs older than the result TTL"""
+        db.execute('DELETE FROM jobs WHERE finished_at < ?', (time.time() - self.result_ttl,))
+
+    def submit(self, kind, func, *args):
+        """Queue a job and return its id; raises QueueFullError under load"""
+        self._ensure_dispatcher()
+        task = pickle.dumps((func, args))
+        job_id = uuid.uuid4().hex
+        db = self._db()
+        # The pending count and the insert are one write transaction across all processes
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            self._expire(db)
+            pending = db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')"
+            ).fetchone()[0]
+            if pending >= self.max_pending:
+                raise QueueFullError(f'{pending} jobs already pending')
+            db.execute(
+                "INSERT INTO jobs (id, kind, status, task, submitted_at) VALUES (?, ?, 'queued', ?, ?)",
+                (job_id, kind, task, time.time())
+            )
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+
+        self._wake.set()
+        return job_id
+
+    def _finish(self, job_id, future, pool=None):
+        error = future.exception()
+        if isinstance(error, BrokenProcessPool):
+            # A worker process died: this job fails, later ones get a new pool
+            if pool is not None:
+                self._discard_pool(pool)
+            error = RuntimeError('Job worker process died')
+        self._store_outcome(job_id, future.result() if error is None else None, error)
+        self._wake.set()
+
+    def _store_outcome(self, job_id, result, error):
+        if error is None:
+            try:
+                value = json.dumps(result, default=_json_default)
+            except (TypeError, ValueError) as e:
+                error = e
+        db = self._db()
+        if error is None:
+            db.execute("UPDATE jobs SET status = 'done', result = ?, finished_at = ? WHERE id = ?",
+                       (value, time.time(), job_id))
+        else:
+            db.execute("UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                       (str(error), time.time(), job_id))
+
+        if self._on_finish is not None:
+            finished = self.result(job_id)
+            if finished is not None:
+                self._on_finish(finished)
+
+    def _load(self, job_id):
+        self._ensure_dispatcher()
+        row = self._db().execute(
+            f'SELECT {_COLUMNS} FROM jobs WHERE id = ? AND (finished_at IS NULL OR finished_at >= ?)',
+            (job_id, time.time() - self.result_ttl)
+        ).fetchone()
+        if row is None:
+            return None
+        job_id, kind, status, done, total, result, error, submitted_at, finished_at = row
+        return {
+            'id': job_id,
+            'kind': kind,
+            'status': status,
+            'progress': {'done': done, 'total': total} if total is not None else None,
+            'result': json.loads(result) if result is not None else None,
+            'error': error,
+            'submitted_at': submitted_at,
+            'finished_at': finished_at
+        }
+
+    def status(self, job_id):
+        """Job status without the result payload, or None if unknown/expired"""
+        job = self._load(job_id)
+        if job is None:
+            return None
+        status = {key: value for key, value in job.items() if key != 'result'}
+        if job['finished_at'] is not None:
+            status['expires_at'] = job['finished_at'] + self.result_ttl
+        return status
+
+    def result(self, job_id):
+        """Full job record including the result, or None if unknown/expired"""
+        return self._load(job_id)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
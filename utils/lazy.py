@@ -0,0 +1,29 @@
+"""
+Deferred construction of heavy objects such as the detectors
+"""
+
+import threading
+
+
+class LazyLoader:
+    """Build an object on first attribute access and proxy to it"""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Return the object, building it once (thread-safe)"""
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+
+    @property
+    def loaded(self):
+        return self._instance is not None
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
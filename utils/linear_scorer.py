@@ -0,0 +1,213 @@
+"""
+Pure-NumPy scorer for the TF-IDF + LogisticRegression news model
+training/export_news_model.py flattens the fitted vectorizer and model
+into one .npz file (vocabulary, idf weights, coefficients and the
+vectorizer settings). LinearTextScorer re-implements the vectorizer's
+word analyzer and computes the logits directly from the weights, so
+serving needs neither scikit-learn nor its per-call validation.
+Probabilities match sklearn's predict_proba to within 1e-6.
+"""
+
+import re
+import json
+import unicodedata
+
+import numpy as np
+
+from utils.metrics import stage
+
+FORMAT_VERSION = 1
+
+
+def _strip_accents_unicode(text):
+    # Same as sklearn.feature_extraction.text.strip_accents_unicode
+    try:
+        text.encode('ASCII', errors='strict')
+        return text
+    except UnicodeEncodeError:
+        normalized = unicodedata.normalize('NFKD', text)
+        return ''.join(c for c in normalized if not unicodedata.combining(c))
+
+
+def _strip_accents_ascii(text):
+    return unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('ASCII')
+
+
+ACCENT_FUNCTIONS = {None: None, 'unicode': _strip_accents_unicode, 'ascii': _strip_accents_ascii}
+
+
+def _expit(x):
+    with np.errstate(over='ignore'):
+        return 1.0 / (1.0 + np.exp(-x))
+
+
+def _softmax(x):
+    x = x - x.max(axis=1, keepdims=True)
+    np.exp(x, out=x)
+    x /= x.sum(axis=1, keepdims=True)
+    return x
+
+
+class LinearTextScorer:
+    """TF-IDF vectorization and logistic regression without scikit-learn"""
+
+    def __init__(self, terms, idf, coef, intercept, classes, settings):
+        self.vocabulary = {term: i for i, term in enumerate(terms)}
+        self.idf = np.asarray(idf, dtype=np.float64)
+        self.classes_ = np.asarray(classes)
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+        # idf folded into the coefficients: one weight per (class, term)
+        self.weights = np.asarray(coef, dtype=np.float64) * self.idf
+
+        self.lowercase = settings['lowercase']
+        self.strip_accents = ACCENT_FUNCTIONS[settings['strip_accents']]
+        self.token_pattern = re.compile(settings['token_pattern'])
+        self.stop_words = frozenset(settings['stop_words'] or ())
+        self.min_n, self.max_n = settings['ngram_range']
+        self.binary = settings['binary']
+        self.sublinear_tf = settings['sublinear_tf']
+        self.norm = settings['norm']
+        self.probability = settings['probability']
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            settings = json.loads(bytes(data['settings']).decode('utf-8'))
+            if settings.get('format') != FORMAT_VERSION:
+                raise ValueError(f'Unsupported linear model format in {path}')
+            terms = bytes(data['terms']).decode('utf-8').split('\n') if len(data['terms']) else []
+            return cls(terms, data['idf'], data['coef'], data['intercept'], data['classes'], settings)
+
+    def analyze(self, text):
+        """Word n-grams exactly as the vectorizer's 'word' analyzer builds them"""
+        if self.lowercase:
+            text = text.lower()
+        if self.strip_accents is not None:
+            text = self.strip_accents(text)
+        tokens = self.token_pattern.findall(text)
+        if self.stop_words:
+            tokens = [token for token in tokens if token not in self.stop_words]
+
+        if self.max_n == 1:
+            return tokens
+        grams = list(tokens) if self.min_n == 1 else []
+        for n in range(max(self.min_n, 2), min(self.max_n, len(tokens)) + 1):
+            grams.extend(' '.join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return grams
+
+    def _term_counts(self, text):
+        """(indices, counts) of the vocabulary terms in one text"""
+        vocabulary = self.vocabulary
+        counts = {}
+        for gram in self.analyze(text):
+            index = vocabulary.get(gram)
+            if index is not None:
+                counts[index] = counts.get(index, 0) + 1
+        return counts
+
+    def decision_function(self, texts):
+        """Logits for a batch of texts, shape (N, classes or 1)"""
+        with stage('tfidf_transform'):
+            rows, indices, values = [], [], []
+            for row, text in enumerate(texts):
+                counts = self._term_counts(text)
+                rows.extend([row] * len(counts))
+                indices.extend(counts.keys())
+                values.extend(counts.values())
+        with stage('predict'):
+            return self._logits(len(texts), rows, indices, values)
+
+    def _logits(self, n_docs, rows, indices, values):
+        rows = np.asarray(rows, dtype=np.intp)
+        indices = np.asarray(indices, dtype=np.intp)
+        tf = np.asarray(values, dtype=np.float64)
+        if self.binary:
+            tf[:] = 1.0
+        elif self.sublinear_tf:
+            tf = np.log(tf) + 1.0
+
+        # Unnormalized TF-IDF values of every (document, term) pair in the batch
+        tfidf = tf * self.idf[indices]
+        if self.norm == 'l2':
+            norms = np.sqrt(np.bincount(rows, tfidf * tfidf, minlength=n_docs))
+        elif self.norm == 'l1':
+            norms = np.bincount(rows, np.abs(tfidf), minlength=n_docs)
+        else:
+            norms = np.ones(n_docs)
+        norms[norms == 0.0] = 1.0
+
+        logits = np.empty((n_docs, len(self.weights)))
+        for k, weights in enumerate(self.weights):
+            logits[:, k] = np.bincount(rows, tf * weights[indices], minlength=n_docs) / norms
+        logits += self.intercept
+        return logits
+
+    def predict_proba(self, texts):
+        """Class probabilities in the same layout as LogisticRegression.predict_proba"""
+        logits = self.decision_function(texts)
+        if self.probability == 'softmax':
+            if logits.shape[1] == 1:
+                logits = np.hstack([-logits, logits])
+            return _softmax(logits)
+
+        probabilities = _expit(logits)
+        if probabilities.shape[1] == 1:
+            return np.hstack([1.0 - probabilities, probabilities])
+        return probabilities / probabilities.sum(axis=1, keepdims=True)
+
+    def predict(self, texts):
+        return self.classes_.take(np.argmax(self.predict_proba(texts), axis=1))
+
+
+def export_linear_model(vectorizer, model, path):
+    """Write a fitted TfidfVectorizer + LogisticRegression to `path` (.npz)"""
+    if vectorizer.analyzer != 'word' or vectorizer.tokenizer is not None \
+            or vectorizer.preprocessor is not None or vectorizer.input != 'content':
+        raise ValueError('Only the default word analyzer on string input can be exported')
+    if vectorizer.strip_accents not in ACCENT_FUNCTIONS:
+        raise ValueError(f'Unsupported strip_accents: {vectorizer.strip_accents!r}')
+    if vectorizer.norm not in ('l1', 'l2', None):
+        raise ValueError(f'Unsupported norm: {vectorizer.norm!r}')
+
+    vocabulary = vectorizer.vocabulary_
+    terms = [None] * len(vocabulary)
+    for term, index in vocabulary.items():
+        terms[index] = term
+    if any('\n' in term for term in terms):
+        raise ValueError('Vocabulary terms may not contain newlines')
+
+    idf = vectorizer.idf_ if vectorizer.use_idf else np.ones(len(terms))
+    stop_words = vectorizer.get_stop_words()
+
+    # Mirrors how LogisticRegression.predict_proba picks OvR vs multinomial
+    multi_class = getattr(model, 'multi_class', 'auto')
+    if multi_class == 'multinomial':
+        probability = 'softmax'
+    elif multi_class == 'ovr' or len(model.classes_) <= 2 or model.solver == 'liblinear':
+        probability = 'ovr'
+    else:
+        probability = 'softmax'
+
+    settings = {
+        'format': FORMAT_VERSION,
+        'lowercase': bool(vectorizer.lowercase),
+        'strip_accents': vectorizer.strip_accents,
+        'token_pattern': vectorizer.token_pattern,
+        'stop_words': sorted(stop_words) if stop_words else None,
+        'ngram_range': list(vectorizer.ngram_range),
+        'binary': bool(vectorizer.binary),
+        'sublinear_tf': bool(vectorizer.sublinear_tf),
+        'norm': vectorizer.norm,
+        'probability': probability,
+    }
+
+    with open(path, 'wb') as f:
+        np.savez(
+            f,
+            terms=np.frombuffer('\n'.join(terms).encode('utf-8'), dtype=np.uint8),
+            idf=np.asarray(idf, dtype=np.float64),
+            coef=np.asarray(model.coef_, dtype=np.float64),
+            intercept=np.asarray(model.intercept_, dtype=np.float64),
+            classes=np.asarray(model.classes_),
+            settings=np.frombuffer(json.dumps(settings).encode('utf-8'), dtype=np.uint8),
+        )
@@ -0,0 +1,168 @@
+"""
+Stage timers, latency histograms and per-request profiles
+    with stage('face_detection'):
+        faces = detector.detect(img)
+Every stage feeds a fixed-bucket histogram that /metrics renders in the
+Prometheus text format. When a request opts in to profiling, the same
+timings are also summed per stage into that request's profile.
+Histograms are per process (one set per gunicorn worker).
+"""
+
+import time
+import bisect
+import threading
+import contextvars
+
+from config import Config
+
+# Upper bounds in seconds, Prometheus style (+Inf is implicit)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Cumulative-on-render latency histogram"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[i] += 1
+            self.total += seconds
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.total, self.count
+
+
+class Profile:
+    """Stage totals for one request (shared by the threads working on it)"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self._lock:
+            entry = self.stages.setdefault(name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def report(self):
+        with self._lock:
+            stages = {name: {'seconds': round(total, 6), 'calls': calls}
+                      for name, (total, calls) in sorted(self.stages.items())}
+        return {'total_seconds': round(time.perf_counter() - self.started, 6), 'stages': stages}
+
+
+# name -> Histogram, for stages and for HTTP endpoints
+_stages = {}
+_requests = {}
+_registry_lock = threading.Lock()
+
+_profile = contextvars.ContextVar('profile', default=None)
+
+
+def _histogram(registry, name):
+    histogram = registry.get(name)
+    if histogram is None:
+        with _registry_lock:
+            histogram = registry.setdefault(name, Histogram())
+    return histogram
+
+
+def observe(name, seconds):
+    """Record a duration for a stage measured elsewhere"""
+    if not Config.METRICS_ENABLED:
+        return
+    _histogram(_stages, name).observe(seconds)
+    profile = _profile.get()
+    if profile is not None:
+        profile.add(name, seconds)
+
+
+def observe_request(endpoint, seconds):
+    if Config.METRICS_ENABLED:
+        _histogram(_requests, endpoint).observe(seconds)
+
+
+class stage:
+    """Context manager timing one stage"""
+
+    __slots__ = ('name', 'started')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.started)
+        return False
+
+
+def timed_iter(name, iterable):
+    """Yield from iterable, timing only the work of producing each item"""
+    iterator = iter(iterable)
+    while True:
+        started = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            observe(name, time.perf_counter() - started)
+        yield item
+
+
+def start_profile():
+    """Collect a stage breakdown for the current request (context)"""
+    profile = Profile()
+    _profile.set(profile)
+    return profile
+
+
+def current_profile():
+    return _profile.get()
+
+
+def stop_profile():
+    _profile.set(None)
+
+
+def _render_histograms(lines, metric, label, registry):
+    for name, histogram in sorted(registry.items()):
+        counts, total, count = histogram.snapshot()
+        cumulative = 0
+        for bound, bucket_count in zip(histogram.buckets, counts):
+            cumulative += bucket_count
+            lines.append(f'{metric}_bucket{{{label}="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'{metric}_bucket{{{label}="{name}",le="+Inf"}} {count}')
+        lines.append(f'{metric}_sum{{{label}="{name}"}} {total}')
+        lines.append(f'{metric}_count{{{label}="{name}"}} {count}')
+
+
+def render(extra_gauges=None):
+    """All metrics in the Prometheus text exposition format"""
+    lines = [
+        '# HELP analysis_stage_seconds Time spent in each analysis stage.',
+        '# TYPE analysis_stage_seconds histogram',
+    ]
+    _render_histograms(lines, 'analysis_stage_seconds', 'stage', _stages)
+    lines += [
+        '# HELP http_request_duration_seconds Request latency by endpoint.',
+        '# TYPE http_request_duration_seconds histogram',
+    ]
+    _render_histograms(lines, 'http_request_duration_seconds', 'endpoint', _requests)
+    for name, (help_text, value) in sorted((extra_gauges or {}).items()):
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} gauge', f'{name} {value}']
+    return '\n'.join(lines) + '\n'
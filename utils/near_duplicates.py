@@ -0,0 +1,298 @@
+"""
+Near-duplicate index for reusing news verdicts
+Copies of a story are rarely byte-identical, so the content-addressed
+result cache misses them. Each analyzed text is reduced to a MinHash
+signature of its word shingles; LSH banding maps every band of the
+signature to a bucket, and a new text whose estimated Jaccard similarity
+to an indexed one reaches the threshold reuses that verdict.
+Everything lives in fixed-size NumPy arrays: a ring buffer of the most
+recent documents (the oldest are overwritten, and entries past max_age
+are ignored) and one direct-mapped bucket table per band. Bucket
+collisions and overwritten slots only cost a candidate that fails the
+signature check. The arrays are saved to an .npz file and reloaded at
+start-up when the settings and model version match. Every process keeps
+its own index, and only the one holding the lock file next to the .npz
+writes it, so web and job workers don't overwrite each other's saves.
+"""
+
+import os
+import time
+import string
+import zlib
+import atexit
+import hashlib
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # No file locks (Windows): every process may write the file
+    fcntl = None
+
+import numpy as np
+
+from config import Config
+
+# Punctuation becomes whitespace, so tokens are words as str.split() sees them
+_PUNCTUATION = str.maketrans({char: ' ' for char in string.punctuation})
+_SHINGLE_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+_SEED = 1
+FORMAT_VERSION = 2
+
+
+def _next_power_of_two(n):
+    return 1 << max(int(n) - 1, 1).bit_length()
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH index over the most recently analyzed texts"""
+
+    def __init__(self, max_docs=100000, threshold=0.8, num_perm=128, bands=32,
+                 shingle_size=5, min_tokens=20, max_age=None, model_version=''):
+        if num_perm % bands:
+            raise ValueError('num_perm must be a multiple of bands')
+        self.max_docs = max_docs
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.min_tokens = min_tokens
+        self.max_age = max_age
+        self.model_version = model_version
+
+        # Hash functions h(x) = (a*x + b) mod 2**32 with odd a; their order is set by
+        # the well-mixed high bits, and 32-bit arithmetic is several times faster than mod p
+        rng = np.random.default_rng(_SEED)
+        self._a = (rng.integers(0, 2**32, num_perm, dtype=np.uint64).astype(np.uint32) | np.uint32(1))[:, None]
+        self._b = rng.integers(0, 2**32, num_perm, dtype=np.uint64).astype(np.uint32)[:, None]
+        self._row_multipliers = rng.integers(1, 2**63, self.rows, dtype=np.uint64) | np.uint64(1)
+
+        table_size = _next_power_of_two(2 * max_docs)
+        self._shift = np.uint64(64 - table_size.bit_length() + 1)
+        self._band_rows = np.arange(bands)
+
+        # Signatures keep the low 16 bits of each MinHash value (b-bit MinHash);
+        # random agreement of 2**-16 per value does not move the estimate
+        self.signatures = np.zeros((max_docs, num_perm), dtype=np.uint16)
+        self.timestamps = np.zeros(max_docs, dtype=np.float64)  # 0 = empty slot
+        # Both class probabilities at full precision, so a reused verdict is the original one
+        self.probabilities = np.zeros((max_docs, 2), dtype=np.float64)
+        self.predictions = np.zeros(max_docs, dtype=np.int8)
+        self.doc_ids = np.zeros(max_docs, dtype=np.uint64)
+        self.buckets = np.full((bands, table_size), -1, dtype=np.int32)
+        self._next = 0
+
+        self._lock = threading.Lock()
+        self.path = None
+        self._dirty = False
+        self._saving = False
+        self._lock_file = None
+        self._lock_pid = None
+        self._last_save = time.time()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def settings(self):
+        return {
+            'format': FORMAT_VERSION, 'max_docs': self.max_docs, 'num_perm': self.num_perm,
+            'bands': self.bands, 'shingle_size': self.shingle_size, 'model_version': self.model_version
+        }
+
+    def signature(self, text):
+        """
+        (signature, band keys) of a text, or None when it has fewer than
+        min_tokens words (short texts are left to the exact-match cache)
+        """
+        tokens = text.lower().translate(_PUNCTUATION).encode('utf-8', 'surrogatepass').split()
+        if len(tokens) < max(self.min_tokens, self.shingle_size):
+            return None
+
+        # Word k-shingles as a polynomial over per-token CRCs (stable across processes)
+        hashes = np.fromiter(map(zlib.crc32, tokens), dtype=np.uint64, count=len(tokens))
+        n = len(tokens) - self.shingle_size + 1
+        shingles = hashes[:n].copy()
+        for offset in range(1, self.shingle_size):
+            shingles *= _SHINGLE_MULTIPLIER
+            shingles += hashes[offset:offset + n]
+        shingles ^= shingles >> np.uint64(32)
+        shingles = shingles.astype(np.uint32)
+
+        minhash = (self._a * shingles + self._b).min(axis=1)
+
+        # One 64-bit key per band from its full-width values; its top bits pick the bucket
+        keys = (minhash.astype(np.uint64).reshape(self.bands, self.rows) * self._row_multipliers).sum(axis=1)
+        keys ^= keys >> np.uint64(31)
+        keys *= _SHINGLE_MULTIPLIER
+        return minhash.astype(np.uint16), (keys >> self._shift).astype(np.intp)
+
+    def query(self, signature, now=None, count=True):
+        """Best indexed match at or above the threshold, or None (count=False leaves hits/misses alone)"""
+        values, buckets = signature
+        now = time.time() if now is None else now
+        with self._lock:
+            candidates = self.buckets[self._band_rows, buckets]
+            candidates = np.unique(candidates[candidates >= 0])
+            if self.max_age is not None:
+                candidates = candidates[self.timestamps[candidates] > now - self.max_age]
+            else:
+                candidates = candidates[self.timestamps[candidates] > 0]
+            if not len(candidates):
+                self.misses += count
+                return None
+
+            similarities = (self.signatures[candidates] == values).mean(axis=1)
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.misses += count
+                return None
+            self.hits += count
+
+            slot = candidates[best]
+            return {
+                'document': f'{int(self.doc_ids[slot]):016x}',
+                'similarity': round(float(similarities[best]), 4),
+                'analyzed_at': float(self.timestamps[slot]),
+                'prediction': 'Fake' if self.predictions[slot] else 'Real',
+                'real_probability': float(self.probabilities[slot, 0]),
+                'fake_probability': float(self.probabilities[slot, 1])
+            }
+
+    def add(self, signature, text, result, now=None):
+        """Index an ML verdict for a text, overwriting the oldest slot"""
+        values, buckets = signature
+        doc_id = int.from_bytes(
+            hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=8).digest(), 'big'
+        )
+        with self._lock:
+            slot = self._next
+            self._next = (slot + 1) % self.max_docs
+            self.signatures[slot] = values
+            self.probabilities[slot] = result['real_probability'], result['fake_probability']
+            self.predictions[slot] = result['prediction'] == 'Fake'
+            self.doc_ids[slot] = doc_id
+            self.timestamps[slot] = time.time() if now is None else now
+            self.buckets[self._band_rows, buckets] = slot
+            self._dirty = True
+        self._maybe_save()
+
+    def __len__(self):
+        return int(np.count_nonzero(self.timestamps))
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'documents': len(self),
+                'max_docs': self.max_docs,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'memory_bytes': sum(array.nbytes for array in self._arrays().values())
+            }
+
+    def _arrays(self):
+        return {
+            'signatures': self.signatures, 'timestamps': self.timestamps,
+            'probabilities': self.probabilities, 'predictions': self.predictions,
+            'doc_ids': self.doc_ids, 'buckets': self.buckets
+        }
+
+    def save(self, path=None):
+        """Write the index atomically (copied under the lock, written outside it)"""
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            arrays = {name: array.copy() for name, array in self._arrays().items()}
+            arrays['next'] = np.array(self._next)
+            self._dirty = False
+        arrays['settings'] = np.array(repr(sorted(self.settings.items())))
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+        self._last_save = time.time()
+
+    def _owns_path(self):
+        """Try to become the process that writes the index file (held until it exits)"""
+        if fcntl is None:
+            return True
+        if self._lock_file is None or self._lock_pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._lock_file = open(self.path + '.lock', 'a')
+            self._lock_pid = os.getpid()
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def _maybe_save(self):
+        """Save in the background once the save interval has passed"""
+        if not self.path or self._saving or time.time() - self._last_save < Config.NEAR_DUP_SAVE_INTERVAL:
+            return
+        if not self._owns_path():
+            # Another process writes the file; this one's verdicts stay in memory
+            self._last_save = time.time()
+            return
+        self._saving = True
+
+        def run():
+            try:
+                self.save()
+            except OSError:
+                pass
+            finally:
+                self._saving = False
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def load(self, path):
+        """Restore a saved index; returns False if it is missing or was built differently"""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if str(data['settings']) != repr(sorted(self.settings.items())):
+                    return False
+                arrays = {name: data[name] for name in self._arrays()}
+                next_slot = int(data['next'])
+        except (OSError, KeyError, ValueError):
+            return False
+
+        with self._lock:
+            for name, array in arrays.items():
+                getattr(self, name)[...] = array
+            self._next = next_slot
+        return True
+
+    def _save_at_exit(self):
+        if self._dirty:
+            try:
+                if self._owns_path():
+                    self.save()
+            except OSError:
+                pass
+
+
+def load_near_duplicate_index(model_version):
+    """Index configured from Config, restored from disk if possible (None when disabled)"""
+    if not Config.NEAR_DUP_ENABLED:
+        return None
+    index = NearDuplicateIndex(
+        max_docs=Config.NEAR_DUP_MAX_DOCS,
+        threshold=Config.NEAR_DUP_THRESHOLD,
+        num_perm=Config.NEAR_DUP_NUM_PERM,
+        bands=Config.NEAR_DUP_BANDS,
+        shingle_size=Config.NEAR_DUP_SHINGLE_SIZE,
+        min_tokens=Config.NEAR_DUP_MIN_TOKENS,
+        max_age=Config.NEAR_DUP_MAX_AGE,
+        model_version=model_version
+    )
+    if Config.NEAR_DUP_INDEX_PATH:
+        index.path = Config.NEAR_DUP_INDEX_PATH
+        index.load(index.path)
+        atexit.register(index._save_at_exit)
+    return index
@@ -1,148 +1,351 @@
-import re
-import pickle
-import requests
-from urllib.parse import urlparse
-from bs4 import BeautifulSoup
-import pandas as pd
+import os
+import json
+import threading
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-import joblib
 import warnings
+from datetime import datetime, timezone
+from config import Config
+from utils.text_features import FEATURE_NAMES, extract_features, extract_features_batch
+from utils.rule_matcher import RuleMatcher
+from utils.linear_scorer import LinearTextScorer
+from utils.result_cache import get_result_cache, hash_bytes, normalize_url, file_version
+from utils.near_duplicates import load_near_duplicate_index
+from utils.text_windows import plan_windows
+from utils.metrics import stage
 warnings.filterwarnings('ignore')
 
+def summarize_batch(results):
+    """Overall statistics for a list of analysis results"""
+    total = len(results)
+    fake_count = sum(1 for r in results if r.get('prediction') == 'Fake')
+    real_count = total - fake_count
+    
+    return {
+        'total_articles': total,
+        'fake_articles': fake_count,
+        'real_articles': real_count,
+        'fake_percentage': (fake_count / total * 100) if total > 0 else 0,
+        'details': results
+    }
+
+class _SklearnScorer:
+    """Fitted vectorizer + classifier behind the LinearTextScorer interface"""
+    
+    def __init__(self, vectorizer, model):
+        self.vectorizer = vectorizer
+        self.model = model
+        self.classes_ = model.classes_
+    
+    def predict_proba(self, texts):
+        with stage('tfidf_transform'):
+            features = self.vectorizer.transform(texts)
+        with stage('predict'):
+            return self.model.predict_proba(features)
+
 class NewsAnalyzer:
     def __init__(self):
         """Initialize news analyzer with ML models"""
-        try:
-            # Load pre-trained models
-            self.vectorizer = joblib.load('models/vectorizer.pkl')
-            self.model = joblib.load('models/fake_news_detector.pkl')
-            self.features = [
-                'text_length', 'has_exclamation', 'has_question',
-                'capital_ratio', 'number_count', 'url_count',
-                'sentiment_score', 'subjectivity_score'
-            ]
-        except:
-            # Fallback to simple model if trained models aren't available
-            self.vectorizer = None
-            self.model = None
-            print("Warning: Using rule-based analyzer. Train models for better accuracy.")
-    
-    def extract_features(self, text):
-        """Extract linguistic features from text"""
-        features = {}
+        self.vectorizer = None
+        self.model = None
+        self.scorer = None
+        self.features = list(FEATURE_NAMES)
         
-        # Text length
-        features['text_length'] = len(text)
-        
-        # Punctuation features
-        features['has_exclamation'] = int('!' in text)
-        features['has_question'] = int('?' in text)
-        
-        # Capitalization ratio
-        caps = sum(1 for c in text if c.isupper())
-        features['capital_ratio'] = caps / len(text) if text else 0
-        
-        # Number count
-        features['number_count'] = len(re.findall(r'\d+', text))
+        if Config.NEWS_SCORER != 'sklearn' and os.path.exists(Config.NEWS_LINEAR_MODEL_PATH):
+            # Exported weights scored with NumPy only (scikit-learn is never imported)
+            self.scorer = LinearTextScorer.load(Config.NEWS_LINEAR_MODEL_PATH)
+        else:
+            if Config.NEWS_SCORER == 'linear':
+                print("Warning: Exported news model not found. Using scikit-learn.")
+            try:
+                # Load pre-trained models (unpickling pulls in scikit-learn)
+                # Arrays are memory-mapped from the (uncompressed) pickles so
+                # forked workers share the same read-only pages
+                import joblib
+                mmap_mode = 'r' if Config.MODEL_MMAP else None
+                self.vectorizer = joblib.load(Config.VECTORIZER_PATH, mmap_mode=mmap_mode)
+                self.model = joblib.load(Config.NEWS_MODEL_PATH, mmap_mode=mmap_mode)
+                self.scorer = _SklearnScorer(self.vectorizer, self.model)
+            except:
+                # Fallback to simple model if trained models aren't available
+                self.vectorizer = None
+                self.model = None
+                print("Warning: Using rule-based analyzer. Train models for better accuracy.")
         
-        # URL count
-        features['url_count'] = len(re.findall(r'http[s]?://\S+', text))
+        # Which model was trained and how it scored (written by the training scripts)
+        self.model_info = self._load_model_info() if self.scorer else None
         
-        # Sentiment analysis (simplified)
-        positive_words = ['good', 'great', 'excellent', 'amazing', 'wonderful']
-        negative_words = ['bad', 'terrible', 'awful', 'horrible', 'fake']
+        # Fake news indicator rules, compiled once into a single matcher
+        self.rule_matcher = RuleMatcher.from_file(Config.FAKE_INDICATORS_PATH)
         
-        words = text.lower().split()
-        pos_count = sum(1 for word in words if word in positive_words)
-        neg_count = sum(1 for word in words if word in negative_words)
+        # Pooled URL fetcher, created on first use
+        self.fetcher = None
         
-        features['sentiment_score'] = (pos_count - neg_count) / len(words) if words else 0
-        features['subjectivity_score'] = (pos_count + neg_count) / len(words) if words else 0
+        # Cached results are only reused for the same models and rules
+        self.cache = get_result_cache()
+        self.model_version = file_version(
+            Config.VECTORIZER_PATH, Config.NEWS_MODEL_PATH, Config.FAKE_INDICATORS_PATH,
+            Config.NEWS_LINEAR_MODEL_PATH if isinstance(self.scorer, LinearTextScorer) else ''
+        )
         
+        # Edited copies of already analyzed texts reuse their ML verdict; the index
+        # is created in each process on first use (not in a preloading gunicorn master)
+        self._near_duplicates = None
+        self._near_duplicates_pid = None
+        self._near_duplicates_lock = threading.Lock()
+    
+    @property
+    def near_duplicates(self):
+        """Near-duplicate index of this process (None when disabled or without a model)"""
+        if self.scorer is None:
+            return None
+        if self._near_duplicates_pid != os.getpid():
+            with self._near_duplicates_lock:
+                if self._near_duplicates_pid != os.getpid():
+                    self._near_duplicates = load_near_duplicate_index(self.model_version)
+                    self._near_duplicates_pid = os.getpid()
+        return self._near_duplicates
+    
+    def warm_up(self):
+        """
+        One tiny inference through the models and features, leaving out the
+        result cache and near-duplicate index (a preloading master never uses them)
+        """
+        plan = plan_windows('Warm-up text for the news analyzer.')
+        if self.scorer:
+            self._score_windows([plan])
+        self._add_text_analysis(plan, {})
+    
+    def _load_model_info(self):
+        """Training metadata of the loaded model, or {} if there is none"""
+        try:
+            with open(Config.NEWS_MODEL_METADATA_PATH) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def extract_features(self, text):
+        """Extract linguistic features from text"""
+        features, _ = extract_features(text)
         return features
     
+    def extract_features_batch(self, texts):
+        """Extract linguistic features for many texts as a NumPy matrix"""
+        return extract_features_batch(texts)
+    
+    def _cache_key(self, kind, content, method):
+        """Content-addressed cache key for this analyzer's models"""
+        content_hash = hash_bytes(content.encode('utf-8', 'surrogatepass'))
+        return self.cache.make_key(kind, content_hash, method, self.model_version)
+    
     def analyze_text(self, text, method='ml'):
         """Analyze text for fake news indicators"""
+        if self.cache is None:
+            return self._analyze_text(text, method)
+        
+        key = self._cache_key('text', text, method)
+        result = self.cache.get(key)
+        if result is None:
+            result = self._analyze_text(text, method)
+            self.cache.put(key, result)
+        return result
+    
+    def _analyze_text(self, text, method='ml'):
+        """Analyze a single text without the result cache"""
+        # Very long texts are analyzed through a bounded number of windows
+        plan = plan_windows(text)
         
-        if method == 'ml' and self.model:
+        if method == 'ml' and self.scorer:
+            signature = self._near_duplicate_signature(plan)
+            result = self._find_near_duplicate(text, signature)
+            if result is not None:
+                return self._add_text_analysis(plan, result)
+            
             # ML-based analysis
             try:
-                # Transform text
-                text_tfidf = self.vectorizer.transform([text])
-                
-                # Predict
-                prediction = self.model.predict(text_tfidf)[0]
-                probability = self.model.predict_proba(text_tfidf)[0]
+                # Predict (same as predict(): the most probable class)
+                probability = self._score_windows([plan])[0]
+                prediction = self.scorer.classes_[np.argmax(probability)]
                 
-                result = {
-                    'text': text[:500] + '...' if len(text) > 500 else text,
-                    'prediction': 'Fake' if prediction == 1 else 'Real',
-                    'confidence': float(max(probability)),
-                    'fake_probability': float(probability[1]),
-                    'real_probability': float(probability[0]),
-                    'method': 'Machine Learning'
-                }
+                result = self._ml_result(text, prediction, probability)
+                if signature is not None:
+                    self.near_duplicates.add(signature, plan.text(), result)
             except:
                 # Fallback to rule-based
-                result = self._rule_based_analysis(text)
+                result = self._rule_based_analysis(plan.text())
         else:
             # Rule-based analysis
-            result = self._rule_based_analysis(text)
+            result = self._rule_based_analysis(plan.text())
+        
+        return self._add_text_analysis(plan, result)
+    
+    def analyze_batch(self, texts, method='ml'):
+        """Analyze a list of texts with one vectorizer and model call"""
+        texts = list(texts)
+        if self.cache is None:
+            return self._analyze_batch(texts, method)
+        
+        # Serve cached texts, then score only the misses in one batch
+        keys = [self._cache_key('text', text, method) for text in texts]
+        results = [self.cache.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        
+        computed = self._analyze_batch([texts[i] for i in missing], method)
+        for i, result in zip(missing, computed):
+            self.cache.put(keys[i], result)
+            results[i] = result
+        
+        return results
+    
+    def _analyze_batch(self, texts, method='ml'):
+        """Batch analysis without the result cache"""
+        if not texts:
+            return []
+        
+        if method == 'ml' and self.scorer:
+            plans = [plan_windows(text) for text in texts]
+            signatures = [self._near_duplicate_signature(plan) for plan in plans]
+            index = self.near_duplicates
+            missing = [i for i, signature in enumerate(signatures)
+                       if signature is None or index.query(signature, count=False) is None]
+            
+            scored = {}
+            if missing:
+                try:
+                    # One vectorization and one predict_proba for the texts not reused
+                    probabilities = self._score_windows([plans[i] for i in missing])
+                    
+                    # Derive predictions the same way predict() does
+                    predictions = self.scorer.classes_.take(np.argmax(probabilities, axis=1))
+                except:
+                    # Fall back to the per-item path so output stays identical
+                    return [self._analyze_text(text, method) for text in texts]
+                scored = dict(zip(missing, zip(predictions, probabilities)))
+            
+            # Look up and index in input order, so a near-duplicate of an earlier
+            # text in the same batch reuses its verdict, as it would sequentially
+            results = []
+            for i, (text, plan, signature) in enumerate(zip(texts, plans, signatures)):
+                result = self._find_near_duplicate(text, signature)
+                if result is None:
+                    if i not in scored:
+                        # Its match was overwritten since the first lookup
+                        probability = self._score_windows([plan])[0]
+                        scored[i] = self.scorer.classes_[np.argmax(probability)], probability
+                    result = self._ml_result(text, *scored[i])
+                    if signature is not None:
+                        self.near_duplicates.add(signature, plan.text(), result)
+                results.append(self._add_text_analysis(plan, result))
+            return results
+        
+        return [self._analyze_text(text, method) for text in texts]
+    
+    def _score_windows(self, plans):
+        """
+        Class probabilities per text: the windows of all texts go through one
+        predict_proba call, then each text gets the length-weighted mean of its windows
+        """
+        probabilities = self.scorer.predict_proba([window for plan in plans for window in plan.windows])
+        combined = []
+        start = 0
+        for plan in plans:
+            rows = probabilities[start:start + len(plan.windows)]
+            start += len(plan.windows)
+            if len(rows) == 1:
+                combined.append(rows[0])
+            else:
+                combined.append(np.average(rows, axis=0, weights=[len(window) for window in plan.windows]))
+        return np.asarray(combined)
+    
+    def _ml_result(self, text, prediction, probability):
+        """Build the result dict for an ML prediction"""
+        return {
+            'text': text[:500] + '...' if len(text) > 500 else text,
+            'prediction': 'Fake' if prediction == 1 else 'Real',
+            'confidence': float(max(probability)),
+            'fake_probability': float(probability[1]),
+            'real_probability': float(probability[0]),
+            'method': 'Machine Learning'
+        }
+    
+    def _near_duplicate_signature(self, plan):
+        """
+        Signature of the analyzed windows of a text, or None when the
+        index is off or the text is too short
+        """
+        if self.near_duplicates is None:
+            return None
+        with stage('near_duplicate_lookup'):
+            return self.near_duplicates.signature(plan.text())
+    
+    def _find_near_duplicate(self, text, signature):
+        """Result reused from a near-duplicate of the text, or None"""
+        if signature is None:
+            return None
+        with stage('near_duplicate_lookup'):
+            match = self.near_duplicates.query(signature)
+        if match is None:
+            return None
+        
+        result = self._ml_result(text, 1 if match['prediction'] == 'Fake' else 0,
+                                 [match['real_probability'], match['fake_probability']])
+        result['near_duplicate'] = {
+            'document': match['document'],
+            'similarity': match['similarity'],
+            'analyzed_at': datetime.fromtimestamp(match['analyzed_at'], timezone.utc).isoformat()
+        }
+        return result
+    
+    def _add_text_analysis(self, plan, result):
+        """Attach linguistic features, warning flags and coverage to a result"""
+        # Features and warnings cover the same windows as the prediction
+        text = plan.text()
         
         # Add linguistic analysis
-        features = self.extract_features(text)
+        features, exclamation_count = extract_features(text)
         result['linguistic_features'] = features
         
         # Add warning flags
-        warnings = self._check_warnings(text, features)
+        warnings = self._check_warnings(text, features, exclamation_count)
         result['warnings'] = warnings
         
+        # How much of the input the analysis saw
+        result['coverage'] = plan.coverage()
+        
         return result
     
     def _rule_based_analysis(self, text):
         """Rule-based fake news detection"""
         text_lower = text.lower()
         
-        # Common fake news indicators
-        fake_indicators = [
-            r'breaking.*exclusive',
-            r'you won.*believe',
-            r'shocking.*truth',
-            r'government.*cover.up',
-            r'must read.*share',
-            r'viral.*video',
-            r'doctors hate this',
-            r'they don.*want you to know'
-        ]
-        
-        score = 0
-        for indicator in fake_indicators:
-            if re.search(indicator, text_lower):
-                score += 1
+        # Common fake news indicators, all checked in one pass
+        matched = self.rule_matcher.match(text_lower)
         
         # Calculate score
-        fake_score = min(score / len(fake_indicators), 1.0)
+        fake_score = min(len(matched) / len(self.rule_matcher), 1.0) if len(self.rule_matcher) else 0.0
         
         return {
             'prediction': 'Fake' if fake_score > 0.6 else 'Real',
             'confidence': abs(fake_score - 0.5) * 2,
             'fake_probability': fake_score,
             'real_probability': 1 - fake_score,
-            'method': 'Rule-Based'
+            'method': 'Rule-Based',
+            'indicators': [self.rule_matcher.rules[i] for i in matched]
         }
     
-    def _check_warnings(self, text, features):
+    def _check_warnings(self, text, features, exclamation_count=None):
         """Check for specific warning signs"""
         warnings = []
         
+        if exclamation_count is None:
+            exclamation_count = text.count('!')
+        
         if features['capital_ratio'] > 0.3:
             warnings.append('Excessive capitalization detected')
         
         if features['url_count'] > 3:
             warnings.append('Multiple URLs detected')
         
-        if features['has_exclamation'] and text.count('!') > 3:
+        if features['has_exclamation'] and exclamation_count > 3:
             warnings.append('Excessive exclamation marks')
         
         if features['text_length'] < 50:
@@ -155,28 +358,72 @@ class NewsAnalyzer:
     
     def analyze_url(self, url, method='ml'):
         """Extract and analyze content from URL"""
+        if self.cache is None:
+            return self._analyze_url(url, method)
+        
+        key = self._cache_key('url', normalize_url(url), method)
+        result = self.cache.get(key)
+        if result is None:
+            result = self._analyze_url(url, method)
+            self.cache.put(key, result, ttl=Config.RESULT_CACHE_URL_TTL)
+        return result
+    
+    def _get_fetcher(self):
+        """Shared pooled fetcher, created on first URL request"""
+        if self.fetcher is None:
+            from utils.url_fetcher import URLFetcher
+            self.fetcher = URLFetcher()
+        return self.fetcher
+    
+    def _url_result(self, url, page, result):
+        """Annotate a text result with its page details"""
+        result['url'] = url
+        result['title'] = page['title'] or 'No title'
+        return result
+    
+    def _url_error(self, url, error):
+        return {
+            'error': f'Failed to analyze URL: {str(error)}',
+            'url': url,
+            'prediction': 'Unknown'
+        }
+    
+    def _analyze_url(self, url, method='ml'):
+        """Fetch and analyze a URL without the result cache"""
         try:
-            # Fetch URL content
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            response = requests.get(url, headers=headers, timeout=10)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract text (simplified)
-            text = soup.get_text()
-            
-            # Clean text
-            text = re.sub(r'\s+', ' ', text).strip()
+            # Fetch URL content and extract the article text
+            page = self._get_fetcher().fetch(url)
             
             # Analyze extracted text
-            result = self.analyze_text(text, method)
-            result['url'] = url
-            result['title'] = soup.title.string if soup.title else 'No title'
-            
-            return result
+            result = self._analyze_text(page['text'], method)
+            return self._url_result(url, page, result)
             
         except Exception as e:
-            return {
-                'error': f'Failed to analyze URL: {str(e)}',
-                'url': url,
-                'prediction': 'Unknown'
-            }
\ No newline at end of file
+            return self._url_error(url, e)
+    
+    def analyze_urls(self, urls, method='ml'):
+        """Fetch many URLs concurrently and analyze their text in one batch"""
+        urls = list(urls)
+        results = [None] * len(urls)
+        keys = {}
+        
+        if self.cache is not None:
+            for i, url in enumerate(urls):
+                keys[i] = self._cache_key('url', normalize_url(url), method)
+                results[i] = self.cache.get(keys[i])
+        
+        missing = [i for i, result in enumerate(results) if result is None]
+        pages = self._get_fetcher().fetch_many([urls[i] for i in missing])
+        
+        fetched = [(i, page) for i, page in zip(missing, pages) if not isinstance(page, Exception)]
+        for i, page in zip(missing, pages):
+            if isinstance(page, Exception):
+                results[i] = self._url_error(urls[i], page)
+        
+        analyzed = self._analyze_batch([page['text'] for _, page in fetched], method)
+        for (i, page), result in zip(fetched, analyzed):
+            results[i] = self._url_result(urls[i], page, result)
+            if self.cache is not None:
+                self.cache.put(keys[i], results[i], ttl=Config.RESULT_CACHE_URL_TTL)
+        
+        return results
@@ -0,0 +1,288 @@
+"""
+Perceptual-hash index for re-uploaded images and videos
+Each image is reduced to a 64-bit pHash (low DCT frequencies vs their
+median) and a 64-bit dHash (horizontal gradient signs), both of which
+survive re-encoding and resizing. The distance between two images is the
+larger of the two Hamming distances. Known media is found by multi-index
+hashing on the pHash bits (a BK-tree degenerates into a near-linear scan
+for 64-bit hashes at these distances). A video is the set of hashes of
+the first frames its analysis samples (videos are only compared under the
+same sampling settings); it matches an indexed video when most of its
+keyframes are near keyframes of that video.
+Results are kept for the most recent MEDIA_HASH_MAX_ITEMS media and are
+looked up before any face detection runs. The global hashes barely move
+when only a face is edited, so an image result also keeps a small grey
+thumbnail of each detected face: on a hash match its face boxes are
+rescaled to the new image, and the result is only reused if every face
+there still looks the same (a face-swapped copy is analyzed again).
+"""
+
+import json
+import math
+import threading
+from itertools import combinations
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from config import Config
+
+_MASK64 = (1 << 64) - 1
+# Frames flatter than this (grey level std on 32x32) carry no usable hash, e.g. black frames
+_MIN_DETAIL = 2.0
+FACE_THUMBNAIL_SIZE = 32
+
+
+def distance(a, b):
+    """max(pHash distance, dHash distance) of two 128-bit combined hashes"""
+    x = a ^ b
+    return max((x >> 64).bit_count(), (x & _MASK64).bit_count())
+
+
+def _bits(flags):
+    return int.from_bytes(np.packbits(flags.ravel()).tobytes(), 'big')
+
+
+def image_hash(img):
+    """128-bit (pHash << 64 | dHash) of an RGB or BGR image, or None if it is flat"""
+    # Striding large images down to ~256 px first keeps INTER_AREA cheap (it is slow on big frames)
+    step = max(1, min(img.shape[:2]) // 256)
+    small = cv2.resize(np.ascontiguousarray(img[::step, ::step]), (32, 32), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_RGB2GRAY) if small.ndim == 3 else small
+    gray = gray.astype(np.float32)
+    if gray.std() < _MIN_DETAIL:
+        return None
+
+    low = cv2.dct(gray)[:8, :8]
+    phash = _bits(low > np.median(low.ravel()[1:]))  # DC term left out of the median
+    tiny = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    dhash = _bits(tiny[:, 1:] > tiny[:, :-1])
+    return (phash << 64) | dhash
+
+
+def face_thumbnail(img, box):
+    """Grey FACE_THUMBNAIL_SIZE square of a face box in an RGB image, or None if the box is empty"""
+    x, y, w, h = box
+    crop = np.ascontiguousarray(img[max(y, 0):y + h, max(x, 0):x + w])
+    if crop.size == 0:
+        return None
+    if crop.ndim == 3:
+        crop = cv2.cvtColor(crop, cv2.COLOR_RGB2GRAY)
+    return cv2.resize(crop, (FACE_THUMBNAIL_SIZE, FACE_THUMBNAIL_SIZE), interpolation=cv2.INTER_AREA)
+
+
+class MultiIndexHash:
+    """
+    Multi-index hashing over the pHash half of the combined hashes
+    The 64 pHash bits are split into CHUNKS tables. Two hashes within
+    max_distance agree to within max_distance // CHUNKS bits on at least
+    one chunk (pigeonhole), so a search only probes the buckets of each
+    chunk's near variants and checks the full distance on those.
+    """
+
+    CHUNKS = 4
+    CHUNK_BITS = 16
+
+    def __init__(self, max_distance):
+        self.max_distance = max_distance
+        self._tables = [{} for _ in range(self.CHUNKS)]
+        self.size = 0
+        # XOR masks of every chunk value with at most max_distance // CHUNKS bits set
+        radius = max_distance // self.CHUNKS
+        self._masks = [sum(1 << bit for bit in bits) for r in range(radius + 1)
+                       for bits in combinations(range(self.CHUNK_BITS), r)]
+
+    def _chunks(self, key):
+        phash = key >> 64
+        return [(phash >> (self.CHUNK_BITS * i)) & 0xFFFF for i in range(self.CHUNKS)]
+
+    def add(self, key, value):
+        item = (key, value)
+        for table, chunk in zip(self._tables, self._chunks(key)):
+            table.setdefault(chunk, []).append(item)
+        self.size += 1
+
+    def items(self):
+        # Every item is in each table exactly once
+        for bucket in self._tables[0].values():
+            yield from bucket
+
+    def search(self, key):
+        """All (distance, value) within max_distance of key"""
+        found = []
+        seen = set()
+        for table, chunk in zip(self._tables, self._chunks(key)):
+            for mask in self._masks:
+                for item in table.get(chunk ^ mask, ()):
+                    if item in seen:
+                        continue
+                    seen.add(item)
+                    d = distance(key, item[0])
+                    if d <= self.max_distance:
+                        found.append((d, item[1]))
+        return found
+
+
+class MediaHashIndex:
+    """Results of recently analyzed images and videos, found by perceptual hash"""
+
+    def __init__(self, max_distance=6, max_items=20000, video_frames=16, video_min_match=0.6,
+                 face_max_diff=4.0):
+        self.max_distance = max_distance
+        self.max_items = max_items
+        self.video_frames = video_frames
+        self.video_min_match = video_min_match
+        self.face_max_diff = face_max_diff
+        # id -> (settings, result json, hash count, image size and face thumbnails), oldest first
+        self._entries = OrderedDict()
+        self._live_hashes = 0
+        self._images = MultiIndexHash(max_distance)
+        self._frames = MultiIndexHash(max_distance)
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.face_mismatches = 0
+
+    def lookup_image(self, key, settings=(), image=None):
+        """
+        Stored result of the nearest indexed image, or None
+        With the image, the result's face boxes are rescaled to its size and
+        its faces must match the stored thumbnails; perceptual_match.original_size
+        is the [w, h] the result was computed at
+        """
+        if key is None:
+            return None
+        with self._lock:
+            matches = sorted(
+                (d, entry_id) for d, entry_id in self._images.search(key)
+                if self._entries.get(entry_id, (None,))[0] == settings
+            )
+            if not matches:
+                self.misses += 1
+                return None
+            d, entry_id = matches[0]
+            _, value, _, faces = self._entries[entry_id]
+
+        result = json.loads(value)
+        same_faces = image is None or faces is None or self._match_faces(result, faces, image)
+        with self._lock:
+            if not same_faces:
+                self.misses += 1
+                self.face_mismatches += 1
+                return None
+            self.hits += 1
+        result['perceptual_match'] = {'media_id': entry_id, 'distance': d}
+        if faces is not None:
+            result['perceptual_match']['original_size'] = faces['size']
+        return result
+
+    def _match_faces(self, result, faces, image):
+        """Rescale the result's face boxes to the image and compare each face with its thumbnail"""
+        width, height = faces['size']
+        scale_x, scale_y = image.shape[1] / width, image.shape[0] / height
+        for face, thumbnail in zip(result.get('details', []), faces['thumbnails']):
+            position = face['position']
+            box = (int(round(position['x'] * scale_x)), int(round(position['y'] * scale_y)),
+                   int(round(position['w'] * scale_x)), int(round(position['h'] * scale_y)))
+            face['position'] = dict(zip(('x', 'y', 'w', 'h'), box))
+            current = face_thumbnail(image, box)
+            if thumbnail is None or current is None:
+                return False
+            if np.abs(current.astype(np.int16) - thumbnail).mean() > self.face_max_diff:
+                return False
+        return True
+
+    def lookup_video(self, hashes, settings=()):
+        """Stored result of the indexed video most keyframes match, or None"""
+        needed = max(2, math.ceil(self.video_min_match * len(hashes)))
+        if len(hashes) < needed:
+            return None
+        with self._lock:
+            votes = {}
+            for key in hashes:
+                matched = {entry_id for _, entry_id in self._frames.search(key)
+                           if self._entries.get(entry_id, (None,))[0] == settings}
+                for entry_id in matched:
+                    votes[entry_id] = votes.get(entry_id, 0) + 1
+            entry_id, count = max(votes.items(), key=lambda item: (item[1], item[0]), default=(None, 0))
+            if count < needed:
+                self.misses += 1
+                return None
+            self.hits += 1
+            result = json.loads(self._entries[entry_id][1])
+        result['perceptual_match'] = {'media_id': entry_id, 'matched_keyframes': count,
+                                      'keyframes': len(hashes)}
+        return result
+
+    def add_image(self, key, result, settings=(), image=None):
+        """Index an image result; with the image, its face thumbnails are kept for reuse checks"""
+        if key is None:
+            return
+        faces = None
+        if image is not None and isinstance(result, dict):
+            boxes = [(face['position']['x'], face['position']['y'], face['position']['w'], face['position']['h'])
+                     for face in result.get('details', [])]
+            faces = {'size': [image.shape[1], image.shape[0]],
+                     'thumbnails': [face_thumbnail(image, box) for box in boxes]}
+        self._add([key], self._images, result, settings, faces)
+
+    def add_video(self, hashes, result, settings=()):
+        if len(hashes) >= 2:
+            self._add(hashes, self._frames, result, settings)
+
+    def _add(self, keys, index, result, settings, faces=None):
+        """Index a successful result under one or more hashes"""
+        if not isinstance(result, dict) or 'error' in result:
+            return
+        try:
+            value = json.dumps(result)
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (settings, value, len(keys), faces)
+            for key in keys:
+                index.add(key, entry_id)
+            self._live_hashes += len(keys)
+            while len(self._entries) > self.max_items:
+                self._live_hashes -= self._entries.popitem(last=False)[1][2]
+            # Evicted entries stay in the tables until they outnumber live ones
+            if self._images.size + self._frames.size > 2 * self._live_hashes + 1000:
+                self._rebuild()
+
+    def _rebuild(self):
+        """Drop evicted entries from the tables"""
+        images, frames = MultiIndexHash(self.max_distance), MultiIndexHash(self.max_distance)
+        for index, rebuilt in ((self._images, images), (self._frames, frames)):
+            for key, entry_id in index.items():
+                if entry_id in self._entries:
+                    rebuilt.add(key, entry_id)
+        self._images, self._frames = images, frames
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'media': len(self._entries),
+                'indexed_hashes': self._images.size + self._frames.size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'face_mismatches': self.face_mismatches,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+def create_media_index():
+    """Index configured from Config (None when disabled)"""
+    if not Config.MEDIA_HASH_ENABLED:
+        return None
+    return MediaHashIndex(
+        max_distance=Config.MEDIA_HASH_MAX_DISTANCE,
+        max_items=Config.MEDIA_HASH_MAX_ITEMS,
+        video_frames=Config.MEDIA_HASH_VIDEO_FRAMES,
+        video_min_match=Config.MEDIA_HASH_VIDEO_MIN_MATCH,
+        face_max_diff=Config.MEDIA_HASH_FACE_MAX_DIFF
+    )
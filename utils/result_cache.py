@@ -0,0 +1,198 @@
+"""
+Content-addressed cache for detection results
+Keys are hashes of the analyzed content plus the method and model version.
+Results are kept as JSON in an in-process LRU (evicted by size) and,
+optionally, in a SQLite file so they survive restarts.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit
+
+from config import Config
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def hash_bytes(data):
+    """Hash raw content"""
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+def hash_file(path):
+    """Hash a file's content in blocks so large videos aren't read at once"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def normalize_url(url):
+    """Canonical form of a URL: trimmed, lowercase scheme/host, no fragment"""
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(),
+                       parts.path or '/', parts.query, ''))
+
+
+def file_version(*paths):
+    """Version tag for model files, based on their size and mtime"""
+    digest = hashlib.blake2b(digest_size=8)
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            digest.update(f'{path}:{stat.st_size}:{stat.st_mtime_ns};'.encode())
+        except OSError:
+            digest.update(f'{path}:missing;'.encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Two-tier (memory LRU + optional SQLite) result cache"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, db_path=None):
+        self.max_bytes = max_bytes
+        self.db_path = db_path
+        self._entries = OrderedDict()  # key -> (json, expires_at)
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db = None
+        self._db_pid = None
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._connect()
+
+    def _connect(self):
+        """Open the SQLite tier (again after a fork: connections can't be shared)"""
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db_pid = os.getpid()
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)'
+        )
+        self._db.commit()
+
+    def _disk(self):
+        """SQLite connection owned by this process, or None"""
+        if self._db is not None and self._db_pid != os.getpid():
+            self._connect()
+        return self._db
+
+    @staticmethod
+    def make_key(kind, content_hash, *parts):
+        """Build a cache key from the entry point, content hash and settings"""
+        return ':'.join([kind, content_hash] + [str(part) for part in parts])
+
+    def get(self, key):
+        """Return a fresh copy of the cached result, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(value)
+                self._remove(key)
+
+            db = self._disk()
+            if db is not None:
+                row = db.execute(
+                    'SELECT value, expires_at FROM results WHERE key = ?', (key,)
+                ).fetchone()
+                if row is not None and (row[1] is None or row[1] > now):
+                    self._store(key, row[0], row[1])
+                    self.disk_hits += 1
+                    return json.loads(row[0])
+
+            self.misses += 1
+            return None
+
+    def put(self, key, result, ttl=None):
+        """Cache a JSON-serializable result; error results are never cached"""
+        if not isinstance(result, dict) or 'error' in result:
+            return
+        try:
+            value = json.dumps(result)
+        except (TypeError, ValueError):
+            return
+        expires_at = time.time() + ttl if ttl else None
+
+        with self._lock:
+            self._store(key, value, expires_at)
+            db = self._disk()
+            if db is not None:
+                db.execute(
+                    'INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)',
+                    (key, value, expires_at)
+                )
+                db.commit()
+
+    def _store(self, key, value, expires_at):
+        """Insert into the memory tier and evict least recently used entries"""
+        if key in self._entries:
+            self._remove(key)
+        if len(value) > self.max_bytes:
+            return
+        self._entries[key] = (value, expires_at)
+        self._size += len(value)
+        while self._size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def _remove(self, key):
+        value, _ = self._entries.pop(key)
+        self._size -= len(value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            db = self._disk()
+            if db is not None:
+                db.execute('DELETE FROM results')
+                db.commit()
+
+    def stats(self):
+        """Hit/miss counters and memory tier usage"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'memory_bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'disk_enabled': self._db is not None
+            }
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_result_cache():
+    """Process-wide cache configured from Config (None when disabled)"""
+    global _shared_cache
+    if not Config.RESULT_CACHE_ENABLED:
+        return None
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = ResultCache(
+                max_bytes=Config.RESULT_CACHE_MAX_BYTES,
+                db_path=Config.RESULT_CACHE_DB_PATH or None
+            )
+        return _shared_cache
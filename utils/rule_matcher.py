@@ -0,0 +1,217 @@
+"""
+Single-pass matcher for rule-based fake news indicators
+Rules use a small regex subset: literal text, '.' for any single character
+and '.*' for any gap, neither crossing a newline (same as re without DOTALL).
+All literals go into one Aho-Corasick automaton, so the text is scanned once
+no matter how many rules are loaded. Rules outside that subset (other regex
+syntax, or a segment made only of '.' wildcards) are checked with re.search,
+as the original per-rule loop did.
+"""
+
+import re
+from bisect import bisect_right
+
+try:
+    # Optional C implementation of the automaton
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+def load_rules(path):
+    """Read rules from a text file (one per line, '#' starts a comment)"""
+    rules = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                rules.append(line.lower())
+    return rules
+
+
+class _Chunk:
+    """Fixed-width part of a rule between two '.*' gaps"""
+
+    def __init__(self, pattern):
+        self.width = len(pattern)
+        self.pieces = []
+        offset = 0
+        for piece in pattern.split('.'):
+            if piece:
+                self.pieces.append((offset, piece))
+            offset += len(piece) + 1
+
+        if not self.pieces:
+            raise ValueError(f"Rule segment '{pattern}' has no literal text")
+
+        # The last literal is the anchor looked up in the automaton
+        anchor_offset, self.anchor = self.pieces[-1]
+        self.anchor_end = anchor_offset + len(self.anchor)
+
+    def verify(self, text, start):
+        """Check the chunk occurs at text[start:start + width]"""
+        if start < 0 or start + self.width > len(text):
+            return False
+        if text.find('\n', start, start + self.width) != -1:
+            return False
+        return all(text.startswith(piece, start + offset) for offset, piece in self.pieces)
+
+
+# Regex syntax the chunked matcher does not handle ('.' is handled)
+_REGEX_SYNTAX = re.compile(r'[\\\[\](){}|?+*^$]')
+
+
+def _split_rule(rule):
+    """Chunks of a rule in the matcher's subset, or None if it needs re"""
+    if _REGEX_SYNTAX.search(rule.replace('.*', '')):
+        return None
+    try:
+        chunks = [_Chunk(part) for part in rule.split('.*') if part]
+    except ValueError:
+        return None
+    return chunks or None
+
+
+class _PyAutomaton:
+    """Pure Python Aho-Corasick automaton"""
+
+    def __init__(self, words):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [()]
+
+        for word in words:
+            state = 0
+            for ch in word:
+                if ch not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(())
+                    self.goto[state][ch] = len(self.goto) - 1
+                state = self.goto[state][ch]
+            self.out[state] = self.out[state] + (word,)
+
+        # Breadth-first pass to build failure links
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for ch, child in self.goto[state].items():
+                queue.append(child)
+                if state:
+                    fallback = self.fail[state]
+                    while fallback and ch not in self.goto[fallback]:
+                        fallback = self.fail[fallback]
+                    self.fail[child] = self.goto[fallback].get(ch, 0)
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def iter(self, text):
+        """Yield (end_position, word) for every occurrence, in end order"""
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                for word in out[state]:
+                    yield i + 1, word
+
+
+class _CAutomaton:
+    """Wrapper giving pyahocorasick the same iteration interface"""
+
+    def __init__(self, words):
+        self.automaton = ahocorasick.Automaton()
+        for word in words:
+            self.automaton.add_word(word, word)
+        self.automaton.make_automaton()
+
+    def iter(self, text):
+        for end, word in self.automaton.iter(text):
+            yield end + 1, word
+
+
+class RuleMatcher:
+    """Match every rule against a text in one linear pass"""
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.chunks = []
+        self.first_anchors = {}
+        self.regex_rules = []  # (rule_id, compiled pattern) for rules outside the subset
+
+        for rule_id, rule in enumerate(self.rules):
+            chunks = _split_rule(rule)
+            self.chunks.append(chunks)
+            if chunks is None:
+                try:
+                    self.regex_rules.append((rule_id, re.compile(rule)))
+                except re.error as e:
+                    raise ValueError(f"Rule '{rule}' is not a valid pattern: {e}") from None
+                continue
+            self.first_anchors.setdefault(chunks[0].anchor, []).append(rule_id)
+
+        anchors = set(chunk.anchor for chunks in self.chunks if chunks for chunk in chunks)
+        automaton_class = _CAutomaton if ahocorasick is not None else _PyAutomaton
+        self.automaton = automaton_class(sorted(anchors)) if anchors else None
+
+    @classmethod
+    def from_file(cls, path):
+        return cls(load_rules(path))
+
+    def __len__(self):
+        return len(self.rules)
+
+    def match(self, text):
+        """Return the sorted ids of all rules that match the (lowercased) text"""
+        matched = set(rule_id for rule_id, pattern in self.regex_rules if pattern.search(text))
+        if self.automaton is None:
+            return sorted(matched)
+
+        newlines = []
+        pos = text.find('\n')
+        while pos != -1:
+            newlines.append(pos)
+            pos = text.find('\n', pos + 1)
+
+        # Rules that have started on the current line, and for each anchor
+        # the rules waiting on it: {anchor: {rule_id: (chunk_id, prev_end)}}
+        started = set()
+        waiting = {}
+        current_line = -1
+
+        def advance(rule_id, chunk_id, prev_end):
+            if chunk_id == len(self.chunks[rule_id]):
+                matched.add(rule_id)
+            else:
+                anchor = self.chunks[rule_id][chunk_id].anchor
+                waiting.setdefault(anchor, {})[rule_id] = (chunk_id, prev_end)
+
+        for end, anchor in self.automaton.iter(text):
+            # '.*' gaps never span a newline: progress resets on each line
+            line = bisect_right(newlines, end - 1)
+            if line != current_line:
+                started.clear()
+                waiting.clear()
+                current_line = line
+
+            # Rules already part-way through only look at their next chunk
+            pending = waiting.get(anchor)
+            if pending:
+                for rule_id, (chunk_id, prev_end) in list(pending.items()):
+                    chunk = self.chunks[rule_id][chunk_id]
+                    start = end - chunk.anchor_end
+                    if start >= prev_end and chunk.verify(text, start):
+                        del pending[rule_id]
+                        advance(rule_id, chunk_id + 1, start + chunk.width)
+
+            # Earliest occurrence of a first chunk starts a rule on this line
+            for rule_id in self.first_anchors.get(anchor, ()):
+                if rule_id in matched or rule_id in started:
+                    continue
+                chunk = self.chunks[rule_id][0]
+                start = end - chunk.anchor_end
+                if chunk.verify(text, start):
+                    started.add(rule_id)
+                    advance(rule_id, 1, start + chunk.width)
+
+        return sorted(matched)
@@ -0,0 +1,86 @@
+"""
+Bounded-cost windows over very long texts
+A text longer than TEXT_CHUNK_MIN_CHARS is cut into fixed-size character
+windows (trimmed to word boundaries) and at most TEXT_CHUNK_MAX_WINDOWS
+of them are analyzed: the first ones ('head') or ones spread evenly from
+the start to the end of the text ('spread'). Only the chosen windows are
+ever sliced, so the cost does not depend on the length of the input.
+The choice is deterministic, so the same text always gets the same result.
+"""
+
+from config import Config
+
+
+class WindowPlan:
+    """The windows of one text that are analyzed, and how much of the text they cover"""
+
+    def __init__(self, windows, total_chars, windows_total, sampling):
+        self.windows = windows
+        self.total_chars = total_chars
+        self.windows_total = windows_total
+        self.sampling = sampling
+        self.analyzed_chars = sum(len(window) for window in windows)
+
+    @property
+    def chunked(self):
+        return self.windows_total > 1
+
+    def text(self):
+        """Analyzed text, for features and rules"""
+        return self.windows[0] if len(self.windows) == 1 else '\n'.join(self.windows)
+
+    def coverage(self):
+        coverage = {
+            'analyzed_chars': self.analyzed_chars,
+            'total_chars': self.total_chars,
+            'fraction': round(self.analyzed_chars / self.total_chars, 4) if self.total_chars else 1.0,
+        }
+        if self.chunked:
+            coverage.update(windows=len(self.windows), windows_total=self.windows_total,
+                            sampling=self.sampling)
+        return coverage
+
+
+def _trim(window, first, last):
+    """Drop the partial words cut off at the window edges"""
+    if not first:
+        cut = window.find(' ')
+        if 0 <= cut < len(window) // 2:
+            window = window[cut + 1:]
+    if not last:
+        cut = window.rfind(' ')
+        if cut > len(window) // 2:
+            window = window[:cut]
+    return window
+
+
+def _sample(windows_total, max_windows, sampling):
+    if windows_total <= max_windows:
+        return range(windows_total)
+    if sampling == 'head' or max_windows == 1:
+        return range(max_windows)
+    # Evenly spread, always including the first and the last window
+    step = (windows_total - 1) / (max_windows - 1)
+    return sorted({round(i * step) for i in range(max_windows)})
+
+
+def plan_windows(text, min_chars=None, window_chars=None, max_windows=None, sampling=None):
+    """WindowPlan for a text (a single window holding all of it when it is short)"""
+    min_chars = Config.TEXT_CHUNK_MIN_CHARS if min_chars is None else min_chars
+    window_chars = window_chars or Config.TEXT_CHUNK_CHARS
+    max_windows = max_windows or Config.TEXT_CHUNK_MAX_WINDOWS
+    sampling = sampling or Config.TEXT_CHUNK_SAMPLING
+
+    if not Config.TEXT_CHUNK_ENABLED or len(text) <= max(min_chars, window_chars):
+        return WindowPlan([text], len(text), 1, sampling)
+
+    windows_total = -(-len(text) // window_chars)
+    windows = []
+    for i in _sample(windows_total, max_windows, sampling):
+        window = _trim(text[i * window_chars:(i + 1) * window_chars], i == 0, i == windows_total - 1)
+        if window.strip():
+            windows.append(window)
+    if not windows:
+        # Whitespace only at every sampled position; analyze the first window as is
+        windows = [text[:window_chars]]
+    return WindowPlan(windows, len(text), windows_total, sampling)
@@ -0,0 +1,235 @@
+"""
+Pooled URL fetching with incremental article text extraction
+One shared requests session keeps connections alive per host. Bodies are
+streamed straight into an HTML parser (nothing past the size limit is
+downloaded) and ETag / Last-Modified validators are remembered so
+repeated fetches can be answered with 304 Not Modified.
+"""
+
+import re
+import sys
+import time
+import codecs
+import threading
+import contextvars
+from html.parser import HTMLParser
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from config import Config
+from utils.metrics import observe
+
+# Content inside these tags is never article text
+SKIP_TAGS = frozenset(['script', 'style', 'nav', 'header', 'footer', 'aside',
+                       'noscript', 'form', 'svg', 'iframe', 'template', 'button'])
+
+# Void elements never get an end tag, so they must not change the depth counters
+VOID_TAGS = frozenset(['area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+                       'link', 'meta', 'source', 'track', 'wbr'])
+
+# Tags that separate words; inline tags (<b>, <a>, ...) join text directly
+BLOCK_TAGS = frozenset(['p', 'div', 'br', 'li', 'ul', 'ol', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+                        'tr', 'td', 'th', 'table', 'section', 'article', 'blockquote', 'pre',
+                        'figcaption', 'main', 'dd', 'dt'])
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+class FetchError(Exception):
+    """Raised when a page can't be fetched or is too large"""
+
+
+class ArticleExtractor(HTMLParser):
+    """Streaming HTML to text: keeps <article> text when present, else body text"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = None
+        self._title_parts = None
+        self._skip_depth = 0
+        self._article_depth = 0
+        self._page_parts = []
+        self._article_parts = []
+
+    def _separate(self, tag):
+        """Break words at block boundaries"""
+        if tag in BLOCK_TAGS and not self._skip_depth:
+            self.handle_data(' ')
+
+    def handle_starttag(self, tag, attrs):
+        self._separate(tag)
+        if tag in VOID_TAGS:
+            return
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == 'article':
+            self._article_depth += 1
+        elif tag == 'title' and self.title is None and not self._skip_depth:
+            self._title_parts = []
+
+    def handle_endtag(self, tag):
+        self._separate(tag)
+        if tag in SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag == 'article' and self._article_depth:
+            self._article_depth -= 1
+        elif tag == 'title' and self._title_parts is not None:
+            self.title = _WHITESPACE_RE.sub(' ', ''.join(self._title_parts)).strip()
+            self._title_parts = None
+
+    def handle_data(self, data):
+        if self._title_parts is not None:
+            self._title_parts.append(data)
+            return
+        if self._skip_depth:
+            return
+        self._page_parts.append(data)
+        if self._article_depth:
+            self._article_parts.append(data)
+
+    def text(self):
+        parts = self._article_parts or self._page_parts
+        return _WHITESPACE_RE.sub(' ', ''.join(parts)).strip()
+
+
+class URLFetcher:
+    """Shared connection pool, size limit and conditional GET cache"""
+
+    def __init__(self, max_bytes=None, timeout=None, validator_cache_bytes=None):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.max_bytes = max_bytes or Config.URL_MAX_BYTES
+        self.timeout = timeout or Config.URL_FETCH_TIMEOUT
+        self.validator_cache_bytes = validator_cache_bytes or Config.URL_VALIDATOR_CACHE_MAX_BYTES
+
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = 'Mozilla/5.0'
+        adapter = HTTPAdapter(pool_connections=Config.URL_POOL_HOSTS,
+                              pool_maxsize=Config.URL_FETCH_PER_HOST)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        # url -> {'etag', 'last_modified', 'text', 'title', 'size'}, bounded by total size
+        self._validators = OrderedDict()
+        self._validators_size = 0
+        self._lock = threading.Lock()
+        self._host_limits = {}
+        self._local = threading.local()
+
+    def _host_limit(self, url):
+        """Semaphore bounding concurrent requests to one host"""
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(Config.URL_FETCH_PER_HOST)
+            return self._host_limits[host]
+
+    def fetch(self, url):
+        """Fetch a page and return {'url', 'text', 'title', 'not_modified'}"""
+        # Parsing is interleaved with the download; it is timed separately in _extract
+        started = time.perf_counter()
+        self._local.parse_seconds = 0.0
+        try:
+            return self._fetch(url)
+        finally:
+            observe('http_fetch', time.perf_counter() - started - self._local.parse_seconds)
+
+    def _fetch(self, url):
+        with self._lock:
+            cached = self._validators.get(url)
+
+        headers = {}
+        if cached:
+            if cached['etag']:
+                headers['If-None-Match'] = cached['etag']
+            if cached['last_modified']:
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        with self._host_limit(url):
+            with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+                if response.status_code == 304 and cached:
+                    with self._lock:
+                        self._validators.move_to_end(url)
+                    return {'url': url, 'text': cached['text'], 'title': cached['title'],
+                            'not_modified': True}
+
+                if response.status_code >= 400:
+                    raise FetchError(f'HTTP {response.status_code}')
+
+                length = response.headers.get('Content-Length')
+                if length and length.isdigit() and int(length) > self.max_bytes:
+                    raise FetchError(f'Page is larger than {self.max_bytes} bytes')
+
+                extractor = self._extract(response)
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+
+        page = {'url': url, 'text': extractor.text(), 'title': extractor.title,
+                'not_modified': False}
+
+        if etag or last_modified:
+            # Memory held by the entry, dominated by the extracted text
+            size = sys.getsizeof(page['text']) + sys.getsizeof(page['title'] or '')
+            with self._lock:
+                previous = self._validators.pop(url, None)
+                if previous is not None:
+                    self._validators_size -= previous['size']
+                if size <= self.validator_cache_bytes:
+                    self._validators[url] = {'etag': etag, 'last_modified': last_modified,
+                                             'text': page['text'], 'title': page['title'], 'size': size}
+                    self._validators_size += size
+                while self._validators_size > self.validator_cache_bytes:
+                    self._validators_size -= self._validators.popitem(last=False)[1]['size']
+
+        return page
+
+    def _extract(self, response):
+        """Feed the streamed body into the extractor, enforcing the size limit"""
+        # Without an explicit charset requests assumes ISO-8859-1; UTF-8 is the better guess for HTML
+        content_type = response.headers.get('Content-Type', '')
+        encoding = response.encoding if 'charset' in content_type.lower() else 'utf-8'
+        try:
+            decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        except LookupError:
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+        extractor = ArticleExtractor()
+        received = 0
+        parse_seconds = 0.0
+        try:
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                received += len(chunk)
+                if received > self.max_bytes:
+                    raise FetchError(f'Page is larger than {self.max_bytes} bytes')
+                started = time.perf_counter()
+                extractor.feed(decoder.decode(chunk))
+                parse_seconds += time.perf_counter() - started
+            started = time.perf_counter()
+            extractor.feed(decoder.decode(b'', final=True))
+            extractor.close()
+            parse_seconds += time.perf_counter() - started
+        finally:
+            self._local.parse_seconds = parse_seconds
+            observe('html_parse', parse_seconds)
+        return extractor
+
+    def fetch_many(self, urls, workers=None):
+        """
+        Fetch URLs concurrently (bounded pool, per-host limits)
+        Returns one page dict or FetchError/exception per URL, in input order
+        """
+        def fetch_one(url):
+            try:
+                return self.fetch(url)
+            except Exception as e:
+                return e
+
+        urls = list(urls)
+        if not urls:
+            return []
+        # Each task runs in a copy of the caller's context so stage timings reach its profile
+        with ThreadPoolExecutor(max_workers=min(workers or Config.URL_FETCH_WORKERS, len(urls))) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, fetch_one, url) for url in urls]
+            return [future.result() for future in futures]